@@ -0,0 +1,52 @@
+"""
+Gunicorn settings for the production container.
+
+    gunicorn -c ClockingInAndOut/gunicorn.conf.py
+
+Everything is driven by environment variables:
+
+SERVER_MODE             'wsgi' (default) runs threaded sync workers;
+                        'asgi' runs uvicorn workers, which the dashboard
+                        event stream and long streaming exports need
+WEB_CONCURRENCY         worker processes (default: 2 x CPUs + 1)
+GUNICORN_THREADS        threads per WSGI worker (default: 4)
+GUNICORN_MAX_REQUESTS   recycle a worker after this many requests (default:
+                        1000, 0 disables), with up to 10% random jitter
+GUNICORN_TIMEOUT        seconds before a silent worker is killed (default: 30)
+GUNICORN_KEEPALIVE      seconds to hold idle keep-alive connections (default: 5)
+PORT                    port to bind on all interfaces (default: 8000)
+
+`kill -HUP <master pid>` reloads the code and settings gracefully: new
+workers are started before the old ones finish their requests and exit.
+"""
+import multiprocessing
+import os
+
+server_mode = os.environ.get('SERVER_MODE', 'wsgi').lower()
+if server_mode == 'asgi':
+    wsgi_app = 'ClockingInAndOut.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'ClockingInAndOut.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Settings choose cross-process backends (events, cache) from the worker count
+os.environ['WEB_CONCURRENCY'] = str(workers)
+
+# Recycling bounds memory growth; jitter keeps workers from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+# Event streams close themselves every 30 minutes; don't wait that long on shutdown
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+# Heartbeat files in memory rather than on the container's disk
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+errorlog = '-'
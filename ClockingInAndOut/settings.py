@@ -11,7 +11,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 import os
+import sys
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,7 +43,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so session and auth queries are counted too
+    'PunchClock.middleware.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Serves collected static files from the app server, ahead of sessions and auth
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -50,6 +56,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request query count / SQL time in Server-Timing headers and /api/admin/query-stats/
+QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'True') == 'True'
+
 ROOT_URLCONF = 'ClockingInAndOut.urls'
 
 TEMPLATES = [
@@ -74,17 +83,38 @@ WSGI_APPLICATION = 'ClockingInAndOut.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Connection details default to the docker-compose.yml database.
+# DB_CONN_MAX_AGE keeps a connection open across requests for that many
+# seconds (0 closes it after every request); with health checks a connection
+# that died while idle is replaced instead of failing the next request.
+# DB_POOL=True uses psycopg 3's connection pool instead (install the "pool"
+# extra); Django requires CONN_MAX_AGE = 0 with a pool, and the pool is the
+# better fit for SERVER_MODE=asgi, where requests don't reuse one thread.
+DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'postgres',
-        'USER': 'postgres',
-        'PASSWORD': '1234',
-        'HOST': 'db',
-        'PORT': '5432',
+        'NAME': os.environ.get('DB_NAME', 'postgres'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', '1234'),
+        'HOST': os.environ.get('DB_HOST', 'db'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
     }
 }
 
+if DB_POOL:
+    # Sized per worker process
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        },
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -123,9 +153,25 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# collectstatic writes hashed, pre-compressed copies that WhiteNoise serves
+# with far-future cache headers
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+# Fall back to unhashed URLs when collectstatic hasn't run (tests, local checkouts)
+WHITENOISE_MANIFEST_STRICT = False
+
 # Media files (User uploaded content)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Serve MEDIA_ROOT from Django when no reverse proxy does (the container
+# default); responses are file-backed so gunicorn sends them with sendfile
+SERVE_MEDIA = os.environ.get('SERVE_MEDIA', 'True') == 'True'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -134,5 +180,59 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = '/welcome/'  # Redirect unauthenticated users to the Welcome page
 
+# Worker processes serving the app; gunicorn.conf.py sets it for its workers
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+
+# Live dashboard events: PunchClock.events.LocalEventBroker only reaches
+# subscribers in the same process, so several workers share events through
+# PunchClock.events.PostgresEventBroker
+DASHBOARD_EVENT_BACKEND = os.environ.get(
+    'DASHBOARD_EVENT_BACKEND',
+    'PunchClock.events.PostgresEventBroker' if WEB_CONCURRENCY > 1 else 'PunchClock.events.LocalEventBroker'
+)
+
+# Cache for employee lookups, statistics responses and calendar ETags.
+# Writes invalidate them by bumping versions in this cache, so every worker
+# must share it: with several workers the default is a FileBasedCache in
+# CACHE_LOCATION (a volume shared by all web containers), and the
+# per-process LocMemCache is refused.
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+CACHE_BACKEND = os.environ.get(
+    'CACHE_BACKEND',
+    'django.core.cache.backends.filebased.FileBasedCache' if WEB_CONCURRENCY > 1 else LOCMEM_CACHE
+)
+if CACHE_BACKEND == LOCMEM_CACHE and WEB_CONCURRENCY > 1:
+    raise ImproperlyConfigured(
+        f'CACHE_BACKEND={LOCMEM_CACHE} is per process and would serve stale responses '
+        f'with WEB_CONCURRENCY={WEB_CONCURRENCY}; use a shared backend such as FileBasedCache'
+    )
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', 'punchclock' if CACHE_BACKEND == LOCMEM_CACHE else '/var/tmp/punchclock_cache'
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '10000')),
+        },
+    }
+}
+if sys.argv[1:2] == ['test']:
+    # Tests get a private cache rather than the one a running server uses
+    CACHES['default'] = {'BACKEND': LOCMEM_CACHE, 'LOCATION': 'punchclock-tests'}
+
+# Upper bound in seconds on how long a cached statistics response is served;
+# writes invalidate them immediately
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', '300'))
+
+# Seconds a user's Employee record stays cached between requests
+EMPLOYEE_CACHE_TIMEOUT = int(os.environ.get('EMPLOYEE_CACHE_TIMEOUT', '30'))
+
 # PDF Export settings
+# 'reportlab' renders in-process; 'wkhtmltopdf' uses the xvfb wrapper below
+EXPORT_PDF_BACKEND = os.environ.get('EXPORT_PDF_BACKEND', 'reportlab')
 WKHTMLTOPDF_CMD = '/usr/local/bin/wkhtmltopdf-xvfb'
+
+# Seconds an export job may stay running before it is assumed lost (e.g. its
+# worker was killed) and marked failed
+EXPORT_JOB_TIMEOUT = int(os.environ.get('EXPORT_JOB_TIMEOUT', '1800'))
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PunchclockConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'PunchClock'
+
+    def ready(self):
+        # Connects the signals that clear cached employee lookups and responses
+        from . import caching, employees  # noqa: F401
@@ -0,0 +1,167 @@
+"""
+Versioned response caching for the dashboard and statistics endpoints.
+
+Every admin and every employee has a version number in the default cache.
+Cached responses are stored under a key that includes the versions of the
+scopes they read, so changing a time entry or employee bumps the versions
+and the old responses are simply never read again (they expire on their
+own after settings.RESPONSE_CACHE_TIMEOUT seconds).
+
+TimeEntry.save()/delete() and TimeEntryQuerySet's bulk_create, update and
+delete bump the versions of the employees they touch (and their admins)
+next to the DailyHours refresh. Model signals are only used for Employee
+and Department: a post_delete receiver on TimeEntry would stop cascades
+from deleting entries in bulk.
+
+Calendars have a version per user, bumped by every holiday, note and
+weekend change. conditional_response() turns the versioned key into a
+strong ETag, so a client revalidating an unchanged month gets a 304
+after one cache read. That read is only trustworthy when every worker
+shares the cache, which settings enforce when WEB_CONCURRENCY > 1.
+
+Department listings share DEPARTMENTS_SCOPE, bumped by Department and
+Employee saves and deletes.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+
+from .models import Department, Employee
+
+# Departments are shared by all admins, so their listings have one scope
+DEPARTMENTS_SCOPE = 'departments'
+
+
+def admin_scope(admin_id):
+    return f'admin:{admin_id}'
+
+
+def employee_scope(employee_id):
+    return f'employee:{employee_id}'
+
+
+def calendar_scope(user_id):
+    return f'calendar:{user_id}'
+
+
+def version_key(scope):
+    return f'punchclock:version:{scope}'
+
+
+def get_versions(scopes):
+    """Current version of each scope, starting missing ones at a fresh value."""
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A new value rather than 1, so an evicted version never matches old entries
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(scopes):
+    """Invalidate everything cached for the scopes, now and when the transaction commits."""
+    scopes = set(scopes)
+    if not scopes:
+        return
+
+    def bump():
+        cache.set_many({version_key(scope): time.time_ns() for scope in scopes}, None)
+
+    bump()
+    # A request that read the old rows before the commit may have cached them again
+    transaction.on_commit(bump)
+
+
+def touch_employees(employee_ids):
+    """Bump the employees' versions and those of the admins that manage them."""
+    employee_ids = {employee_id for employee_id in employee_ids if employee_id is not None}
+    if not employee_ids:
+        return
+    admin_ids = Employee.objects.filter(id__in=employee_ids).values_list('admin_id', flat=True).distinct()
+    bump_versions(
+        [employee_scope(employee_id) for employee_id in employee_ids]
+        + [admin_scope(admin_id) for admin_id in admin_ids]
+    )
+
+
+def touch_calendars(user_ids):
+    """Invalidate the cached calendar responses (and ETags) of the users."""
+    bump_versions([calendar_scope(user_id) for user_id in user_ids])
+
+
+def response_digest(request, scopes):
+    """Hash of the user, path, query string, today's date and the scopes' versions."""
+    versions = get_versions(scopes)
+    raw_key = '|'.join([
+        str(request.user.pk),
+        request.get_full_path(),
+        timezone.now().date().isoformat(),
+        *(f'{scope}={version}' for scope, version in zip(scopes, versions)),
+    ])
+    return hashlib.sha256(raw_key.encode()).hexdigest()
+
+
+def cached_response(request, scopes, build, timeout=None, digest=None):
+    """
+    Serve the JSON response build() would return from the cache while the
+    scopes are unchanged. Keys also cover the user, path, query string and
+    today's date; only 200 responses are stored.
+    """
+    key = 'punchclock:response:' + (digest or response_digest(request, scopes))
+
+    content = cache.get(key)
+    if content is not None:
+        response = HttpResponse(content, content_type='application/json')
+        response['X-Cache'] = 'HIT'
+        return response
+
+    response = build()
+    if response.status_code == 200:
+        if timeout is None:
+            timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+        cache.set(key, response.content, timeout)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def conditional_response(request, scopes, build, timeout=None):
+    """
+    cached_response() with a strong ETag derived from the same versions.
+    A request whose If-None-Match still matches gets a 304 without the
+    response being built or read from the cache.
+    """
+    digest = response_digest(request, scopes)
+    etag = quote_etag(digest[:32])
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = cached_response(request, scopes, build, timeout, digest=digest)
+        if response.status_code != 200:
+            return response
+    response['ETag'] = etag
+    # Browsers keep the response but revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@receiver([post_save, post_delete], sender=Employee)
+def employee_changed(sender, instance, **kwargs):
+    # Department listings count employees, so any employee change affects them
+    bump_versions([employee_scope(instance.pk), admin_scope(instance.admin_id), DEPARTMENTS_SCOPE])
+
+
+@receiver([post_save, post_delete], sender=Department)
+def department_changed(sender, instance, **kwargs):
+    bump_versions([DEPARTMENTS_SCOPE])
+
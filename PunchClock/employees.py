@@ -0,0 +1,82 @@
+"""
+Resolving the Employee record of the logged in user.
+
+request_employee() loads the employee (with user, department and admin)
+at most once per request. Lookups go through a short-lived cache shared
+across requests, settings.EMPLOYEE_CACHE_TIMEOUT seconds, which is cleared
+whenever the employee or their user is saved or deleted. Department
+renames are only picked up when the entry expires.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Department, Employee
+
+
+def employee_cache_key(user_id):
+    return f'punchclock:employee:{user_id}'
+
+
+def create_employee(user):
+    """
+    Employee record for a user who has none. Admins manage themselves and
+    join the Management department; anyone else is assigned to the first admin.
+    """
+    if user.is_staff:
+        admin = user
+        department = Department.objects.get_or_create(name="Management")[0]
+    else:
+        admin = User.objects.filter(is_staff=True).first() or user
+        department = None
+    return Employee.objects.create(
+        user=user,
+        admin=admin,
+        department=department,
+        hire_date=timezone.now().date()
+    )
+
+
+def get_employee(user, create=False):
+    """The user's employee record (None if they have none and create is False)."""
+    if not user.is_authenticated:
+        return None
+
+    key = employee_cache_key(user.pk)
+    timeout = getattr(settings, 'EMPLOYEE_CACHE_TIMEOUT', 30)
+    employee = cache.get(key)
+    if employee is None:
+        employee = Employee.objects.select_related('user', 'department', 'admin').filter(user=user).first()
+        if employee is not None:
+            cache.set(key, employee, timeout)
+        elif create:
+            employee = create_employee(user)
+            # Don't cache a row that a rollback could still undo
+            transaction.on_commit(lambda: cache.set(key, employee, timeout))
+    return employee
+
+
+# Marks a request whose employee wasn't looked up yet (None is a valid result)
+_MISSING = object()
+
+
+def request_employee(request, create=False):
+    """The logged in user's employee record, resolved once per request."""
+    employee = getattr(request, '_employee', _MISSING)
+    if employee is _MISSING or (employee is None and create):
+        employee = get_employee(request.user, create=create)
+        request._employee = employee
+    return employee
+
+
+@receiver([post_save, post_delete], sender=Employee)
+@receiver([post_save, post_delete], sender=User)
+def invalidate_employee_cache(sender, instance, **kwargs):
+    key = employee_cache_key(instance.user_id if sender is Employee else instance.pk)
+    cache.delete(key)
+    # A request that read the old row before this transaction commits may cache it again
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,165 @@
+"""
+Live dashboard events.
+
+Views publish punch/approval/clear/undo events for an admin once the
+surrounding transaction commits, and the dashboard event stream
+subscribes to them. The broker is chosen by settings.DASHBOARD_EVENT_BACKEND:
+
+- LocalEventBroker fans events out to subscribers in the same process,
+  which is enough for a single ASGI worker (the default when
+  WEB_CONCURRENCY is 1).
+- PostgresEventBroker sends events through pg_notify and LISTENs on a
+  dedicated connection, so events reach subscribers in every worker (the
+  default with several workers).
+"""
+import asyncio
+import json
+import select
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """Events published for one admin, readable from the subscriber's event loop."""
+
+    def __init__(self, broker, admin_id):
+        self.broker = broker
+        self.admin_id = admin_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=100)
+
+    def deliver(self, event):
+        # Called from any thread; the queue belongs to the subscriber's loop
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.queue.full():
+            # A stalled client only loses its oldest events
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Next event, or None if nothing arrives within timeout seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalEventBroker:
+    """In-process pub/sub keyed by admin user id."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def subscribe(self, admin_id):
+        subscription = Subscription(self, admin_id)
+        with self.lock:
+            self.subscriptions.setdefault(admin_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscriptions.get(subscription.admin_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self.subscriptions.pop(subscription.admin_id, None)
+
+    def publish(self, admin_id, event):
+        self.dispatch(admin_id, event)
+
+    def dispatch(self, admin_id, event):
+        with self.lock:
+            subscribers = list(self.subscriptions.get(admin_id, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+
+class PostgresEventBroker(LocalEventBroker):
+    """
+    Deliver events through Postgres LISTEN/NOTIFY so every worker process
+    sees them. Publishing uses the request's connection; a background
+    thread holds one extra connection per process listening on CHANNEL.
+    """
+
+    CHANNEL = 'punchclock_dashboard'
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+
+    def subscribe(self, admin_id):
+        self.start_listener()
+        return super().subscribe(admin_id)
+
+    def publish(self, admin_id, event):
+        payload = json.dumps({'admin_id': admin_id, 'event': event})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.CHANNEL, payload])
+
+    def start_listener(self):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = threading.Thread(target=self.listen, name='dashboard-events', daemon=True)
+                self.listener.start()
+
+    def listen(self):
+        # A separate autocommit connection, outside Django's per-request handling
+        listen_connection = connection.copy()
+        # and outside the connection pool, which it would otherwise hold forever
+        listen_connection.settings_dict.get('OPTIONS', {}).pop('pool', None)
+        listen_connection.ensure_connection()
+        listen_connection.set_autocommit(True)
+        raw = listen_connection.connection
+        try:
+            with listen_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN {self.CHANNEL}')
+            for notify in self.notifications(raw):
+                message = json.loads(notify.payload)
+                self.dispatch(message['admin_id'], message['event'])
+        finally:
+            listen_connection.close()
+
+    @staticmethod
+    def notifications(raw):
+        """Notifications received on a psycopg2 or psycopg 3 connection, forever."""
+        if hasattr(raw, 'poll'):
+            # psycopg2
+            while True:
+                if select.select([raw], [], [], 30) == ([], [], []):
+                    continue
+                raw.poll()
+                while raw.notifies:
+                    yield raw.notifies.pop(0)
+        else:
+            while True:
+                yield from raw.notifies(timeout=30)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker configured by settings.DASHBOARD_EVENT_BACKEND."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            backend = getattr(settings, 'DASHBOARD_EVENT_BACKEND', 'PunchClock.events.LocalEventBroker')
+            _broker = import_string(backend)()
+        return _broker
+
+
+def publish_event(admin_id, event_type, **data):
+    """Publish an event to an admin's dashboard once the current transaction commits."""
+    if admin_id is None:
+        return
+    event = {'type': event_type, **data}
+    transaction.on_commit(lambda: get_broker().publish(admin_id, event))
@@ -0,0 +1,429 @@
+"""
+Export generation shared by the export views and the export worker.
+
+The views only validate the request; building the data and writing the
+file happens here so it can run inside the run_export_worker command
+instead of the HTTP worker.
+
+pandas, pdfkit and reportlab are imported where a file is written, not at
+module level: the views import this module, and pandas alone would add
+hundreds of milliseconds and tens of MB to every web worker's startup.
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .employees import get_employee
+from .models import DailyHours, Employee, Export, ExportJob, TimeEntry
+from .reports import build_report_rows, working_day_counts
+
+logger = logging.getLogger(__name__)
+
+# Form fields stored on an ExportJob and replayed by the worker
+EXPORT_FIELDS = (
+    'format', 'group_by', 'start_date', 'end_date',
+    'include_hours', 'include_productivity', 'include_attendance',
+    'filter_type', 'department', 'employee',
+    'export_all_employees', 'selected_employee_ids',
+)
+
+EXPORT_FORMATS = {
+    'pdf': '.pdf',
+    'csv': '.csv',
+    'json': '.json',
+    'excel': '.xlsx',
+}
+
+# Raw time entry formats that are streamed straight to the client
+STREAM_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'ndjson': ('application/x-ndjson', '.ndjson'),
+}
+
+STREAM_COLUMNS = (
+    'employee', 'department', 'date', 'start_time', 'end_time',
+    'total_hours', 'entry_type', 'status',
+)
+
+
+class ExportError(Exception):
+    """Raised when an export request is invalid or produces no data."""
+
+
+def parse_export_params(data):
+    """Validate the raw export form values and return typed parameters."""
+    try:
+        start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d').date()
+        end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        raise ExportError('Invalid date format')
+
+    if end_date < start_date:
+        raise ExportError('End date must be after start date')
+
+    export_all = data.get('export_all_employees') == 'on'
+    selected_employee_ids = data.get('selected_employee_ids') or ''
+    if not export_all and not selected_employee_ids.strip():
+        raise ExportError('Please select at least one employee or check "Export All Employees"')
+
+    return {
+        'format': data.get('format'),
+        'group_by': data.get('group_by'),
+        'start_date': start_date,
+        'end_date': end_date,
+        'include_hours': data.get('include_hours') == 'on',
+        'include_productivity': data.get('include_productivity') == 'on',
+        'include_attendance': data.get('include_attendance') == 'on',
+        'filter_type': data.get('filter_type'),
+        'department_id': data.get('department'),
+        'employee_id': data.get('employee'),
+        'export_all': export_all,
+        'employee_ids': [int(id) for id in selected_employee_ids.split(',') if id.strip()],
+    }
+
+
+def resolve_employees(admin, params):
+    """Return the employees (with user and department loaded) covered by an export."""
+    # Get admin's own employee record
+    admin_employee = get_employee(admin, create=True)
+
+    # Handle employee selection based on export type
+    if params['export_all']:
+        # Get all employees managed by this admin
+        employees = list(Employee.objects.filter(admin=admin).select_related('user', 'department'))
+        if admin_employee not in employees:
+            employees.append(admin_employee)
+    else:
+        # Get only selected employees, among the admin's own and their own record
+        employees = list(Employee.objects.filter(
+            Q(admin=admin) | Q(user=admin), id__in=params['employee_ids']
+        ).select_related('user', 'department'))
+
+    # Apply additional filters to the selected employees
+    if params['filter_type'] == 'department' and params['department_id']:
+        employees = [emp for emp in employees if str(emp.department_id) == str(params['department_id'])]
+    elif params['filter_type'] == 'employee' and params['employee_id']:
+        employees = [emp for emp in employees if str(emp.id) == str(params['employee_id'])]
+    return employees
+
+
+def build_export_data(admin, params, employees=None):
+    """Group the export rows in a single pass over the daily rollups."""
+    if employees is None:
+        employees = resolve_employees(admin, params)
+    return build_report_rows(
+        employees,
+        params['start_date'],
+        params['end_date'],
+        params['group_by'],
+        include_hours=params['include_hours'],
+        include_attendance=params['include_attendance'],
+        include_productivity=params['include_productivity']
+    )
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def iter_time_entry_rows(employees, start_date, end_date, chunk_size=2000):
+    """
+    Yield one dict per raw time entry of the given employees, fetching the
+    rows from the database chunk_size at a time.
+    """
+    labels = {
+        emp.id: (emp.full_name, emp.department.name if emp.department else 'N/A')
+        for emp in employees
+    }
+    entries = TimeEntry.objects.filter(
+        employee_id__in=labels.keys(),
+        date__range=[start_date, end_date]
+    ).order_by('employee_id', 'date', 'start_time').values_list(
+        'employee_id', 'date', 'start_time', 'end_time', 'total_hours', 'entry_type', 'status'
+    )
+
+    for employee_id, day, start_time, end_time, total_hours, entry_type, status in entries.iterator(chunk_size=chunk_size):
+        employee, department = labels[employee_id]
+        yield {
+            'employee': employee,
+            'department': department,
+            'date': day.strftime('%Y-%m-%d'),
+            'start_time': start_time.strftime('%H:%M:%S'),
+            'end_time': end_time.strftime('%H:%M:%S') if end_time else None,
+            'total_hours': float(total_hours),
+            'entry_type': entry_type,
+            'status': status,
+        }
+
+
+def stream_time_entries(rows, format):
+    """Encode rows as CSV or JSON lines, one chunk per row."""
+    if format not in STREAM_FORMATS:
+        raise ExportError('Invalid stream format selected')
+
+    if format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(STREAM_COLUMNS)
+        for row in rows:
+            yield writer.writerow([row[column] for column in STREAM_COLUMNS])
+    else:
+        for row in rows:
+            yield json.dumps(row) + '\n'
+
+
+async def aiter_batches(chunks, batch_size):
+    """
+    Async iterator over a sync iterator of str chunks, joining up to
+    batch_size of them per step. ASGI servers consume a sync iterator whole
+    before sending anything; this pulls each batch in the request's sync
+    thread (which the database cursor belongs to) and sends it right away.
+    """
+    iterator = iter(chunks)
+    take = sync_to_async(lambda: ''.join(islice(iterator, batch_size)))
+    while True:
+        batch = await take()
+        if not batch:
+            return
+        yield batch
+
+
+def export_file_path(export):
+    """Absolute path of an Export's file under MEDIA_ROOT/exports."""
+    return os.path.join(settings.MEDIA_ROOT, 'exports', os.path.basename(export.file_url))
+
+
+def export_cache_key(admin, params, employees):
+    """
+    Hash the normalized export parameters together with a watermark of the
+    daily rollups the report is built from. Every TimeEntry write refreshes
+    the affected rollups (bumping updated_at) or removes them (lowering the
+    count), so any change to the data in scope produces a new key.
+    Productivity reports also depend on each employee's working days.
+    """
+    watermark = DailyHours.objects.filter(
+        employee_id__in=[emp.id for emp in employees],
+        date__range=[params['start_date'], params['end_date']]
+    ).aggregate(last_updated=Max('updated_at'), rollups=Count('id'))
+
+    normalized = {
+        'admin': admin.id,
+        'format': params['format'],
+        'group_by': params['group_by'],
+        'start_date': params['start_date'].isoformat(),
+        'end_date': params['end_date'].isoformat(),
+        'include_hours': params['include_hours'],
+        'include_productivity': params['include_productivity'],
+        'include_attendance': params['include_attendance'],
+        # Names and departments appear in the rows, so they are part of the key
+        'employees': sorted(
+            [emp.id, emp.full_name, emp.user.is_staff, emp.department_id,
+             emp.department.name if emp.department else None]
+            for emp in employees
+        ),
+        'last_updated': watermark['last_updated'].isoformat() if watermark['last_updated'] else None,
+        'rollups': watermark['rollups'],
+        'working_days': sorted(working_day_counts(employees, params['start_date'], params['end_date']).items())
+        if params['include_productivity'] else None,
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+def find_cached_export(admin, cache_key):
+    """Return the admin's Export produced for cache_key, if its file still exists."""
+    for export in Export.objects.filter(admin=admin, cache_key=cache_key):
+        if os.path.exists(export_file_path(export)):
+            return export
+    return None
+
+
+def render_pdf(data, file_path, export_dir, filename):
+    """Render the rows with the backend selected by settings.EXPORT_PDF_BACKEND."""
+    if getattr(settings, 'EXPORT_PDF_BACKEND', 'reportlab') == 'wkhtmltopdf':
+        render_pdf_wkhtmltopdf(data, file_path, export_dir, filename)
+    else:
+        from . import pdf
+        pdf.render_pdf(data, file_path)
+
+
+def render_pdf_wkhtmltopdf(data, file_path, export_dir, filename):
+    # Create HTML content
+    html = '''
+    <html>
+        <head>
+            <meta charset="UTF-8">
+            <style>
+                body { font-family: Arial, sans-serif; }
+                table {
+                    border-collapse: collapse;
+                    width: 100%;
+                    margin-bottom: 1em;
+                }
+                th, td {
+                    border: 1px solid #ddd;
+                    padding: 8px;
+                    text-align: left;
+                }
+                th {
+                    background-color: #f2f2f2;
+                    font-weight: bold;
+                }
+                tr:nth-child(even) { background-color: #f9f9f9; }
+            </style>
+        </head>
+        <body>
+            <h1>Export Report</h1>
+            <table>
+                <thead>
+                    <tr>
+    '''
+
+    # Add table headers and data
+    for key in data[0].keys():
+        formatted_key = key.replace('_', ' ').title()
+        html += f'<th>{formatted_key}</th>'
+
+    html += '''
+                    </tr>
+                </thead>
+                <tbody>
+    '''
+
+    for row in data:
+        html += '<tr>'
+        for value in row.values():
+            html += f'<td>{value}</td>'
+        html += '</tr>'
+
+    html += '''
+                </tbody>
+            </table>
+        </body>
+    </html>
+    '''
+
+    # Save HTML to a temporary file
+    temp_html = os.path.join(export_dir, f'{filename}_temp.html')
+    with open(temp_html, 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    import pdfkit
+
+    try:
+        # Use the wkhtmltopdf-xvfb wrapper script that's configured in the Docker container
+        config = pdfkit.configuration(wkhtmltopdf=settings.WKHTMLTOPDF_CMD)
+        options = {
+            'quiet': '',
+            'enable-local-file-access': None,
+            'encoding': 'UTF-8'
+        }
+        pdfkit.from_file(temp_html, file_path, configuration=config, options=options)
+    finally:
+        # Clean up temporary HTML file
+        if os.path.exists(temp_html):
+            os.remove(temp_html)
+
+
+def write_export_file(data, format, filename):
+    """Write the rows in the requested format and return the file's MEDIA_URL path."""
+    if format not in EXPORT_FORMATS:
+        raise ExportError('Invalid export format selected')
+
+    # Ensure media directories exist
+    export_dir = os.path.join(settings.MEDIA_ROOT, 'exports')
+    os.makedirs(export_dir, exist_ok=True)
+
+    file_ext = EXPORT_FORMATS[format]
+    file_path = os.path.join(export_dir, f'{filename}{file_ext}')
+
+    if format == 'pdf':
+        render_pdf(data, file_path, export_dir, filename)
+
+    elif format == 'csv':
+        with open(file_path, 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=data[0].keys())
+            writer.writeheader()
+            writer.writerows(data)
+
+    elif format == 'json':
+        with open(file_path, 'w') as jsonfile:
+            json.dump(data, jsonfile)
+
+    elif format == 'excel':
+        import pandas as pd
+        df = pd.DataFrame(data)
+        df.to_excel(file_path, index=False)
+
+    # Check if file was created successfully
+    if not os.path.exists(file_path):
+        raise IOError(f"Failed to create export file: {file_path}")
+
+    # Construct the URL using the MEDIA_URL setting
+    return f'{settings.MEDIA_URL.rstrip("/")}/exports/{filename}{file_ext}'
+
+
+def generate_export(admin, params, filename=None, progress=None):
+    """Build, write and record an export; returns the Export."""
+    progress = progress or (lambda value: None)
+
+    # Identical exports over unchanged data reuse the existing file
+    employees = resolve_employees(admin, params)
+    cache_key = export_cache_key(admin, params, employees)
+    cached = find_cached_export(admin, cache_key)
+    if cached is not None:
+        return cached
+
+    data = build_export_data(admin, params, employees)
+    if not data:
+        raise ExportError('No data available for the selected criteria')
+    progress(40)
+
+    # Generate unique filename
+    if filename is None:
+        filename = f'export_{timezone.now().strftime("%Y%m%d_%H%M%S")}'
+    file_url = write_export_file(data, params['format'], filename)
+    progress(90)
+
+    # Create export record
+    return Export.objects.create(
+        admin=admin,
+        format=params['format'],
+        report_type=params['group_by'],
+        start_date=params['start_date'],
+        end_date=params['end_date'],
+        file_url=file_url,
+        cache_key=cache_key
+    )
+
+
+def run_export_job(job):
+    """Process a claimed ExportJob, recording the outcome on the job."""
+    try:
+        params = parse_export_params(job.params)
+        job.set_progress(10)
+        filename = f'export_{timezone.now().strftime("%Y%m%d_%H%M%S")}_{job.id}'
+        job.export = generate_export(job.admin, params, filename=filename, progress=job.set_progress)
+        job.status = 'done'
+        job.progress = 100
+    except ExportError as e:
+        job.status = 'failed'
+        job.error = str(e)
+    except Exception as e:
+        logger.exception('Export job %s failed', job.id)
+        job.status = 'failed'
+        job.error = str(e)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['export', 'status', 'progress', 'error', 'finished_at'])
+    return job
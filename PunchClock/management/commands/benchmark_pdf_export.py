@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from PunchClock.exports import render_pdf
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+BACKENDS = ('reportlab', 'wkhtmltopdf')
+
+
+def sample_rows(count):
+    """Rows shaped like an export grouped by employee."""
+    departments = ['Engineering', 'Sales', 'Support', 'Operations', 'Management']
+    return [{
+        'employee': f'Employee {index:05d}',
+        'role': 'Manager' if index % 25 == 0 else 'Employee',
+        'department': departments[index % len(departments)],
+        'status': 'Active',
+        'total_hours': round(120 + (index % 40) * 1.25, 2),
+        'attendance_rate': round(80 + index % 20, 1),
+        'productivity': round(6 + (index % 12) / 4, 2),
+    } for index in range(count)]
+
+
+def run_backend(backend, rows, repeat, results):
+    """Render repeat times in a fresh process and report timings and peak RSS (KB)."""
+    data = sample_rows(rows)
+    export_dir = tempfile.mkdtemp()
+    timings = []
+    try:
+        with override_settings(EXPORT_PDF_BACKEND=backend):
+            for run in range(repeat):
+                filename = f'benchmark_{run}'
+                started = time.perf_counter()
+                render_pdf(data, os.path.join(export_dir, f'{filename}.pdf'), export_dir, filename)
+                timings.append(time.perf_counter() - started)
+        results.put({
+            'backend': backend,
+            'timings': timings,
+            'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'child_rss_kb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+            'size_kb': os.path.getsize(os.path.join(export_dir, f'benchmark_{repeat - 1}.pdf')) // 1024,
+        })
+    except Exception as e:
+        results.put({'backend': backend, 'error': str(e)})
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+
+class Command(BaseCommand):
+    help = 'Compares per-export latency and peak RSS of the PDF export backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=500,
+            help='Number of table rows per export (default: 500)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Number of exports rendered per backend (default: 5)'
+        )
+        parser.add_argument(
+            '--backend',
+            choices=BACKENDS,
+            action='append',
+            default=None,
+            help='Backend to benchmark; may be given more than once (default: all)'
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+        self.stdout.write(f"Rendering {repeat} PDF exports of {rows} rows per backend")
+
+        # Each backend runs in its own forked process so peak RSS is not shared
+        context = multiprocessing.get_context('fork')
+        for backend in options['backend'] or BACKENDS:
+            results = context.Queue()
+            process = context.Process(target=run_backend, args=(backend, rows, repeat, results))
+            process.start()
+            result = results.get()
+            process.join()
+
+            if 'error' in result:
+                self.stdout.write(self.style.ERROR(f"{backend}: failed ({result['error']})"))
+                continue
+
+            timings = sorted(result['timings'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{backend}: "
+                f"median {timings[len(timings) // 2] * 1000:.1f} ms, "
+                f"min {timings[0] * 1000:.1f} ms, "
+                f"max {timings[-1] * 1000:.1f} ms, "
+                f"peak RSS {result['rss_kb'] / 1024:.1f} MB "
+                f"(+{result['child_rss_kb'] / 1024:.1f} MB in subprocesses), "
+                f"{result['size_kb']} KB per file"
+            ))
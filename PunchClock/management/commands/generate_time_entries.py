@@ -1,9 +1,57 @@
-from django.core.management.base import BaseCommand
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
+from django.db import connections
 from django.utils import timezone
 from PunchClock.models import Employee, TimeEntry
+from PunchClock.seeding import bulk_insert
 from datetime import datetime, timedelta, time
+import django
 import random
+import time as clock
+
+
+def random_shift(rng=random):
+    """Random start between 8:00 and 10:59 and a 6 to 10 hour shift"""
+    start_hour = rng.randint(8, 10)
+    start_minute = rng.randint(0, 59)
+    work_hours = rng.uniform(6.0, 10.0)
+    end_minutes = int((work_hours * 60) + start_minute)
+    return time(hour=start_hour, minute=start_minute), time(hour=start_hour + (end_minutes // 60), minute=end_minutes % 60)
+
+
+def build_entries(employee_ids, dates, rng):
+    """Yield unsaved approved entries, one random shift per employee per date"""
+    for employee_id in employee_ids:
+        for entry_date in dates:
+            start_time, end_time = random_shift(rng)
+            yield TimeEntry(
+                employee_id=employee_id,
+                date=entry_date,
+                start_time=start_time,
+                end_time=end_time,
+                total_hours=TimeEntry.compute_total_hours(entry_date, start_time, end_time),
+                status='approved'
+            )
+
+
+def init_worker():
+    # Spawned workers start without Django; forked ones must not reuse the parent's connections
+    django.setup()
+    connections.close_all()
+
+
+def bulk_generate(employee_ids, dates, batch_size, seed=None):
+    """Insert entries for a chunk of employees"""
+    return bulk_insert(build_entries(employee_ids, dates, random.Random(seed)), batch_size=batch_size)
+
+
+def bulk_generate_in_worker(employee_ids, dates, batch_size, seed=None):
+    """bulk_generate() in a pool worker, which doesn't keep its connection between chunks"""
+    try:
+        return bulk_generate(employee_ids, dates, batch_size, seed)
+    finally:
+        connections.close_all()
 
 
 class Command(BaseCommand):
@@ -39,6 +87,29 @@ class Command(BaseCommand):
             default=None,
             help='Exact daily average to set (e.g., 6.4)'
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Insert entries with bulk_create in batches and print a summary instead of every entry'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk insert and transaction in --bulk mode (default: 5000)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes to split the employees across in --bulk mode (default: 1)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Random seed for --bulk mode'
+        )
 
     def handle(self, *args, **options):
         employee_id = options['employee']
@@ -46,6 +117,13 @@ class Command(BaseCommand):
         clear = options['clear']
         weekly_target = options['weekly']
         daily_target = options['daily']
+
+        if options['bulk']:
+            if weekly_target is not None or daily_target is not None:
+                raise CommandError('--bulk cannot be combined with --weekly or --daily')
+            if options['batch_size'] < 1 or options['workers'] < 1:
+                raise CommandError('--batch-size and --workers must be at least 1')
+            return self._generate_bulk(employee_id, days, clear, options)
         
         # Determine the employees to generate entries for
         if employee_id:
@@ -84,16 +162,7 @@ class Command(BaseCommand):
                         continue
                     
                     # Generate random start and end times
-                    start_hour = random.randint(8, 10)  # Between 8:00 AM and 10:00 AM
-                    start_minute = random.randint(0, 59)
-                    start_time = time(hour=start_hour, minute=start_minute)
-                    
-                    # Work hours between 6 and 10 hours
-                    work_hours = random.uniform(6.0, 10.0)
-                    end_minutes = int((work_hours * 60) + start_minute)
-                    end_hour = start_hour + (end_minutes // 60)
-                    end_minute = end_minutes % 60
-                    end_time = time(hour=end_hour, minute=end_minute)
+                    start_time, end_time = random_shift()
                     
                     # Create the time entry
                     entry = TimeEntry.objects.create(
@@ -112,6 +181,62 @@ class Command(BaseCommand):
 
         self.stdout.write("Now you can check the 'This Week' and 'Avg. Daily' statistics in the employee view")
 
+    def _generate_bulk(self, employee_id, days, clear, options):
+        """Generate random entries with bulk inserts, optionally across a process pool"""
+        employees = Employee.objects.all()
+        if employee_id:
+            employees = employees.filter(id=employee_id)
+        employee_ids = list(employees.order_by('id').values_list('id', flat=True))
+        if not employee_ids:
+            raise CommandError(f"Employee with ID {employee_id} does not exist" if employee_id else "No employees found")
+
+        if clear:
+            cleared_count = TimeEntry.objects.filter(employee_id__in=employee_ids).delete()[0]
+            self.stdout.write(f"Cleared {cleared_count} existing time entries")
+
+        today = timezone.now().date()
+        dates = [today - timedelta(days=offset) for offset in range(days)]
+        dates = [entry_date for entry_date in dates if entry_date.weekday() < 5]
+        batch_size = options['batch_size']
+        workers = min(options['workers'], len(employee_ids))
+        seed = options['seed']
+
+        # Several chunks per worker so a slow chunk doesn't leave the others idle
+        chunk_size = max(1, -(-len(employee_ids) // (workers * 4)))
+        chunks = [employee_ids[index:index + chunk_size] for index in range(0, len(employee_ids), chunk_size)]
+        self.stdout.write(
+            f"Generating {len(employee_ids) * len(dates)} entries for {len(employee_ids)} employees "
+            f"over {len(dates)} weekdays in {len(chunks)} chunks with {workers} worker(s)"
+        )
+
+        started = clock.perf_counter()
+        entries_created = 0
+        if workers == 1:
+            for index, chunk in enumerate(chunks):
+                entries_created += bulk_generate(chunk, dates, batch_size, None if seed is None else seed + index)
+                self._report_progress(entries_created, started)
+        else:
+            # Workers open their own connections; don't hand them a copy of ours
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+                futures = [
+                    pool.submit(bulk_generate_in_worker, chunk, dates, batch_size, None if seed is None else seed + index)
+                    for index, chunk in enumerate(chunks)
+                ]
+                for future in as_completed(futures):
+                    entries_created += future.result()
+                    self._report_progress(entries_created, started)
+
+        elapsed = clock.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully generated {entries_created} time entries in {elapsed:.1f}s "
+            f"({entries_created / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
+
+    def _report_progress(self, entries_created, started):
+        elapsed = clock.perf_counter() - started
+        self.stdout.write(f"  {entries_created} entries inserted ({elapsed:.1f}s)")
+
     def _generate_exact_stats(self, employee, weekly_target, daily_target, days):
         """Generate time entries to achieve exact weekly and daily statistics"""
         today = timezone.now().date()
@@ -0,0 +1,188 @@
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from importlib import import_module
+from urllib.parse import urlsplit
+import http.client
+import json
+import statistics
+import threading
+import time
+
+DEFAULT_PATHS = ['/api/time/today/', '/api/dashboard/stats/', '/api/time/stats/', '/punchclock', '/static/punch/js/base.js']
+
+
+def login_cookie(username):
+    """Session cookie for the user, created directly in the configured session store."""
+    try:
+        user = User.objects.get(username=username)
+    except User.DoesNotExist:
+        raise CommandError(f"User '{username}' does not exist")
+
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class LoadWorker(threading.Thread):
+    """Requests the paths in turn over one keep-alive connection until the deadline."""
+
+    def __init__(self, url, paths, headers, deadline, offset):
+        super().__init__(daemon=True)
+        self.url = url
+        self.paths = paths
+        self.headers = headers
+        self.deadline = deadline
+        self.offset = offset
+        self.samples = []  # (path, status, seconds)
+
+    def connect(self):
+        connection_class = http.client.HTTPSConnection if self.url.scheme == 'https' else http.client.HTTPConnection
+        return connection_class(self.url.hostname, self.url.port, timeout=30)
+
+    def run(self):
+        connection = self.connect()
+        index = self.offset
+        while time.monotonic() < self.deadline:
+            path = self.paths[index % len(self.paths)]
+            index += 1
+            started = time.perf_counter()
+            # Like a browser, retry once when the server closed an idle keep-alive
+            # connection (e.g. a recycled worker)
+            for attempt in range(2):
+                try:
+                    connection.request('GET', path, headers=self.headers)
+                    response = connection.getresponse()
+                    response.read()
+                    status = response.status
+                    if response.getheader('Connection', '').lower() == 'close':
+                        connection.close()
+                        connection = self.connect()
+                    break
+                except (OSError, http.client.HTTPException):
+                    status = 0
+                    connection.close()
+                    connection = self.connect()
+            self.samples.append((path, status, time.perf_counter() - started))
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = ('Load tests a running server with concurrent keep-alive clients and reports '
+            'requests/sec and latency percentiles per path')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            type=str,
+            default='http://127.0.0.1:8000',
+            help='Base URL of the running server (default: http://127.0.0.1:8000)'
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            default=None,
+            help=f'Path to request; may be given more than once (default: {" ".join(DEFAULT_PATHS)})'
+        )
+        parser.add_argument(
+            '--user',
+            type=str,
+            default=None,
+            help='Username to send requests as; a session is created for it in the configured database'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=16,
+            help='Concurrent client connections (default: 16)'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=15,
+            help='Seconds to run after a short warm-up (default: 15)'
+        )
+        parser.add_argument(
+            '--label',
+            type=str,
+            default='',
+            help='Name for this run in the output, e.g. runserver or gunicorn'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the results as JSON'
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme not in ('http', 'https') or not url.hostname:
+            raise CommandError(f"Invalid --url '{options['url']}'")
+        paths = options['path'] or DEFAULT_PATHS
+        headers = {'Connection': 'keep-alive'}
+        if options['user']:
+            headers['Cookie'] = login_cookie(options['user'])
+
+        # Warm up every worker and cache before measuring
+        self.run_clients(url, paths, headers, options['concurrency'], 2)
+        started = time.monotonic()
+        samples = self.run_clients(url, paths, headers, options['concurrency'], options['duration'])
+        elapsed = time.monotonic() - started
+
+        report = self.summarize(samples, elapsed, paths)
+        report.update({'label': options['label'], 'url': options['url'],
+                       'concurrency': options['concurrency']})
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{report['label'] or options['url']}: {report['requests']} requests in {elapsed:.1f}s, "
+            f"{report['requests_per_second']} req/s, {report['errors']} errors, "
+            f"concurrency {options['concurrency']}"
+        )
+        for path in report['paths']:
+            self.stdout.write(
+                f"  {path['path']:<32} {path['requests_per_second']:>8} req/s  "
+                f"p50 {path['p50_ms']:>7} ms  p99 {path['p99_ms']:>7} ms  statuses {path['statuses']}"
+            )
+
+    def run_clients(self, url, paths, headers, concurrency, duration):
+        deadline = time.monotonic() + duration
+        workers = [LoadWorker(url, paths, headers, deadline, offset) for offset in range(concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return [sample for worker in workers for sample in worker.samples]
+
+    def summarize(self, samples, elapsed, paths):
+        report_paths = []
+        for path in paths:
+            path_samples = [sample for sample in samples if sample[0] == path]
+            durations = sorted(sample[2] * 1000 for sample in path_samples)
+            statuses = {}
+            for _, status, _ in path_samples:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            report_paths.append({
+                'path': path,
+                'requests': len(path_samples),
+                'requests_per_second': round(len(path_samples) / elapsed, 1),
+                'p50_ms': round(statistics.median(durations), 1) if durations else None,
+                'p99_ms': round(percentile(durations, 0.99), 1) if durations else None,
+                'statuses': statuses,
+            })
+        return {
+            'requests': len(samples),
+            'requests_per_second': round(len(samples) / elapsed, 1),
+            'errors': sum(1 for sample in samples if sample[1] == 0 or sample[1] >= 500),
+            'paths': report_paths,
+        }
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from PunchClock.models import DailyHours, Employee
+from datetime import datetime
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the DailyHours rollup table from raw time entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--employee',
+            type=int,
+            default=None,
+            help='ID of the specific employee to rebuild rollups for. If not specified, rebuilds for all employees.'
+        )
+        parser.add_argument(
+            '--start-date',
+            type=str,
+            default=None,
+            help='Only rebuild days on or after this date (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--end-date',
+            type=str,
+            default=None,
+            help='Only rebuild days on or before this date (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rollup rows to insert per query (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        employee_id = options['employee']
+        employee_ids = None
+
+        if employee_id:
+            try:
+                employee = Employee.objects.get(id=employee_id)
+                employee_ids = [employee.id]
+                self.stdout.write(f"Rebuilding rollups for employee: {employee.full_name}")
+            except Employee.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f"Employee with ID {employee_id} does not exist"))
+                return
+        else:
+            self.stdout.write("Rebuilding rollups for all employees")
+
+        try:
+            start_date = datetime.strptime(options['start_date'], '%Y-%m-%d').date() if options['start_date'] else None
+            end_date = datetime.strptime(options['end_date'], '%Y-%m-%d').date() if options['end_date'] else None
+        except ValueError:
+            self.stdout.write(self.style.ERROR("Invalid date format. Please use YYYY-MM-DD."))
+            return
+
+        created = DailyHours.rebuild(
+            employee_ids=employee_ids,
+            start_date=start_date,
+            end_date=end_date,
+            batch_size=options['batch_size']
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Successfully rebuilt {created} daily rollups"))
@@ -0,0 +1,212 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from PunchClock.seeding import seed_organisation, seed_time_entries
+from datetime import timedelta
+import contextlib
+import django
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_SCALES = ['1x10x0.25', '2x50x1']
+
+
+def parse_scale(value):
+    """'ADMINSxEMPLOYEESxYEARS' -> (admins, employees per admin, years)"""
+    try:
+        admins, employees, years = value.lower().split('x')
+        return int(admins), int(employees), float(years)
+    except ValueError:
+        raise CommandError(f"Invalid scale '{value}', expected ADMINSxEMPLOYEESxYEARS (e.g. 2x50x1)")
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Seeds a throwaway test database at several data scales and times the key '
+            'endpoints with the test client, printing the results as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            action='append',
+            default=None,
+            help=f'Data scale as ADMINSxEMPLOYEESxYEARS; may be given more than once (default: {" ".join(DEFAULT_SCALES)})'
+        )
+        parser.add_argument(
+            '--departments',
+            type=int,
+            default=5,
+            help='Number of departments (default: 5)'
+        )
+        parser.add_argument(
+            '--segments',
+            type=int,
+            default=3,
+            help='Maximum work segments per employee per day (default: 3)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed requests per endpoint, cold and warm, after one warm-up request (default: 5)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk insert while seeding (default: 5000)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for the generated entries (default: 0)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=None,
+            help='Write the JSON results to this file instead of stdout'
+        )
+
+    def handle(self, *args, **options):
+        scales = [parse_scale(value) for value in options['scale'] or DEFAULT_SCALES]
+
+        # Benchmarks never touch the configured database, nor a cache the
+        # running server may share (it would serve the benchmark's responses)
+        setup_test_environment()
+        isolated_cache = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmarks'}
+        })
+        isolated_cache.enable()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = []
+            # Some views print debug output; keep it out of the JSON on stdout
+            with contextlib.redirect_stdout(sys.stderr):
+                for admins, employees, years in scales:
+                    call_command('flush', interactive=False, verbosity=0)
+                    results.append(self.run_scale(admins, employees, years, options))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            isolated_cache.disable()
+            teardown_test_environment()
+
+        report = json.dumps({
+            'generated_at': timezone.now().isoformat(),
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'repeat': options['repeat'],
+            'scales': results,
+        }, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Wrote benchmark results to {options['output']}"))
+        else:
+            self.stdout.write(report)
+
+    def run_scale(self, admins, employees_per_admin, years, options):
+        self.stderr.write(f"Seeding {admins} admins x {employees_per_admin} employees, {years} years")
+        today = timezone.now().date()
+        start_date = today - timedelta(days=int(years * 365))
+
+        started = time.perf_counter()
+        admin_users, employees = seed_organisation(admins, employees_per_admin, options['departments'])
+        entries = seed_time_entries(
+            [employee.id for employee in employees],
+            start_date,
+            today,
+            segments=options['segments'],
+            batch_size=options['batch_size'],
+            seed=options['seed']
+        )
+        seed_seconds = time.perf_counter() - started
+        self.stderr.write(f"Seeded {entries} time entries in {seed_seconds:.1f}s")
+
+        client = Client()
+        client.force_login(admin_users[0])
+        preview_form = {
+            'format': 'csv',
+            'group_by': 'employee',
+            'start_date': (today - timedelta(days=30)).isoformat(),
+            'end_date': today.isoformat(),
+            'include_hours': 'on',
+            'include_attendance': 'on',
+            'include_productivity': 'on',
+            'export_all_employees': 'on',
+        }
+        endpoints = [
+            ('GET', '/api/time/today/', None),
+            ('GET', '/api/dashboard/stats/', None),
+            ('POST', '/api/export/preview/', preview_form),
+            ('GET', '/api/time/stats/', None),
+        ]
+
+        timings = {}
+        for method, url, data in endpoints:
+            timings[f'{method} {url}'] = self.time_endpoint(client, method, url, data, options['repeat'])
+
+        return {
+            'admins': admins,
+            'employees_per_admin': employees_per_admin,
+            'years': years,
+            'departments': options['departments'],
+            'time_entries': entries,
+            'seed_seconds': round(seed_seconds, 2),
+            'endpoints': timings,
+        }
+
+    def time_endpoint(self, client, method, url, data, repeat):
+        """
+        Time the endpoint itself (the cache cleared before every request,
+        so responses and employee lookups are rebuilt) and, under 'warm',
+        as served again from the cache.
+        """
+        request = client.post if method == 'POST' else client.get
+        request(url, data)  # Warm-up
+
+        result = self.time_requests(request, url, data, repeat, cold=True)
+        result['warm'] = self.time_requests(request, url, data, repeat, cold=False)
+        self.stderr.write(f"  {method} {url}: median {result['median_ms']:.1f} ms cold, "
+                          f"{result['warm']['median_ms']:.1f} ms warm")
+        return result
+
+    def time_requests(self, request, url, data, repeat, cold):
+        durations = []
+        for run in range(repeat):
+            if cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = request(url, data)
+                durations.append((time.perf_counter() - started) * 1000)
+
+        durations.sort()
+        return {
+            'status': response.status_code,
+            'cache': response.get('X-Cache'),
+            'queries': len(queries.captured_queries),
+            'median_ms': round(statistics.median(durations), 2),
+            'p95_ms': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 2),
+            'min_ms': round(durations[0], 2),
+            'max_ms': round(durations[-1], 2),
+        }
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from PunchClock.exports import run_export_job
+from PunchClock.models import ExportJob
+import time
+
+
+class Command(BaseCommand):
+    help = 'Processes queued export jobs from the database (run alongside the web server)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process the jobs currently queued and exit instead of polling forever'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between checks when the queue is empty (default: 2)'
+        )
+
+    def handle(self, *args, **options):
+        once = options['once']
+        poll_interval = options['poll_interval']
+
+        self.stdout.write("Export worker started")
+        processed = 0
+        while True:
+            # Long-running process: drop connections the database may have timed out
+            # (never inside a transaction, e.g. when a test runs the worker)
+            if not connection.in_atomic_block:
+                close_old_connections()
+            # Jobs left running by a worker that was killed would be polled forever
+            stale = ExportJob.fail_stale(settings.EXPORT_JOB_TIMEOUT)
+            if stale:
+                self.stdout.write(self.style.WARNING(f"Marked {stale} interrupted export jobs as failed"))
+            job = ExportJob.claim_next()
+
+            if job is None:
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            self.stdout.write(f"Running export job {job.id} for {job.admin.username}")
+            job = run_export_job(job)
+            processed += 1
+
+            if job.status == 'done':
+                self.stdout.write(self.style.SUCCESS(f"Export job {job.id} finished: {job.export.file_url}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"Export job {job.id} failed: {job.error}"))
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} export jobs"))
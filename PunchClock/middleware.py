@@ -0,0 +1,143 @@
+"""
+Per-request SQL instrumentation.
+
+QueryStatsMiddleware counts the queries a request runs, times them and
+keeps the slowest statement. The numbers are sent back in a Server-Timing
+header and added to a rolling per-route table (query_stats) that staff
+can read from /api/admin/query-stats/.
+
+Queries run while a streaming response is being sent happen after the
+middleware returns and are not included.
+"""
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+
+class QueryRecorder:
+    """connection.execute_wrapper callable that records every statement run through it."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_sql = None
+        self.slowest_duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            if duration >= self.slowest_duration:
+                self.slowest_duration = duration
+                self.slowest_sql = sql
+
+
+class QueryStatsTable:
+    """The last window requests of every route, summarized on demand."""
+
+    def __init__(self, window=200):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, route, recorder, total_duration):
+        sample = (recorder.count, recorder.duration, total_duration,
+                  recorder.slowest_duration, recorder.slowest_sql)
+        with self.lock:
+            if route not in self.samples:
+                self.samples[route] = deque(maxlen=self.window)
+            self.samples[route].append(sample)
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+
+    def summary(self):
+        with self.lock:
+            samples = {route: list(route_samples) for route, route_samples in self.samples.items()}
+
+        routes = []
+        for route, route_samples in samples.items():
+            counts = sorted(sample[0] for sample in route_samples)
+            requests = len(route_samples)
+            slowest = max(route_samples, key=lambda sample: sample[3])
+            routes.append({
+                'route': route,
+                'requests': requests,
+                'avg_queries': round(sum(counts) / requests, 1),
+                'max_queries': counts[-1],
+                'p95_queries': counts[min(requests - 1, int(requests * 0.95))],
+                'avg_sql_ms': round(sum(sample[1] for sample in route_samples) / requests * 1000, 2),
+                'avg_total_ms': round(sum(sample[2] for sample in route_samples) / requests * 1000, 2),
+                'slowest_query_ms': round(slowest[3] * 1000, 2),
+                'slowest_query': slowest[4],
+            })
+        routes.sort(key=lambda route: route['avg_sql_ms'], reverse=True)
+        return routes
+
+
+query_stats = QueryStatsTable()
+
+
+def request_route(request):
+    match = getattr(request, 'resolver_match', None)
+    route = f'/{match.route}' if match and match.route else '<unresolved>'
+    return f'{request.method} {route}'
+
+
+class QueryStatsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'QUERY_STATS_ENABLED', True)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.finish(request, response, recorder, started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        # Sync views and ORM calls from async views run in this request's
+        # thread-sensitive thread, whose connection is the one to wrap
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        await sync_to_async(connection.execute_wrappers.append)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(connection.execute_wrappers.remove)(recorder)
+        self.finish(request, response, recorder, started)
+        return response
+
+    def finish(self, request, response, recorder, started):
+        total_duration = time.perf_counter() - started
+        query_stats.record(request_route(request), recorder, total_duration)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries"',
+            f'db-slowest;dur={recorder.slowest_duration * 1000:.2f}',
+            f'app;dur={total_duration * 1000:.2f}',
+        ])
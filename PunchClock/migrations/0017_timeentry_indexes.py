@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PunchClock', '0016_timeentry_entry_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeentry',
+            index=models.Index(fields=['employee', 'date'], name='timeentry_employee_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeentry',
+            index=models.Index(fields=['date', 'status'], name='timeentry_date_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeentry',
+            index=models.Index(condition=models.Q(('session_verified', True)), fields=['employee', 'date'], name='timeentry_verified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeentry',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['date', 'employee'], name='timeentry_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_daily_hours(apps, schema_editor):
+    """
+    Build the initial rollups from existing time entries
+    """
+    TimeEntry = apps.get_model('PunchClock', 'TimeEntry')
+    DailyHours = apps.get_model('PunchClock', 'DailyHours')
+
+    rows = TimeEntry.objects.order_by().values('employee_id', 'date').annotate(
+        hours=Sum('total_hours'),
+        entry_count=Count('id'),
+        approved_count=Count('id', filter=Q(status='approved')),
+        verified_hours=Sum('total_hours', filter=Q(session_verified=True)),
+        verified_count=Count('id', filter=Q(session_verified=True)),
+    )
+    DailyHours.objects.bulk_create(
+        (
+            DailyHours(
+                employee_id=row['employee_id'],
+                date=row['date'],
+                total_hours=row['hours'] or 0,
+                entry_count=row['entry_count'],
+                approved_count=row['approved_count'],
+                verified_hours=row['verified_hours'] or 0,
+                verified_count=row['verified_count'],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PunchClock', '0017_timeentry_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_hours', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('approved_count', models.PositiveIntegerField(default=0)),
+                ('verified_hours', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('verified_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_hours', to='PunchClock.employee')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('employee', 'date'), name='dailyhours_employee_date_uniq')],
+            },
+        ),
+        migrations.RunPython(
+            populate_daily_hours,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PunchClock', '0019_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='export',
+            name='cache_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:34
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def remove_duplicate_punches(apps, schema_editor):
+    """
+    Make (employee, session_id, segment_index) unique before the constraint
+    is added. Later copies of a punch with the same times are client
+    retries and are deleted; any other clash moves to a new segment index.
+    """
+    TimeEntry = apps.get_model('PunchClock', 'TimeEntry')
+    DailyHours = apps.get_model('PunchClock', 'DailyHours')
+
+    groups = (
+        TimeEntry.objects.exclude(session_id=None)
+        .order_by().values('employee_id', 'session_id', 'segment_index')
+        .annotate(count=Count('id')).filter(count__gt=1)
+    )
+    changed_keys = set()
+    for group in groups.iterator():
+        entries = list(TimeEntry.objects.filter(**{
+            'employee_id': group['employee_id'],
+            'session_id': group['session_id'],
+            'segment_index': group['segment_index'],
+        }).order_by('id'))
+        next_index = TimeEntry.objects.filter(
+            employee_id=group['employee_id'], session_id=group['session_id']
+        ).aggregate(Max('segment_index'))['segment_index__max'] + 1
+
+        kept = [entries[0]]
+        for entry in entries[1:]:
+            signature = (entry.date, entry.start_time, entry.end_time, entry.entry_type)
+            if any(signature == (other.date, other.start_time, other.end_time, other.entry_type) for other in kept):
+                entry.delete()
+                changed_keys.add((entry.employee_id, entry.date))
+            else:
+                entry.segment_index = next_index
+                entry.save(update_fields=['segment_index'])
+                next_index += 1
+                kept.append(entry)
+
+    # Historical models don't keep DailyHours in sync; rebuild the affected days
+    for employee_id, date in changed_keys:
+        totals = TimeEntry.objects.filter(employee_id=employee_id, date=date).aggregate(
+            hours=Sum('total_hours'),
+            entry_count=Count('id'),
+            approved_count=Count('id', filter=Q(status='approved')),
+            verified_hours=Sum('total_hours', filter=Q(session_verified=True)),
+            verified_count=Count('id', filter=Q(session_verified=True)),
+        )
+        DailyHours.objects.filter(employee_id=employee_id, date=date).update(
+            total_hours=totals['hours'] or 0,
+            entry_count=totals['entry_count'],
+            approved_count=totals['approved_count'],
+            verified_hours=totals['verified_hours'] or 0,
+            verified_count=totals['verified_count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PunchClock', '0020_export_cache_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_punches,
+            migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='timeentry',
+            constraint=models.UniqueConstraint(fields=('employee', 'session_id', 'segment_index'), name='timeentry_punch_uniq'),
+        ),
+    ]
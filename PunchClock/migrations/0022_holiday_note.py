@@ -0,0 +1,139 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:43
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def parse_day(key):
+    try:
+        return datetime.strptime(str(key), '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def copy_json_to_rows(apps, schema_editor):
+    """
+    Move CalendarSettings.holidays/notes and PersonalNote.notes, one JSON
+    dict per user keyed by 'YYYY-MM-DD', into Holiday and Note rows.
+    Keys that aren't dates could never be shown on the calendar and are
+    dropped. For users with several settings rows the newest wins.
+    """
+    CalendarSettings = apps.get_model('PunchClock', 'CalendarSettings')
+    PersonalNote = apps.get_model('PunchClock', 'PersonalNote')
+    Holiday = apps.get_model('PunchClock', 'Holiday')
+    Note = apps.get_model('PunchClock', 'Note')
+
+    holidays, notes = {}, {}
+    for calendar_settings in CalendarSettings.objects.order_by('id').iterator():
+        for key, reason in (calendar_settings.holidays or {}).items():
+            day = parse_day(key)
+            if day is not None:
+                holidays[(calendar_settings.user_id, day)] = str(reason)
+        for key, text in (calendar_settings.notes or {}).items():
+            day = parse_day(key)
+            if day is not None:
+                notes[(calendar_settings.user_id, 'calendar', day)] = str(text)
+    for personal_note in PersonalNote.objects.order_by('id').iterator():
+        for key, text in (personal_note.notes or {}).items():
+            day = parse_day(key)
+            if day is not None:
+                notes[(personal_note.user_id, 'personal', day)] = str(text)
+
+    Holiday.objects.bulk_create(
+        (Holiday(user_id=user_id, date=day, reason=reason) for (user_id, day), reason in holidays.items()),
+        batch_size=1000
+    )
+    Note.objects.bulk_create(
+        (Note(user_id=user_id, kind=kind, date=day, text=text) for (user_id, kind, day), text in notes.items()),
+        batch_size=1000
+    )
+
+
+def copy_rows_to_json(apps, schema_editor):
+    CalendarSettings = apps.get_model('PunchClock', 'CalendarSettings')
+    PersonalNote = apps.get_model('PunchClock', 'PersonalNote')
+    Holiday = apps.get_model('PunchClock', 'Holiday')
+    Note = apps.get_model('PunchClock', 'Note')
+
+    settings_blobs, personal_blobs = {}, {}
+    for holiday in Holiday.objects.iterator():
+        settings_blobs.setdefault(holiday.user_id, ({}, {}))[0][holiday.date.isoformat()] = holiday.reason
+    for note in Note.objects.iterator():
+        if note.kind == 'personal':
+            personal_blobs.setdefault(note.user_id, {})[note.date.isoformat()] = note.text
+        else:
+            settings_blobs.setdefault(note.user_id, ({}, {}))[1][note.date.isoformat()] = note.text
+
+    for user_id, (holidays, notes) in settings_blobs.items():
+        calendar_settings = CalendarSettings.objects.filter(user_id=user_id).order_by('-id').first()
+        if calendar_settings is None:
+            calendar_settings = CalendarSettings(user_id=user_id, weekend_days=[])
+        calendar_settings.holidays = holidays
+        calendar_settings.notes = notes
+        calendar_settings.save()
+    PersonalNote.objects.bulk_create(
+        (PersonalNote(user_id=user_id, notes=notes) for user_id, notes in personal_blobs.items()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PunchClock', '0021_timeentry_punch_uniq'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('reason', models.TextField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Note',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('calendar', 'Calendar'), ('personal', 'Personal')], max_length=10)),
+                ('date', models.DateField()),
+                ('text', models.TextField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_notes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='holiday',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='holiday_user_date_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='note',
+            constraint=models.UniqueConstraint(fields=('user', 'kind', 'date'), name='note_user_kind_date_uniq'),
+        ),
+        migrations.RunPython(
+            copy_json_to_rows,
+            copy_rows_to_json
+        ),
+        migrations.RemoveField(
+            model_name='calendarsettings',
+            name='holidays',
+        ),
+        migrations.RemoveField(
+            model_name='calendarsettings',
+            name='notes',
+        ),
+        migrations.DeleteModel(
+            name='PersonalNote',
+        ),
+    ]
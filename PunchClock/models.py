@@ -1,14 +1,122 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
 from django.contrib.auth.models import User
 from datetime import datetime, timedelta
 from django.utils import timezone
 
 class CalendarSettings(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    holidays = models.JSONField(default=dict)
-    notes = models.JSONField(default=dict)
     weekend_days = models.JSONField(default=list)
 
+
+def touch_calendars(user_ids):
+    """Invalidate cached calendar responses (and their ETags) of the users."""
+    from . import caching
+    caching.touch_calendars(user_ids)
+
+
+class CalendarDayQuerySet(models.QuerySet):
+    """Per-date calendar rows (holidays, notes) exchanged as {'YYYY-MM-DD': text} dicts."""
+
+    def window(self, start=None, end=None):
+        """Rows between start and end inclusive; either bound may be None."""
+        queryset = self
+        if start is not None:
+            queryset = queryset.filter(date__gte=start)
+        if end is not None:
+            queryset = queryset.filter(date__lte=end)
+        return queryset
+
+    def as_dict(self):
+        return {
+            day.isoformat(): text
+            for day, text in self.order_by('date').values_list('date', self.model.TEXT_FIELD)
+        }
+
+    def replace(self, days, start=None, end=None, **fields):
+        """
+        Make the rows in the window match days ({'YYYY-MM-DD': text}),
+        writing only the dates that changed. fields (user, kind) are set
+        on new rows and must match the queryset's filter; the user's
+        calendar version is bumped when anything was written.
+        """
+        wanted = {datetime.strptime(key, '%Y-%m-%d').date(): str(text) for key, text in days.items()}
+        current = dict(self.window(start, end).values_list('date', self.model.TEXT_FIELD))
+        removed = [day for day in current if day not in wanted]
+        changed = {day: text for day, text in wanted.items() if current.get(day) != text}
+
+        if not removed and not changed:
+            return
+        # Joins the caller's transaction rather than adding a savepoint
+        with transaction.atomic(using=self.db, savepoint=False):
+            if removed:
+                self.filter(date__in=removed).delete()
+            if changed:
+                self.model.objects.bulk_create(
+                    [self.model(date=day, **{self.model.TEXT_FIELD: text}, **fields) for day, text in changed.items()],
+                    update_conflicts=True,
+                    unique_fields=self.model.UNIQUE_FIELDS,
+                    update_fields=[self.model.TEXT_FIELD],
+                    batch_size=1000
+                )
+            touch_calendars([fields['user'].pk])
+
+
+class Holiday(models.Model):
+    """A day off on one user's calendar."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='holidays')
+    date = models.DateField()
+    reason = models.TextField()
+
+    TEXT_FIELD = 'reason'
+    UNIQUE_FIELDS = ['user', 'date']
+
+    objects = CalendarDayQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            # Also the index for reading a user's month
+            models.UniqueConstraint(fields=['user', 'date'], name='holiday_user_date_uniq'),
+        ]
+
+    @classmethod
+    def add_to_calendars(cls, users, date, reason):
+        """
+        Add the holiday to the calendars of the users (a User queryset) with
+        one read and one upsert per 1000 users, however many there are.
+        """
+        user_ids = list(users.values_list('id', flat=True))
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, date=date, reason=reason) for user_id in user_ids],
+            update_conflicts=True,
+            unique_fields=cls.UNIQUE_FIELDS,
+            update_fields=['reason'],
+            batch_size=1000
+        )
+        touch_calendars(user_ids)
+
+
+class Note(models.Model):
+    """A note on one date of a user's calendar."""
+    CALENDAR = 'calendar'  # Shared calendar notes, which admins edit too
+    PERSONAL = 'personal'  # The employee's own notes
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='calendar_notes')
+    kind = models.CharField(max_length=10, choices=[(CALENDAR, 'Calendar'), (PERSONAL, 'Personal')])
+    date = models.DateField()
+    text = models.TextField()
+
+    TEXT_FIELD = 'text'
+    UNIQUE_FIELDS = ['user', 'kind', 'date']
+
+    objects = CalendarDayQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'kind', 'date'], name='note_user_kind_date_uniq'),
+        ]
+
 # New Department model for better organization
 class Department(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -22,6 +130,57 @@ class Department(models.Model):
     class Meta:
         ordering = ['name']
 
+# Fields whose changes affect the DailyHours rollup
+ROLLUP_FIELDS = {'employee', 'employee_id', 'date', 'total_hours', 'status', 'session_verified'}
+# Fields that move an entry to another (employee, date) rollup
+KEY_FIELDS = {'employee', 'employee_id', 'date'}
+
+
+def touch_cached_responses(keys):
+    """Invalidate cached statistics of the employees in (employee_id, date) keys."""
+    from .caching import touch_employees
+    touch_employees(employee_id for employee_id, _ in keys)
+
+
+class TimeEntryQuerySet(models.QuerySet):
+    """QuerySet that keeps DailyHours in sync for bulk writes."""
+
+    def _rollup_keys(self):
+        return set(self.order_by().values_list('employee_id', 'date').distinct())
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            keys = {(obj.employee_id, obj.date) for obj in created}
+            DailyHours.refresh(keys)
+            touch_cached_responses(keys)
+        return created
+
+    def update(self, **kwargs):
+        if not ROLLUP_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        moves = bool(KEY_FIELDS.intersection(kwargs))
+        with transaction.atomic(using=self.db):
+            keys = self._rollup_keys()
+            # Only needed to find where moved entries ended up
+            pks = list(self.values_list('pk', flat=True)) if moves else None
+            rows = super().update(**kwargs)
+            if moves:
+                # Entries may have moved to another employee/day
+                keys |= self.model.objects.filter(pk__in=pks)._rollup_keys()
+            DailyHours.refresh(keys)
+            touch_cached_responses(keys)
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            keys = self._rollup_keys()
+            result = super().delete()
+            DailyHours.refresh(keys)
+            touch_cached_responses(keys)
+        return result
+
+
 class TimeEntry(models.Model):
     employee = models.ForeignKey('Employee', on_delete=models.CASCADE, related_name='time_entries')
     date = models.DateField()
@@ -45,23 +204,71 @@ class TimeEntry(models.Model):
     session_verified = models.BooleanField(default=False, help_text="Whether the session has been verified on the server")
     segment_index = models.IntegerField(default=0, help_text="Index of this segment for multi-segment workdays")
 
+    objects = TimeEntryQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date', '-start_time']
+        indexes = [
+            # Per-employee day/range lookups (stats, today's entries, exports)
+            models.Index(fields=['employee', 'date'], name='timeentry_employee_date_idx'),
+            # Date-first scans joined through employee__admin (dashboard, approve-all)
+            models.Index(fields=['date', 'status'], name='timeentry_date_status_idx'),
+            # Statistics only ever count verified sessions
+            models.Index(fields=['employee', 'date'], name='timeentry_verified_idx',
+                         condition=models.Q(session_verified=True)),
+            # Pending approvals are a small, hot subset of the table
+            models.Index(fields=['date', 'employee'], name='timeentry_pending_idx',
+                         condition=models.Q(status='pending')),
+        ]
+        constraints = [
+            # A punch retried by the client maps onto the entry it already created
+            # (entries without a session_id never conflict: NULLs are distinct)
+            models.UniqueConstraint(fields=['employee', 'session_id', 'segment_index'],
+                                    name='timeentry_punch_uniq'),
+        ]
+
+    @staticmethod
+    def compute_total_hours(date, start_time, end_time):
+        """Hours between start and end time, treating an earlier end as an overnight shift."""
+        # Convert times to datetime for calculation
+        start_dt = datetime.combine(date, start_time)
+        end_dt = datetime.combine(date, end_time)
+
+        # Handle overnight shifts
+        if end_dt < start_dt:
+            end_dt += timedelta(days=1)
+        # Calculate duration in hours
+        duration = end_dt - start_dt
+        return round(duration.total_seconds() / 3600, 2)
 
     def save(self, *args, **kwargs):
         if self.start_time and self.end_time:
-            # Convert times to datetime for calculation
-            start_dt = datetime.combine(self.date, self.start_time)
-            end_dt = datetime.combine(self.date, self.end_time)
-            
-            # Handle overnight shifts
-            if end_dt < start_dt:
-                end_dt += timedelta(days=1)
-              # Calculate duration in hours
-            duration = end_dt - start_dt
-            self.total_hours = round(duration.total_seconds() / 3600, 2)
+            self.total_hours = self.compute_total_hours(self.date, self.start_time, self.end_time)
         
-        super().save(*args, **kwargs)
+        # Keep the day's rollup in step with the entry, including the day it moved from
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            keys = {(self.employee_id, self.date)}
+            if getattr(self, '_rollup_key', None):
+                keys.add(self._rollup_key)
+            DailyHours.refresh(keys)
+            touch_cached_responses(keys)
+        self._rollup_key = (self.employee_id, self.date)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            keys = [getattr(self, '_rollup_key', None) or (self.employee_id, self.date)]
+            DailyHours.refresh(keys)
+            touch_cached_responses(keys)
+        return result
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember where the entry was loaded from so moves refresh both days
+        instance._rollup_key = (instance.__dict__.get('employee_id'), instance.__dict__.get('date'))
+        return instance
         
     @classmethod
     def get_weekly_hours(cls, employee, date=None):
@@ -73,12 +280,12 @@ class TimeEntry(models.Model):
         week_start = date - timedelta(days=date.weekday())
         week_end = week_start + timedelta(days=6)
         
-        entries = cls.objects.filter(
+        # Only count verified sessions
+        total = DailyHours.objects.filter(
             employee=employee,
-            date__range=[week_start, week_end],
-            session_verified=True  # Only count verified sessions
-        )
-        return sum(float(entry.total_hours) for entry in entries)
+            date__range=[week_start, week_end]
+        ).aggregate(total=Sum('verified_hours'))['total']
+        return float(total or 0)
 
     @classmethod
     def get_daily_average(cls, employee, days=30):
@@ -86,47 +293,142 @@ class TimeEntry(models.Model):
         end_date = timezone.now().date()
         start_date = end_date - timedelta(days=days)
         
-        entries = cls.objects.filter(
+        # Sum the rollups and count the days that have verified entries in one query
+        totals = DailyHours.objects.filter(
             employee=employee,
             date__range=[start_date, end_date],
-            session_verified=True  # Only count verified sessions
+            verified_count__gt=0
+        ).aggregate(
+            total=Sum('verified_hours'),
+            working_days=Count('id')
         )
         
-        if not entries:
-            return 0
-            
-        # Group by date and sum hours for each day
-        date_hours = {}
-        for entry in entries:
-            date_str = entry.date.strftime('%Y-%m-%d')
-            if date_str not in date_hours:
-                date_hours[date_str] = 0
-            date_hours[date_str] += float(entry.total_hours)
-        
         # Calculate average using only days with entries
-        working_days = len(date_hours)
-        if working_days == 0:
+        working_days = totals['working_days']
+        if not working_days:
             return 0
         
-        total_hours = sum(date_hours.values())
-        return round(total_hours / working_days, 2)
+        return round(float(totals['total'] or 0) / working_days, 2)
         
     @classmethod
     def get_today_hours(cls, employee):
         """Calculate total hours worked today across all segments."""
         today = timezone.now().date()
         
-        entries = cls.objects.filter(
+        total = DailyHours.objects.filter(
             employee=employee,
-            date=today,
-            session_verified=True  # Only count verified sessions
+            date=today
+        ).aggregate(total=Sum('verified_hours'))['total']
+        return float(total or 0)
+
+
+class DailyHours(models.Model):
+    """Per-employee, per-day rollup of TimeEntry rows.
+
+    Maintained on every TimeEntry write so statistics and exports can read
+    one row per employee and day instead of summing raw entries.
+    """
+    employee = models.ForeignKey('Employee', on_delete=models.CASCADE, related_name='daily_hours')
+    date = models.DateField()
+    total_hours = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+    approved_count = models.PositiveIntegerField(default=0)
+    # Statistics only count sessions verified on the server
+    verified_hours = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    verified_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'date'], name='dailyhours_employee_date_uniq'),
+        ]
+
+    @staticmethod
+    def aggregate_entries(entries):
+        """Group a TimeEntry queryset into rollup values per (employee, date)."""
+        return entries.order_by().values('employee_id', 'date').annotate(
+            hours=Sum('total_hours'),
+            entry_count=Count('id'),
+            approved_count=Count('id', filter=Q(status='approved')),
+            verified_hours=Sum('total_hours', filter=Q(session_verified=True)),
+            verified_count=Count('id', filter=Q(session_verified=True)),
         )
-        
-        return sum(float(entry.total_hours) for entry in entries)
 
-class PersonalNote(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    notes = models.JSONField(default=dict)
+    @classmethod
+    def _from_values(cls, row):
+        return cls(
+            employee_id=row['employee_id'],
+            date=row['date'],
+            total_hours=row['hours'] or 0,
+            entry_count=row['entry_count'],
+            approved_count=row['approved_count'],
+            verified_hours=row['verified_hours'] or 0,
+            verified_count=row['verified_count'],
+        )
+
+    @classmethod
+    def refresh(cls, keys):
+        """Recompute the rollups for the given (employee_id, date) pairs."""
+        date_field = TimeEntry._meta.get_field('date')
+        keys = {
+            (employee_id, date_field.to_python(date))
+            for employee_id, date in keys
+            if employee_id is not None and date is not None
+        }
+        if not keys:
+            return
+
+        with transaction.atomic():
+            rows = cls.aggregate_entries(TimeEntry.objects.filter(
+                employee_id__in={employee_id for employee_id, _ in keys},
+                date__in={date for _, date in keys}
+            ))
+            rollups = [cls._from_values(row) for row in rows]
+            if rollups:
+                cls.objects.bulk_create(
+                    rollups,
+                    update_conflicts=True,
+                    unique_fields=['employee', 'date'],
+                    update_fields=['total_hours', 'entry_count', 'approved_count',
+                                   'verified_hours', 'verified_count', 'updated_at'],
+                )
+
+            # Days that no longer have any entries drop out of the rollup
+            empty = keys - {(rollup.employee_id, rollup.date) for rollup in rollups}
+            if empty:
+                condition = Q()
+                for employee_id, date in empty:
+                    condition |= Q(employee_id=employee_id, date=date)
+                cls.objects.filter(condition).delete()
+
+    @classmethod
+    def rebuild(cls, employee_ids=None, start_date=None, end_date=None, batch_size=1000):
+        """Rebuild rollups from raw entries, optionally scoped to employees and a date range."""
+        scope = Q()
+        if employee_ids is not None:
+            scope &= Q(employee_id__in=employee_ids)
+        if start_date is not None:
+            scope &= Q(date__gte=start_date)
+        if end_date is not None:
+            scope &= Q(date__lte=end_date)
+
+        created = 0
+        with transaction.atomic():
+            cls.objects.filter(scope).delete()
+
+            batch = []
+            rows = cls.aggregate_entries(TimeEntry.objects.filter(scope))
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(cls._from_values(row))
+                if len(batch) >= batch_size:
+                    cls.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            if batch:
+                cls.objects.bulk_create(batch)
+                created += len(batch)
+        return created
 
 class CompanySettings(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -167,6 +469,63 @@ class Export(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     file_url = models.CharField(max_length=500)  # URL to the exported file
+    # Hash of the export parameters and data watermark, see exports.export_cache_key
+    cache_key = models.CharField(max_length=64, blank=True, default='', db_index=True)
     
     class Meta:
         ordering = ['-created_at']
+
+class ExportJob(models.Model):
+    """An export request processed in the background by the run_export_worker command."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    admin = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0)  # 0-100
+    params = models.JSONField(default=dict)  # Raw export form values
+    export = models.ForeignKey(Export, on_delete=models.SET_NULL, null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='exportjob_status_created_idx'),
+        ]
+
+    @classmethod
+    def fail_stale(cls, timeout):
+        """Fail running jobs started more than timeout seconds ago, whose worker must have died."""
+        return cls.objects.filter(
+            status='running',
+            started_at__lt=timezone.now() - timedelta(seconds=timeout)
+        ).update(
+            status='failed',
+            error='The export was interrupted; please try again.',
+            finished_at=timezone.now()
+        )
+
+    @classmethod
+    def claim_next(cls):
+        """Atomically move the oldest queued job to running and return it (or None)."""
+        for job in cls.objects.filter(status='queued').order_by('created_at')[:10]:
+            # The conditional update only succeeds for one worker per job
+            claimed = cls.objects.filter(pk=job.pk, status='queued').update(
+                status='running',
+                started_at=timezone.now()
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return None
+
+    def set_progress(self, progress):
+        self.progress = progress
+        ExportJob.objects.filter(pk=self.pk).update(progress=progress)
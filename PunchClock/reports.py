@@ -0,0 +1,153 @@
+"""
+Report aggregation shared by the export preview and generate views.
+
+All groupings are produced from a single pass over the DailyHours rollups
+in the export scope, so the number of queries no longer grows with the
+number of employees, departments or periods. Productivity divides by each
+employee's working days in the range (see workdays), not calendar days.
+"""
+from datetime import timedelta
+
+from .models import DailyHours, Department
+from .workdays import working_days
+
+
+def period_key(day, group_by):
+    """Bucket a date into its day, week (Monday) or month (1st) period."""
+    if group_by == 'week':
+        return day - timedelta(days=day.weekday())
+    if group_by == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _new_totals():
+    return {
+        'total_hours': 0,
+        'entry_count': 0,
+        'approved_count': 0,
+        'working_days': 0,
+        'employees': set()
+    }
+
+
+def aggregate_rollups(employee_ids, start_date, end_date, group_by):
+    """
+    Stream the rollups for the given employees and date range once and
+    return (per_employee, per_period) totals.
+    """
+    per_employee = {}
+    per_period = {}
+    rollups = DailyHours.objects.filter(
+        employee_id__in=employee_ids,
+        date__range=[start_date, end_date]
+    ).order_by().values_list('employee_id', 'date', 'total_hours', 'entry_count', 'approved_count')
+
+    for employee_id, day, total_hours, entry_count, approved_count in rollups.iterator(chunk_size=2000):
+        hours = float(total_hours)
+        for totals in (
+            per_employee.setdefault(employee_id, _new_totals()),
+            per_period.setdefault(period_key(day, group_by), _new_totals()),
+        ):
+            totals['total_hours'] += hours
+            totals['entry_count'] += entry_count
+            totals['approved_count'] += approved_count
+            totals['employees'].add(employee_id)
+    return per_employee, per_period
+
+
+def working_day_counts(employees, start_date, end_date):
+    """{employee id: working days in the range} from each employee's calendar."""
+    calendars = working_days(emp.user_id for emp in employees)
+    return {emp.id: calendars[emp.user_id].count(start_date, end_date) for emp in employees}
+
+
+def build_report_rows(employees, start_date, end_date, group_by,
+                      include_hours=False, include_attendance=False, include_productivity=False):
+    """
+    Build the export rows for the given employees (loaded with their user
+    and department) grouped by employee, department, day, week or month.
+    """
+    per_employee, per_period = aggregate_rollups(
+        [emp.id for emp in employees], start_date, end_date, group_by
+    )
+    employee_days = working_day_counts(employees, start_date, end_date) if include_productivity else {}
+
+    data = []
+    if group_by == 'employee':
+        for emp in employees:
+            stats = per_employee.get(emp.id, _new_totals())
+            total_hours = stats['total_hours']
+            attendance_rate = 0
+            if stats['entry_count'] > 0:
+                attendance_rate = (stats['approved_count'] / stats['entry_count']) * 100
+
+            # Build data object based on included fields
+            row_data = {
+                'employee': emp.full_name,
+                'role': 'Manager' if emp.user.is_staff else 'Employee',
+                'department': emp.department.name if emp.department else 'N/A',
+                'status': 'Active' if stats['entry_count'] > 0 else 'Inactive'
+            }
+            if include_hours:
+                row_data['total_hours'] = round(total_hours, 2)
+            if include_attendance:
+                row_data['attendance_rate'] = round(attendance_rate, 1)
+            if include_productivity:
+                # Calculate average hours per working day in the date range
+                row_data['productivity'] = round(total_hours / max(employee_days[emp.id], 1), 2) if total_hours > 0 else 0
+
+            data.append(row_data)
+        data.sort(key=lambda x: x['employee'])
+
+    elif group_by == 'department':
+        per_department = {}
+        for emp in employees:
+            if emp.department_id is None or emp.id not in per_employee:
+                continue
+            stats = per_employee[emp.id]
+            totals = per_department.setdefault(emp.department_id, _new_totals())
+            totals['total_hours'] += stats['total_hours']
+            totals['employees'].add(emp.id)
+            totals['working_days'] += employee_days.get(emp.id, 0)
+
+        departments = Department.objects.filter(id__in=per_department.keys())
+        for dept in departments:
+            stats = per_department[dept.id]
+            total_hours = stats['total_hours']
+            employee_count = len(stats['employees'])
+            avg_hours = total_hours / employee_count if employee_count > 0 else 0
+
+            # Build data object based on included fields
+            row_data = {
+                'department': dept.name,
+                'employee_count': employee_count
+            }
+            if include_hours:
+                row_data['total_hours'] = round(total_hours, 2)
+                row_data['average_hours'] = round(avg_hours, 2)
+            if include_productivity:
+                row_data['department_productivity'] = round(total_hours / max(stats['working_days'], 1), 2) if total_hours > 0 else 0
+
+            data.append(row_data)
+        data.sort(key=lambda x: x['department'])
+
+    else:  # group by day/week/month
+        for date_key, stats in per_period.items():
+            # Build data object based on included fields
+            row_data = {
+                'period': date_key.strftime('%Y-%m-%d')
+            }
+            if include_hours:
+                row_data['total_hours'] = round(stats['total_hours'], 2)
+            if include_attendance:
+                row_data['total_entries'] = stats['entry_count']
+                row_data['approval_rate'] = round(stats['approved_count'] / stats['entry_count'] * 100, 1) if stats['entry_count'] > 0 else 0
+            if include_productivity:
+                active_employees = len(stats['employees'])
+                row_data['productivity'] = round(stats['total_hours'] / active_employees, 2) if active_employees > 0 else 0
+
+            data.append(row_data)
+        data.sort(key=lambda x: x['period'])
+
+    return data
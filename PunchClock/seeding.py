@@ -0,0 +1,108 @@
+"""
+Synthetic data for benchmarks and load tests.
+
+Everything is inserted with bulk_create in batches. bulk_create bypasses
+TimeEntry.save(), so total_hours is computed here in Python; the
+DailyHours rollups are still refreshed per batch by TimeEntryQuerySet.
+"""
+import random
+from datetime import time, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import Department, Employee, TimeEntry
+
+# (start hour, end hour) of the morning, afternoon and evening segments
+SEGMENT_HOURS = ((8, 12), (13, 17), (18, 20))
+
+
+def seed_organisation(admins, employees_per_admin, departments, prefix='bench', password='benchmark'):
+    """
+    Create departments, staff admins (each with their own Employee record)
+    and the employees they manage. Returns (admin users, employees).
+    """
+    department_objs = Department.objects.bulk_create([
+        Department(name=f'{prefix} department {index}') for index in range(departments)
+    ])
+
+    # Hashing is deliberately slow, so every seeded user shares one hash
+    password_hash = make_password(password)
+    admin_users = User.objects.bulk_create([
+        User(username=f'{prefix}_admin_{index}', email=f'{prefix}_admin_{index}@example.com',
+             password=password_hash, is_staff=True)
+        for index in range(admins)
+    ])
+    employee_users = User.objects.bulk_create([
+        User(username=f'{prefix}_employee_{admin_index}_{index}',
+             email=f'{prefix}_employee_{admin_index}_{index}@example.com',
+             first_name='Employee', last_name=f'{admin_index}-{index}', password=password_hash)
+        for admin_index in range(admins)
+        for index in range(employees_per_admin)
+    ], batch_size=1000)
+
+    employees = [
+        Employee(user=admin, admin=admin, department=department_objs[0] if department_objs else None)
+        for admin in admin_users
+    ]
+    for position, user in enumerate(employee_users):
+        employees.append(Employee(
+            user=user,
+            admin=admin_users[position // employees_per_admin],
+            department=department_objs[position % len(department_objs)] if department_objs else None
+        ))
+    employees = Employee.objects.bulk_create(employees, batch_size=1000)
+    return admin_users, employees
+
+
+def generate_time_entries(employee_id, start_date, end_date, segments=3, rng=None):
+    """
+    Yield unsaved TimeEntry objects for every weekday in the range, with
+    one to `segments` work segments per day and total_hours filled in.
+    """
+    rng = rng or random.Random()
+    day = start_date
+    while day <= end_date:
+        if day.weekday() < 5:
+            for segment_index in range(rng.randint(1, min(segments, len(SEGMENT_HOURS)))):
+                start_hour, end_hour = SEGMENT_HOURS[segment_index]
+                start_time = time(start_hour, rng.randint(0, 29))
+                end_time = time(end_hour - 1, rng.randint(30, 59))
+                yield TimeEntry(
+                    employee_id=employee_id,
+                    date=day,
+                    start_time=start_time,
+                    end_time=end_time,
+                    total_hours=TimeEntry.compute_total_hours(day, start_time, end_time),
+                    status='approved' if rng.random() < 0.9 else 'pending',
+                    session_id=f'seed-{employee_id}-{day:%Y%m%d}',
+                    session_verified=True,
+                    segment_index=segment_index
+                )
+        day += timedelta(days=1)
+
+
+def bulk_insert(entries, batch_size=5000):
+    """Insert an iterable of unsaved TimeEntry objects, one transaction per batch."""
+    entries = iter(entries)
+    created = 0
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return created
+        with transaction.atomic():
+            TimeEntry.objects.bulk_create(batch)
+        created += len(batch)
+
+
+def seed_time_entries(employee_ids, start_date, end_date, segments=3, batch_size=5000, seed=None):
+    """Generate and insert multi-segment entries for the employees; returns the number created."""
+    rng = random.Random(seed)
+    return bulk_insert(
+        (entry
+         for employee_id in employee_ids
+         for entry in generate_time_entries(employee_id, start_date, end_date, segments, rng)),
+        batch_size=batch_size
+    )
@@ -19,22 +19,42 @@ document.addEventListener('DOMContentLoaded', function () {
     let weekendDays = [];
     let personalNotes = {}; // Added to store employee personal notes
     let currentEmployeeId = null; // Track the currently selected employee
+    let loadedMonth = null; // The month (YYYY-MM) the data above belongs to, null while loading or after a failed load
+    let loadCount = 0; // Ignores responses of superseded loads
 
-    // Function to load calendar settings for a specific employee or for admin
+    // Holidays and notes are loaded and saved one month at a time
+    function monthParam(year, month) {
+        return `month=${year}-${String(month + 1).padStart(2, '0')}`;
+    }
+
+    // Saving replaces the whole month on the server, so only a fully loaded month may be edited
+    function isMonthLoaded() {
+        return loadedMonth !== null && loadedMonth === monthParam(currentDisplayYear, currentDisplayMonth);
+    }
+
+    // Shows an empty, read-only month when its data could not be loaded
+    function loadFailed(error) {
+        console.error('Error loading calendar settings:', error);
+        holidays = {};
+        notes = {};
+        weekendDays = [];
+        personalNotes = {};
+        renderCalendar(currentDisplayYear, currentDisplayMonth);
+    }
+
+    // Function to load the displayed month's calendar settings for a specific employee or for admin
     function loadCalendarSettings(employeeId = null) {
-        let url = '/api/calendar-settings/get/';
+        const month = monthParam(currentDisplayYear, currentDisplayMonth);
+        const load = ++loadCount;
+        let url = `/api/calendar-settings/get/?${month}`;
         if (employeeId) {
-            url = `/api/calendar-settings/get/?employee_id=${employeeId}`;
+            url = `/api/calendar-settings/get/?${month}&employee_id=${employeeId}`;
             currentEmployeeId = employeeId;
         } else {
             currentEmployeeId = null;
         }
-
-        // Reset all data
-        holidays = {};
-        notes = {};
-        weekendDays = [];
-        personalNotes = {};
+        // No edits until this month's data is in
+        loadedMonth = null;
 
         // Check if "Select an employee" is selected
         const employeeName = document.getElementById('employee-name');
@@ -44,58 +64,66 @@ document.addEventListener('DOMContentLoaded', function () {
             console.log('No employee selected, showing empty calendar with global settings only');
             
             // Load only global holidays and weekend settings
-            fetch('/api/calendar-settings/get/')
+            fetch(`/api/calendar-settings/get/?${month}`)
                 .then(response => response.json())
                 .then(data => {
-                    if (data.success) {
-                        // Only take holidays and weekend days, ignore notes
-                        holidays = data.holidays || {};
-                        weekendDays = (data.weekendDays || []).map(day => Number(day)); // Ensure numbers
-                        
-                        console.log('Loaded global settings:', {
-                            holidays,
-                            weekendDays
-                        });
-                        
-                        renderCalendar(currentDisplayYear, currentDisplayMonth);
-                    }
+                    if (load !== loadCount) return;
+                    if (!data.success) throw new Error(data.message);
+                    // Keep the notes too: a save replaces the whole month, so dropping them would delete them
+                    holidays = data.holidays || {};
+                    notes = data.notes || {};
+                    weekendDays = (data.weekendDays || []).map(day => Number(day)); // Ensure numbers
+                    personalNotes = {};
+                    loadedMonth = month;
+
+                    console.log('Loaded global settings:', {
+                        holidays,
+                        weekendDays
+                    });
+
+                    renderCalendar(currentDisplayYear, currentDisplayMonth);
                 })
                 .catch(error => {
-                    console.error('Error loading global calendar settings:', error);
-                    renderCalendar(currentDisplayYear, currentDisplayMonth);
+                    if (load !== loadCount) return;
+                    loadFailed(error);
                 });
             return;
         }
 
         // Load the admin or employee calendar settings
+        let calendarData = null;
         fetch(url)
             .then(response => response.json())
             .then(data => {
-                if (data.success) {
-                    holidays = data.holidays || {};
-                    notes = data.notes || {};
-                    weekendDays = (data.weekendDays || []).map(day => Number(day)); // Ensure numbers
-                    
-                    // If we have an employee ID, also load their personal notes
-                    if (employeeId) {
-                        return fetch(`/api/personal-notes/get/?employee_id=${employeeId}`)
-                            .then(response => response.json());
-                    }
+                if (load !== loadCount) return null;
+                if (!data.success) throw new Error(data.message);
+                calendarData = data;
+
+                // If we have an employee ID, also load their personal notes
+                if (employeeId) {
+                    return fetch(`/api/personal-notes/get/?${month}&employee_id=${employeeId}`)
+                        .then(response => response.json());
                 }
                 return { success: false, notes: {} };
             })
             .then(personalData => {
+                if (load !== loadCount) return;
+                holidays = calendarData.holidays || {};
+                notes = calendarData.notes || {};
+                weekendDays = (calendarData.weekendDays || []).map(day => Number(day)); // Ensure numbers
                 if (personalData && personalData.success) {
                     personalNotes = personalData.notes || {};
                     console.log('Loaded personal notes for employee:', currentEmployeeId, personalNotes);
                 } else {
+                    personalNotes = {};
                     console.log('No personal notes found or request failed');
                 }
+                loadedMonth = month;
                 renderCalendar(currentDisplayYear, currentDisplayMonth);
             })
             .catch(error => {
-                console.error('Error loading calendar settings:', error);
-                renderCalendar(currentDisplayYear, currentDisplayMonth);
+                if (load !== loadCount) return;
+                loadFailed(error);
             });
     }
 
@@ -141,6 +169,10 @@ document.addEventListener('DOMContentLoaded', function () {
     document.addEventListener('contextmenu', function (e) {
         if (e.target.closest('.calendar-day')) {
             e.preventDefault();
+            if (!isMonthLoaded()) {
+                hideContextMenu();
+                return;
+            }
             const dayCell = e.target.closest('.calendar-day');
             selectedDate = dayCell.dataset.date;
             const rect = dayCell.getBoundingClientRect();
@@ -204,9 +236,14 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     function saveCalendarSettings() {
-        let url = '/api/calendar-settings/update/';
+        // Replaces the holidays and notes of the loaded month only
+        if (!isMonthLoaded()) {
+            console.error('Calendar settings not saved: the month is not loaded');
+            return;
+        }
+        let url = `/api/calendar-settings/update/?${loadedMonth}`;
         if (currentEmployeeId) {
-            url = `/api/calendar-settings/update/?employee_id=${currentEmployeeId}`;
+            url = `/api/calendar-settings/update/?${loadedMonth}&employee_id=${currentEmployeeId}`;
         }
 
         fetch(url, {
@@ -369,7 +406,7 @@ document.addEventListener('DOMContentLoaded', function () {
         const today = new Date();
         currentDisplayMonth = today.getMonth();
         currentDisplayYear = today.getFullYear();
-        renderCalendar(currentDisplayYear, currentDisplayMonth);
+        loadCalendarSettings(currentEmployeeId);
     });
 
     // Handle month navigation
@@ -379,7 +416,7 @@ document.addEventListener('DOMContentLoaded', function () {
             currentDisplayMonth = 11;
             currentDisplayYear--;
         }
-        renderCalendar(currentDisplayYear, currentDisplayMonth);
+        loadCalendarSettings(currentEmployeeId);
     });
 
     document.querySelector('.fa-chevron-right').parentElement.addEventListener('click', function() {
@@ -388,7 +425,7 @@ document.addEventListener('DOMContentLoaded', function () {
             currentDisplayMonth = 0;
             currentDisplayYear++;
         }
-        renderCalendar(currentDisplayYear, currentDisplayMonth);
+        loadCalendarSettings(currentEmployeeId);
     });
 
     // Today button handler
@@ -396,7 +433,7 @@ document.addEventListener('DOMContentLoaded', function () {
         const today = new Date();
         currentDisplayMonth = today.getMonth();
         currentDisplayYear = today.getFullYear();
-        renderCalendar(currentDisplayYear, currentDisplayMonth);
+        loadCalendarSettings(currentEmployeeId);
     });
 
     document.getElementById('add-note').addEventListener('click', function() {
@@ -857,6 +857,44 @@ document.addEventListener('DOMContentLoaded', function () {
         approveAllBtn.addEventListener('click', approveAllPendingEntries);
     }
 
-    // Initialize dashboard stats auto-refresh
-    setInterval(loadDashboardStats, 60000); // Refresh stats every minute
+    // Fall back to refreshing stats every minute while live events are unavailable
+    let statsInterval = setInterval(loadDashboardStats, 60000);
+
+    // Live updates: the server pushes punch, approval, clear and undo events
+    let refreshTimer = null;
+    function scheduleRefresh() {
+        // Coalesce bursts of events into a single reload
+        clearTimeout(refreshTimer);
+        refreshTimer = setTimeout(() => {
+            loadTodayTimeEntries();
+            loadDashboardStats();
+        }, 300);
+    }
+
+    function connectDashboardEvents() {
+        if (!window.EventSource) {
+            return;
+        }
+        const events = new EventSource('/api/dashboard/events/');
+
+        events.addEventListener('open', function() {
+            if (statsInterval) {
+                clearInterval(statsInterval);
+                statsInterval = null;
+            }
+        });
+
+        ['punch', 'approval', 'clear', 'undo'].forEach(type => {
+            events.addEventListener(type, scheduleRefresh);
+        });
+
+        events.addEventListener('error', function() {
+            // EventSource reconnects by itself unless the server refused the stream
+            if (events.readyState === EventSource.CLOSED && !statsInterval) {
+                statsInterval = setInterval(loadDashboardStats, 60000);
+            }
+        });
+    }
+
+    connectDashboardEvents();
 });
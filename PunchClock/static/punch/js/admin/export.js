@@ -749,6 +749,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 body: formData
             })
                 .then(response => response.json())
+                .then(data => {
+                    if (!data.success) {
+                        return data;
+                    }
+                    // The export is generated in the background; wait for the job to finish
+                    return pollExportJob(data.job);
+                })
                 .then(data => {
                     if (data.success) {
                         // Show success message
@@ -762,10 +769,10 @@ document.addEventListener('DOMContentLoaded', function() {
                         // Reload recent exports
                         loadRecentExports();
                         
-                        // If file URL is provided, trigger download
-                        if (data.file_url) {
+                        // If a download URL is provided, trigger download
+                        if (data.download_url) {
                             setTimeout(() => {
-                                window.location.href = data.file_url;
+                                window.location.href = data.download_url;
                             }, 500);
                         }
                     } else {
@@ -810,6 +817,43 @@ document.addEventListener('DOMContentLoaded', function() {
                 });
         }
         
+        function pollExportJob(job) {
+            // Poll the job status until the worker marks it done or failed
+            return new Promise((resolve, reject) => {
+                const check = () => {
+                    fetch(job.status_url)
+                        .then(response => response.json())
+                        .then(data => {
+                            if (!data.success) {
+                                resolve(data);
+                                return;
+                            }
+                            const current = data.job;
+                            if (current.status === 'done') {
+                                resolve({
+                                    success: true,
+                                    message: 'Export generated successfully',
+                                    file_url: current.file_url,
+                                    download_url: current.download_url
+                                });
+                            } else if (current.status === 'failed') {
+                                resolve({ success: false, message: current.error });
+                            } else {
+                                exportStatus.innerHTML = `
+                                    <div class="px-4 py-2 bg-indigo-100 text-indigo-700 rounded-lg">
+                                        <i class="fas fa-spinner fa-spin mr-2"></i>
+                                        ${current.status === 'queued' ? 'Export queued...' : `Generating export... ${current.progress}%`}
+                                    </div>
+                                `;
+                                setTimeout(check, 1500);
+                            }
+                        })
+                        .catch(reject);
+                };
+                check();
+            });
+        }
+        
         function deleteExport(exportId) {
             if (!confirm('Are you sure you want to delete this export?')) {
                 return;
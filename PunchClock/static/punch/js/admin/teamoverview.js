@@ -123,89 +123,20 @@ document.addEventListener('DOMContentLoaded', function() {
             timeRange: `${monthStart.toLocaleString()} to ${today.toLocaleString()}`
         });
         
-        fetch('/api/employees/get/')
+        // One request returns every employee with their month-to-date hours
+        fetch(`/api/time/team-summary/?start_date=${monthStartStr}&end_date=${todayStr}`)
             .then(response => response.json())
             .then(data => {
                 if (data.success && data.employees) {
-                    // Debug log total number of employees
-                    console.log(`Found ${data.employees.length} employees to process`);
-                    
-                    const fetchPromises = data.employees.map(emp => {
-                        // Fetch all entries between start of month and today
-                        const url = `/api/time/entries/${emp.id}/?start_date=${monthStartStr}&end_date=${todayStr}`;
-                        console.log(`Fetching hours for ${emp.full_name}:`, url);
-                        
-                        return fetch(url)
-                            .then(response => response.json())
-                            .then(hoursData => {
-                                let totalHours = 0;
-                                let regularHours = 0;
-                                let overtimeHours = 0;                                if (hoursData.success && hoursData.entries) {
-                                    // Debug log raw entries
-                                    console.log(`Raw entries for ${emp.full_name}:`, hoursData.entries);
-                                    
-                                    // Calculate total hours
-                                    hoursData.entries.forEach(entry => {
-                                        const hours = parseFloat(entry.total_hours || 0);
-                                        if (isNaN(hours)) {
-                                            console.warn(`Invalid hours value for entry:`, entry);
-                                            return;
-                                        }
-                                        
-                                        totalHours += hours;
-                                        
-                                        console.log(`Adding ${hours} hours from entry on ${entry.date}`);
-                                    });
-                                    
-                                    // Log detailed hours breakdown
-                                    console.log(`Hours calculated for ${emp.full_name}:`, {
-                                        totalHours,
-                                        regularHours,
-                                        overtimeHours,
-                                        entriesCount: hoursData.entries.length,
-                                        dateRange: `${monthStartStr} to ${todayStr}`
-                                    });
-                                } else {
-                                    console.warn(`No entries or error for ${emp.full_name}:`, hoursData);
-                                }
-                                
-                                return {
-                                    ...emp,
-                                    total_hours: totalHours,
-                                    regular_hours: regularHours,
-                                    overtime_hours: overtimeHours
-                                };
-                            })
-                            .catch(error => {
-                                console.error(`Error fetching hours for ${emp.full_name}:`, error);
-                                return {
-                                    ...emp,
-                                    total_hours: 0,
-                                    regular_hours: 0,
-                                    overtime_hours: 0
-                                };
-                            });
-                    });
+                    console.log(`Loaded hours for ${data.employees.length} employees`);
 
-                    // Wait for all hour calculations
-                    return Promise.all(fetchPromises)
-                        .then(employeesWithHours => {
-                            // Debug log final results
-                            console.log('Final hours calculation results:', employeesWithHours.map(e => ({
-                                name: e.full_name,
-                                total: e.total_hours,
-                                regular: e.regular_hours,
-                                overtime: e.overtime_hours
-                            })));
-                            
-                            allEmployees = employeesWithHours;
-                            filteredEmployees = [...allEmployees];
-                            displayEmployees();
-                            // After loading employees, update department statistics
-                            if (departmentData.length > 0) {
-                                loadDepartmentStatistics(departmentData);
-                            }
-                        });
+                    allEmployees = data.employees;
+                    filteredEmployees = [...allEmployees];
+                    displayEmployees();
+                    // After loading employees, update department statistics
+                    if (departmentData.length > 0) {
+                        loadDepartmentStatistics(departmentData);
+                    }
                 } else {
                     console.error('Failed to fetch employees:', data);
                     throw new Error('Failed to fetch employees');
@@ -17,28 +17,53 @@ document.addEventListener('DOMContentLoaded', function () {
     let globalNotes = {};
     let personalNotes = {};
     let weekendDays = [];
+    let loadedMonth = null; // The month (YYYY-MM) the data above belongs to, null while loading or after a failed load
+    let loadCount = 0; // Ignores responses of superseded loads
 
-    // Load calendar settings and personal notes from backend
-    Promise.all([
-        fetch('/api/calendar-settings/get/'),
-        fetch('/api/personal-notes/get/')
-    ])
-    .then(responses => Promise.all(responses.map(r => r.json())))
-    .then(([calendarData, personalData]) => {
-        if (calendarData.success) {
+    function displayedMonth() {
+        return `month=${currentDisplayYear}-${String(currentDisplayMonth + 1).padStart(2, '0')}`;
+    }
+
+    // Saving replaces the whole month on the server, so only a fully loaded month may be edited
+    function isMonthLoaded() {
+        return loadedMonth !== null && loadedMonth === displayedMonth();
+    }
+
+    // Load the displayed month's calendar settings and personal notes from backend
+    function loadMonth() {
+        const month = displayedMonth();
+        const load = ++loadCount;
+        // No edits until this month's data is in
+        loadedMonth = null;
+
+        Promise.all([
+            fetch(`/api/calendar-settings/get/?${month}`),
+            fetch(`/api/personal-notes/get/?${month}`)
+        ])
+        .then(responses => Promise.all(responses.map(r => r.json())))
+        .then(([calendarData, personalData]) => {
+            if (load !== loadCount) return;
+            if (!calendarData.success) throw new Error(calendarData.message);
+            if (!personalData.success) throw new Error(personalData.message);
             holidays = calendarData.holidays || {};
             globalNotes = calendarData.notes || {};
             weekendDays = (calendarData.weekendDays || []).map(day => Number(day)); // Convert to numbers
-        }
-        if (personalData.success) {
             personalNotes = personalData.notes || {};
-        }
-        renderCalendar(currentDisplayYear, currentDisplayMonth);
-    })
-    .catch(error => {
-        console.error('Error loading calendar data:', error);
-        renderCalendar(currentDisplayYear, currentDisplayMonth);
-    });
+            loadedMonth = month;
+            renderCalendar(currentDisplayYear, currentDisplayMonth);
+        })
+        .catch(error => {
+            if (load !== loadCount) return;
+            // Show the month empty and read-only
+            console.error('Error loading calendar data:', error);
+            holidays = {};
+            globalNotes = {};
+            personalNotes = {};
+            renderCalendar(currentDisplayYear, currentDisplayMonth);
+            showNotification('Failed to load the calendar!', 'error');
+        });
+    }
+    loadMonth();
 
     document.addEventListener('click', function(e) {
         if (!e.target.closest('#context-menu') && !e.target.closest('#custom-modal')) {
@@ -49,6 +74,10 @@ document.addEventListener('DOMContentLoaded', function () {
     document.addEventListener('contextmenu', function (e) {
         if (e.target.closest('.calendar-day')) {
             e.preventDefault();
+            if (!isMonthLoaded()) {
+                hideContextMenu();
+                return;
+            }
             const dayCell = e.target.closest('.calendar-day');
             selectedDate = dayCell.dataset.date;
             const rect = dayCell.getBoundingClientRect();
@@ -96,9 +125,14 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     function savePersonalNote() {
+        if (!isMonthLoaded()) {
+            showNotification('Failed to save note!', 'error');
+            return;
+        }
         console.log('Saving personal note:', personalNotes);
         
-        fetch('/api/personal-notes/update/', {
+        // Replaces the personal notes of the loaded month only
+        fetch(`/api/personal-notes/update/?${loadedMonth}`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -175,7 +209,11 @@ document.addEventListener('DOMContentLoaded', function () {
         return cookieValue;
     }
     function saveCalendarSettings() {
-        fetch('/api/calendar-settings/update/', {
+        if (!isMonthLoaded()) {
+            console.error('Calendar settings not saved: the month is not loaded');
+            return;
+        }
+        fetch(`/api/calendar-settings/update/?${loadedMonth}`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -320,7 +358,7 @@ document.addEventListener('DOMContentLoaded', function () {
             currentDisplayMonth = 11;
             currentDisplayYear--;
         }
-        renderCalendar(currentDisplayYear, currentDisplayMonth);
+        loadMonth();
     });
 
     document.querySelector('.fa-chevron-right').parentElement.addEventListener('click', function() {
@@ -329,7 +367,7 @@ document.addEventListener('DOMContentLoaded', function () {
             currentDisplayMonth = 0;
             currentDisplayYear++;
         }
-        renderCalendar(currentDisplayYear, currentDisplayMonth);
+        loadMonth();
     });
 
     // Handle Today button click
@@ -337,7 +375,7 @@ document.addEventListener('DOMContentLoaded', function () {
         const today = new Date();
         currentDisplayMonth = today.getMonth();
         currentDisplayYear = today.getFullYear();
-        renderCalendar(currentDisplayYear, currentDisplayMonth);
+        loadMonth();
     });
 
     // Month button handler - return to current month
@@ -345,7 +383,7 @@ document.addEventListener('DOMContentLoaded', function () {
         const today = new Date();
         currentDisplayMonth = today.getMonth();
         currentDisplayYear = today.getFullYear();
-        renderCalendar(currentDisplayYear, currentDisplayMonth);
+        loadMonth();
     });
 
     // Handle personal note addition
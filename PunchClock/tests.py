@@ -1,3 +1,1441 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import AsyncClient, Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import events, urls
+from .employees import get_employee, request_employee
+from .events import LocalEventBroker
+from .middleware import query_stats
+from .models import (
+    CalendarSettings, DailyHours, Department, Employee, Export, ExportJob, Holiday, Note, TimeEntry
+)
+from .seeding import seed_organisation, seed_time_entries
+from .workdays import WorkingDays
+
+
+def legacy_weekly_hours(employee, date=None):
+    """Row-by-row implementation the aggregate query replaced."""
+    if date is None:
+        date = timezone.now().date()
+    week_start = date - timedelta(days=date.weekday())
+    week_end = week_start + timedelta(days=6)
+    entries = TimeEntry.objects.filter(
+        employee=employee,
+        date__range=[week_start, week_end],
+        session_verified=True
+    )
+    return sum(float(entry.total_hours) for entry in entries)
+
+
+def legacy_daily_average(employee, days=30):
+    end_date = timezone.now().date()
+    start_date = end_date - timedelta(days=days)
+    entries = TimeEntry.objects.filter(
+        employee=employee,
+        date__range=[start_date, end_date],
+        session_verified=True
+    )
+    date_hours = {}
+    for entry in entries:
+        date_hours.setdefault(entry.date, 0)
+        date_hours[entry.date] += float(entry.total_hours)
+    if not date_hours:
+        return 0
+    return round(sum(date_hours.values()) / len(date_hours), 2)
+
+
+def legacy_today_hours(employee):
+    entries = TimeEntry.objects.filter(
+        employee=employee,
+        date=timezone.now().date(),
+        session_verified=True
+    )
+    return sum(float(entry.total_hours) for entry in entries)
+
+
+class TimeEntryAggregationTests(TestCase):
+    """The aggregate classmethods must return the same numbers as the old loops."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(1234)
+        admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        cls.employees = []
+        for i in range(3):
+            user = User.objects.create_user(username=f'emp{i}', password='pw')
+            cls.employees.append(Employee.objects.create(user=user, admin=admin))
+
+        today = timezone.now().date()
+        for employee in cls.employees[:2]:
+            for offset in range(45):
+                day = today - timedelta(days=offset)
+                # Multi-segment days, some of them unverified
+                for segment in range(rng.randint(0, 3)):
+                    start_hour = 6 + segment * 5
+                    TimeEntry.objects.create(
+                        employee=employee,
+                        date=day,
+                        start_time=time(start_hour, rng.choice([0, 15, 30, 45])),
+                        end_time=time(start_hour + rng.randint(1, 4), rng.choice([0, 10, 20, 40])),
+                        session_verified=rng.random() > 0.2,
+                        segment_index=segment,
+                    )
+
+    def test_weekly_hours_matches_legacy(self):
+        today = timezone.now().date()
+        for employee in self.employees:
+            for weeks_back in range(4):
+                date = today - timedelta(weeks=weeks_back)
+                self.assertAlmostEqual(
+                    TimeEntry.get_weekly_hours(employee, date),
+                    legacy_weekly_hours(employee, date),
+                    places=2
+                )
+
+    def test_daily_average_matches_legacy(self):
+        for employee in self.employees:
+            for days in (1, 7, 30, 60):
+                self.assertAlmostEqual(
+                    TimeEntry.get_daily_average(employee, days),
+                    legacy_daily_average(employee, days),
+                    places=2
+                )
+
+    def test_today_hours_matches_legacy(self):
+        for employee in self.employees:
+            self.assertAlmostEqual(
+                TimeEntry.get_today_hours(employee),
+                legacy_today_hours(employee),
+                places=2
+            )
+
+    def test_employee_without_entries(self):
+        employee = self.employees[2]
+        self.assertEqual(TimeEntry.get_weekly_hours(employee), 0)
+        self.assertEqual(TimeEntry.get_daily_average(employee), 0)
+        self.assertEqual(TimeEntry.get_today_hours(employee), 0)
+
+    def test_single_query_per_method(self):
+        employee = self.employees[0]
+        with self.assertNumQueries(1):
+            TimeEntry.get_weekly_hours(employee)
+        with self.assertNumQueries(1):
+            TimeEntry.get_daily_average(employee)
+        with self.assertNumQueries(1):
+            TimeEntry.get_today_hours(employee)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN plans are checked against PostgreSQL only')
+class TimeEntryIndexPlanTests(TestCase):
+    """The dashboard and statistics query shapes must be served by indexes."""
+
+    ROWS = int(os.environ.get('PUNCHCLOCK_EXPLAIN_ROWS', 1_000_000))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admins = [
+            User.objects.create_user(username=f'plan-admin{i}', password='pw', is_staff=True)
+            for i in range(10)
+        ]
+        cls.employees = [
+            Employee.objects.create(
+                user=User.objects.create_user(username=f'plan-emp{i}', password='pw'),
+                admin=cls.admins[i % len(cls.admins)]
+            )
+            for i in range(200)
+        ]
+        employee_ids = [employee.id for employee in cls.employees]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO "{TimeEntry._meta.db_table}" (
+                    employee_id, date, start_time, end_time, total_hours, entry_type,
+                    status, created_at, updated_at, session_id, session_verified, segment_index
+                )
+                SELECT
+                    (%s::bigint[])[1 + g %% %s],
+                    CURRENT_DATE - (g / %s),
+                    TIME '09:00', TIME '17:00', 8, 'Regular Work Hours',
+                    (ARRAY['pending', 'approved', 'rejected'])[1 + g %% 3],
+                    NOW(), NOW(), 'seed-' || g, g %% 5 <> 0, 0
+                FROM generate_series(1, %s) AS g
+                """,
+                [employee_ids, len(employee_ids), len(employee_ids), cls.ROWS]
+            )
+            cursor.execute(f'ANALYZE "{TimeEntry._meta.db_table}"')
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertNotIn(f'Seq Scan on "{TimeEntry._meta.db_table}"', plan, plan)
+
+    def test_employee_statistics_range(self):
+        today = timezone.now().date()
+        self.assertUsesIndex(TimeEntry.objects.filter(
+            employee=self.employees[0],
+            date__range=[today - timedelta(days=14), today],
+            session_verified=True
+        ))
+
+    def test_today_entries_for_admin(self):
+        employees = Employee.objects.filter(admin=self.admins[0])
+        self.assertUsesIndex(TimeEntry.objects.filter(
+            employee__in=employees,
+            date=timezone.now().date()
+        ).select_related('employee', 'employee__department'))
+
+    def test_pending_approvals_for_admin(self):
+        self.assertUsesIndex(TimeEntry.objects.filter(
+            employee__admin=self.admins[0],
+            date=timezone.now().date(),
+            status='pending'
+        ))
+
+    def test_dashboard_active_employees(self):
+        employees = Employee.objects.filter(admin=self.admins[0])
+        self.assertUsesIndex(TimeEntry.objects.filter(
+            employee__in=employees,
+            date=timezone.now().date()
+        ).values('employee').distinct())
+
+
+class DailyHoursRollupTests(TestCase):
+    """DailyHours must always equal a fresh aggregation of the raw entries."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.employee = Employee.objects.create(
+            user=User.objects.create_user(username='emp', password='pw'),
+            admin=self.admin
+        )
+        self.today = timezone.now().date()
+
+    def create_entry(self, **kwargs):
+        defaults = {
+            'employee': self.employee,
+            'date': self.today,
+            'start_time': time(9, 0),
+            'end_time': time(12, 30),
+            'session_verified': True,
+        }
+        defaults.update(kwargs)
+        return TimeEntry.objects.create(**defaults)
+
+    def assertRollupsConsistent(self):
+        expected = {
+            (row['employee_id'], row['date']): (
+                row['hours'], row['entry_count'], row['approved_count'],
+                row['verified_hours'] or 0, row['verified_count']
+            )
+            for row in DailyHours.aggregate_entries(TimeEntry.objects.all())
+        }
+        actual = {
+            (rollup.employee_id, rollup.date): (
+                rollup.total_hours, rollup.entry_count, rollup.approved_count,
+                rollup.verified_hours, rollup.verified_count
+            )
+            for rollup in DailyHours.objects.all()
+        }
+        self.assertEqual(actual, expected)
+
+    def test_save_and_update(self):
+        entry = self.create_entry()
+        self.create_entry(start_time=time(13, 0), end_time=time(17, 0), session_verified=False)
+        self.assertRollupsConsistent()
+        rollup = DailyHours.objects.get(employee=self.employee, date=self.today)
+        self.assertEqual(rollup.entry_count, 2)
+        self.assertEqual(float(rollup.total_hours), 7.5)
+        self.assertEqual(float(rollup.verified_hours), 3.5)
+
+        entry.end_time = time(11, 0)
+        entry.status = 'approved'
+        entry.save()
+        self.assertRollupsConsistent()
+
+    def test_moving_entry_refreshes_both_days(self):
+        entry = self.create_entry()
+        entry = TimeEntry.objects.get(pk=entry.pk)
+        entry.date = self.today - timedelta(days=1)
+        entry.save()
+        self.assertRollupsConsistent()
+        self.assertFalse(DailyHours.objects.filter(date=self.today).exists())
+
+    def test_delete(self):
+        entry = self.create_entry()
+        self.create_entry(start_time=time(13, 0), end_time=time(14, 0))
+        entry.delete()
+        self.assertRollupsConsistent()
+        TimeEntry.objects.filter(employee=self.employee).delete()
+        self.assertRollupsConsistent()
+        self.assertFalse(DailyHours.objects.exists())
+
+    def test_bulk_update_and_create(self):
+        for hour in (8, 10, 12):
+            self.create_entry(start_time=time(hour, 0), end_time=time(hour + 1, 0))
+        with CaptureQueriesContext(connection) as queries:
+            TimeEntry.objects.filter(employee__admin=self.admin, status='pending').update(status='approved')
+        # Entries stay on their day, so their ids aren't read back
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "PunchClock_timeentry"."id"')])
+        self.assertRollupsConsistent()
+        self.assertEqual(DailyHours.objects.get(date=self.today).approved_count, 3)
+
+        TimeEntry.objects.bulk_create([
+            TimeEntry(employee=self.employee, date=self.today - timedelta(days=offset),
+                      start_time=time(9, 0), end_time=time(10, 0), total_hours=1)
+            for offset in range(1, 4)
+        ])
+        self.assertRollupsConsistent()
+
+    def test_rebuild_command(self):
+        self.create_entry()
+        self.create_entry(date=self.today - timedelta(days=2))
+        DailyHours.objects.all().delete()
+        call_command('rebuild_rollups', stdout=open(os.devnull, 'w'))
+        self.assertRollupsConsistent()
+
+
+class WorkingDaysTests(SimpleTestCase):
+    """Working-day counts match walking the range day by day."""
+
+    def test_count_matches_day_by_day(self):
+        holidays = [date(2026, 12, 24), date(2026, 12, 25), date(2026, 12, 26), date(2027, 1, 1)]
+        calendar = WorkingDays(weekend_days=[5, 6], holidays=holidays)  # Friday and Saturday off
+        self.assertFalse(calendar.is_working_day(date(2026, 12, 25)))
+        self.assertTrue(calendar.is_working_day(date(2026, 12, 27)))  # Sunday
+        start = date(2026, 12, 1)
+        for first in range(0, 40, 3):
+            for length in range(-1, 60, 7):
+                range_start = start + timedelta(days=first)
+                range_end = range_start + timedelta(days=length)
+                expected = sum(1 for offset in range(length + 1)
+                               if calendar.is_working_day(range_start + timedelta(days=offset)))
+                self.assertEqual(calendar.count(range_start, range_end), expected)
+        # The default weekend is Saturday and Sunday
+        self.assertEqual(WorkingDays().count(date(2026, 10, 12), date(2026, 10, 25)), 10)
+
+
+class ExportPreviewTests(TestCase):
+    """Export grouping is computed in a constant number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        departments = [Department.objects.create(name=name) for name in ('Sales', 'Support')]
+        cls.today = timezone.now().date()
+        for i in range(6):
+            employee = Employee.objects.create(
+                user=User.objects.create_user(username=f'emp{i}', password='pw'),
+                admin=cls.admin,
+                department=departments[i % 2]
+            )
+            for offset in range(3):
+                TimeEntry.objects.create(
+                    employee=employee,
+                    date=cls.today - timedelta(days=offset),
+                    start_time=time(9, 0),
+                    end_time=time(17, 0),
+                    status='approved' if offset else 'pending'
+                )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def preview(self, group_by, **extra):
+        data = {
+            'format': 'csv',
+            'group_by': group_by,
+            'start_date': (self.today - timedelta(days=6)).strftime('%Y-%m-%d'),
+            'end_date': self.today.strftime('%Y-%m-%d'),
+            'include_hours': 'on',
+            'include_attendance': 'on',
+            'include_productivity': 'on',
+            'export_all_employees': 'on',
+        }
+        data.update(extra)
+        response = self.client.post('/api/export/preview/', data)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_group_by_employee(self):
+        result = self.preview('employee')
+        rows = {row['employee']: row for row in result['data']}
+        self.assertEqual(rows['emp0']['total_hours'], 24.0)
+        self.assertEqual(rows['emp0']['attendance_rate'], 66.7)
+        self.assertEqual(rows['emp0']['status'], 'Active')
+        self.assertEqual(rows['admin']['status'], 'Inactive')
+
+    def test_group_by_department(self):
+        result = self.preview('department')
+        self.assertEqual(
+            [(row['department'], row['employee_count'], row['total_hours']) for row in result['data']],
+            [('Sales', 3, 72.0), ('Support', 3, 72.0)]
+        )
+
+    def test_group_by_period(self):
+        result = self.preview('week')
+        self.assertEqual(sum(row['total_hours'] for row in result['data']), 144.0)
+        self.assertEqual(sum(row['total_entries'] for row in result['data']), 18)
+
+    def test_productivity_per_working_day(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        calendar = WorkingDays()
+        start = self.today - timedelta(days=6)
+        holiday = next(start + timedelta(days=offset) for offset in range(7)
+                       if calendar.is_working_day(start + timedelta(days=offset)))
+        Holiday.add_to_calendars(User.objects.filter(username='emp0'), holiday, 'Day off')
+
+        rows = {row['employee']: row for row in self.preview('employee')['data']}
+        # Seven days always hold five weekdays; emp0 has one of them off
+        self.assertEqual((rows['emp0']['productivity'], rows['emp1']['productivity']), (6.0, 4.8))
+        departments = {row['department']: row for row in self.preview('department')['data']}
+        self.assertEqual(departments['Sales']['department_productivity'], round(72 / 14, 2))
+
+    def test_department_filter(self):
+        department = Department.objects.get(name='Sales')
+        result = self.preview('employee', filter_type='department', department=department.id)
+        self.assertEqual(len(result['data']), 3)
+
+    def test_query_count_independent_of_employee_count(self):
+        self.preview('day')
+        for group_by in ('employee', 'department', 'day'):
+            # Both measurements start without the admin's employee cached
+            cache.clear()
+            with CaptureQueriesContext(connection) as before:
+                self.preview(group_by)
+            for i in range(6, 12):
+                employee = Employee.objects.create(
+                    user=User.objects.create_user(username=f'{group_by}-extra{i}', password='pw'),
+                    admin=self.admin,
+                    department=Department.objects.get(name='Sales')
+                )
+                TimeEntry.objects.create(employee=employee, date=self.today,
+                                         start_time=time(9, 0), end_time=time(10, 0))
+            cache.clear()
+            with CaptureQueriesContext(connection) as after:
+                self.preview(group_by)
+            self.assertEqual(len(before), len(after), group_by)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ExportJobTests(TestCase):
+    """Exports are queued by the view and produced by the worker command."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        employee = Employee.objects.create(
+            user=User.objects.create_user(username='emp', password='pw'),
+            admin=self.admin
+        )
+        self.today = timezone.now().date()
+        TimeEntry.objects.create(employee=employee, date=self.today,
+                                 start_time=time(9, 0), end_time=time(17, 0))
+        self.client.force_login(self.admin)
+
+    def queue_export(self, **extra):
+        data = {
+            'format': 'csv',
+            'group_by': 'employee',
+            'start_date': self.today.strftime('%Y-%m-%d'),
+            'end_date': self.today.strftime('%Y-%m-%d'),
+            'include_hours': 'on',
+            'export_all_employees': 'on',
+        }
+        data.update(extra)
+        return self.client.post('/api/export/generate/', data)
+
+    def run_worker(self):
+        call_command('run_export_worker', once=True, stdout=open(os.devnull, 'w'))
+
+    def test_generate_returns_job_and_worker_completes_it(self):
+        response = self.queue_export()
+        self.assertEqual(response.status_code, 202)
+        job = response.json()['job']
+        self.assertEqual(job['status'], 'queued')
+
+        self.run_worker()
+
+        status = self.client.get(job['status_url']).json()['job']
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual(status['progress'], 100)
+
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download.status_code, 200)
+        content = b''.join(download.streaming_content).decode()
+        self.assertIn('emp', content)
+        self.assertIn('8.0', content)
+
+    def test_identical_export_reuses_file_until_data_changes(self):
+        self.queue_export()
+        self.run_worker()
+        first = Export.objects.get()
+
+        response = self.queue_export()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['cached'])
+        self.assertEqual(response.json()['job']['status'], 'done')
+        self.assertEqual(Export.objects.count(), 1)
+
+        # A different include flag is a different export
+        self.assertEqual(self.queue_export(include_attendance='on').status_code, 202)
+        ExportJob.objects.filter(status='queued').delete()
+
+        # Approving an entry changes the data in scope
+        TimeEntry.objects.update(status='approved')
+        response = self.queue_export()
+        self.assertEqual(response.status_code, 202)
+        self.run_worker()
+        self.assertEqual(Export.objects.count(), 2)
+        self.assertNotEqual(Export.objects.latest('id').cache_key, first.cache_key)
+
+    def test_pdf_rendered_in_process(self):
+        job = self.queue_export(format='pdf').json()['job']
+        self.run_worker()
+        status = self.client.get(job['status_url']).json()['job']
+        self.assertEqual(status['status'], 'done')
+        content = b''.join(self.client.get(status['download_url']).streaming_content)
+        self.assertTrue(content.startswith(b'%PDF'))
+
+    def test_invalid_request_is_rejected_before_queueing(self):
+        response = self.queue_export(end_date='2000-01-01')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_failed_job_reports_error(self):
+        job = self.queue_export(start_date='2000-01-01', end_date='2000-01-02', group_by='department').json()['job']
+        self.run_worker()
+        status = self.client.get(job['status_url']).json()['job']
+        self.assertEqual(status['status'], 'failed')
+        self.assertEqual(status['error'], 'No data available for the selected criteria')
+        self.assertEqual(self.client.get(
+            f"/api/export/jobs/{job['id']}/download/").status_code, 409)
+
+    def test_interrupted_job_is_failed_by_next_worker(self):
+        job = self.queue_export().json()['job']
+        ExportJob.claim_next()
+        ExportJob.objects.filter(id=job['id']).update(started_at=timezone.now() - timedelta(hours=1))
+        with self.settings(EXPORT_JOB_TIMEOUT=600):
+            self.run_worker()
+        status = self.client.get(job['status_url']).json()['job']
+        self.assertEqual(status['status'], 'failed')
+
+    def test_jobs_are_private_to_their_admin(self):
+        job = self.queue_export().json()['job']
+        other = User.objects.create_user(username='other', password='pw', is_staff=True)
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(job['status_url']).status_code, 404)
+
+
+class ExportStreamTests(TestCase):
+    """Raw time entries are streamed row by row instead of written to a file."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.employee = Employee.objects.create(
+            user=User.objects.create_user(username='emp', password='pw'),
+            admin=self.admin
+        )
+        self.start = timezone.now().date() - timedelta(days=9)
+        TimeEntry.objects.bulk_create([
+            TimeEntry(employee=self.employee, date=self.start + timedelta(days=offset),
+                      start_time=time(9, 0), end_time=time(17, 0), total_hours=8)
+            for offset in range(10)
+        ])
+        self.client.force_login(self.admin)
+
+    def stream(self, format, **extra):
+        params = {
+            'format': format,
+            'start_date': self.start.strftime('%Y-%m-%d'),
+            'end_date': (self.start + timedelta(days=9)).strftime('%Y-%m-%d'),
+            'export_all_employees': 'on',
+            'chunk_size': 3,
+        }
+        params.update(extra)
+        return self.client.get('/api/export/stream/', params)
+
+    def test_csv_stream(self):
+        response = self.stream('csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'employee,department,date,start_time,end_time,total_hours,entry_type,status')
+        self.assertEqual(len(lines), 11)
+        self.assertTrue(lines[1].startswith(f"emp,N/A,{self.start.strftime('%Y-%m-%d')},09:00:00,17:00:00,8.0"))
+
+    def test_ndjson_stream(self):
+        response = self.stream('ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0]['total_hours'], 8.0)
+
+    def test_unsupported_format_rejected(self):
+        self.assertEqual(self.stream('pdf').status_code, 400)
+
+    def test_selected_employees_limited_to_admin(self):
+        selected = {'export_all_employees': '', 'selected_employee_ids': str(self.employee.id)}
+        self.assertEqual(len(b''.join(self.stream('ndjson', **selected).streaming_content).splitlines()), 10)
+
+        other = User.objects.create_user(username='other', password='pw', is_staff=True)
+        self.client.force_login(other)
+        self.assertEqual(b''.join(self.stream('ndjson', **selected).streaming_content), b'')
+
+    def test_asgi_stream_is_async(self):
+        client = AsyncClient()
+        client.force_login(self.admin)
+        params = {'format': 'csv', 'start_date': self.start.strftime('%Y-%m-%d'),
+                  'end_date': (self.start + timedelta(days=9)).strftime('%Y-%m-%d'),
+                  'export_all_employees': 'on', 'chunk_size': 3}
+
+        async def fetch():
+            response = await client.get('/api/export/stream/', params)
+            return response, [chunk async for chunk in response.streaming_content]
+
+        response, chunks = async_to_sync(fetch)()
+        self.assertTrue(response.is_async)
+        # Header plus ten rows, three per chunk
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(len(b''.join(chunks).decode().splitlines()), 11)
+
+
+class TeamSummaryTests(TestCase):
+    """The team overview gets every employee's hours from one grouped query."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.today = timezone.now().date()
+        self.client.force_login(self.admin)
+        self.url = f"/api/time/team-summary/?start_date={self.today.replace(day=1)}&end_date={self.today}"
+
+    def add_employee(self, name, entry_types=()):
+        employee = Employee.objects.create(
+            user=User.objects.create_user(username=name, password='pw'),
+            admin=self.admin
+        )
+        for entry_type in entry_types:
+            TimeEntry.objects.create(employee=employee, date=self.today, entry_type=entry_type,
+                                     start_time=time(9, 0), end_time=time(13, 0))
+        # Entries before the range are ignored
+        TimeEntry.objects.create(employee=employee, date=self.today.replace(day=1) - timedelta(days=1),
+                                 start_time=time(9, 0), end_time=time(17, 0))
+        return employee
+
+    def test_regular_and_overtime_split(self):
+        self.add_employee('busy', ['Regular Work Hours', 'Overtime'])
+        self.add_employee('idle')
+
+        with CaptureQueriesContext(connection) as queries:
+            employees = {row['full_name']: row for row in self.client.get(self.url).json()['employees']}
+        # Entries outside the range are excluded by the join, not after it
+        summary = next(query['sql'] for query in queries if 'JOIN "PunchClock_timeentry"' in query['sql'])
+        self.assertIn('BETWEEN', summary.split('JOIN "PunchClock_timeentry"')[1].split(' WHERE ')[0])
+        self.assertEqual(employees['busy']['total_hours'], 8.0)
+        self.assertEqual(employees['busy']['regular_hours'], 4.0)
+        self.assertEqual(employees['busy']['overtime_hours'], 4.0)
+        self.assertEqual(employees['idle']['total_hours'], 0)
+
+    def test_query_count_independent_of_team_size(self):
+        self.add_employee('first', ['Regular Work Hours'])
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+
+        for index in range(10):
+            self.add_employee(f'extra{index}', ['Regular Work Hours', 'Overtime'])
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(response.json()['employees']), 11)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class RecordingBroker(LocalEventBroker):
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, admin_id, event):
+        self.published.append((admin_id, event))
+        super().publish(admin_id, event)
+
+
+class DashboardEventTests(TestCase):
+    """Dashboard actions are pushed to the admin's event stream after commit."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.employee_user = User.objects.create_user(username='emp', password='pw')
+        self.employee = Employee.objects.create(user=self.employee_user, admin=self.admin)
+        self.broker = RecordingBroker()
+        events._broker = self.broker
+        self.addCleanup(setattr, events, '_broker', None)
+
+    def test_punch_and_approval_are_published(self):
+        self.client.force_login(self.employee_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/time/punch/', json.dumps({
+                'start_time': '09:00', 'end_time': '17:00', 'session_id': 'abc'
+            }), content_type='application/json')
+        entry_id = response.json()['entry']['id']
+
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/time/approve-all/')
+
+        self.assertEqual([(admin_id, event['type']) for admin_id, event in self.broker.published],
+                         [(self.admin.id, 'punch'), (self.admin.id, 'approval')])
+        self.assertEqual(self.broker.published[0][1]['entry_id'], entry_id)
+        self.assertEqual(self.broker.published[1][1]['entry_ids'], [entry_id])
+
+    def test_approve_all_leaves_other_statuses(self):
+        today = timezone.now().date()
+        pending = TimeEntry.objects.create(employee=self.employee, date=today, start_time=time(9, 0),
+                                           end_time=time(12, 0), status='pending')
+        rejected = TimeEntry.objects.create(employee=self.employee, date=today, start_time=time(13, 0),
+                                            end_time=time(17, 0), status='rejected', segment_index=1)
+
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/time/approve-all/')
+
+        self.assertEqual(response.json()['count'], 1)
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.status, 'rejected')
+        self.assertEqual(self.broker.published[0][1]['entry_ids'], [pending.id])
+
+    def test_nothing_published_when_transaction_rolls_back(self):
+        self.client.force_login(self.employee_user)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.client.post('/api/time/punch/', json.dumps({
+                'start_time': '09:00', 'end_time': '17:00', 'session_id': 'abc'
+            }), content_type='application/json')
+        self.assertEqual(self.broker.published, [])
+        # The punch goes out only once the commit callbacks run
+        for callback in callbacks:
+            callback()
+        self.assertEqual([event['type'] for _, event in self.broker.published], ['punch'])
+
+    async def test_stream_delivers_published_events(self):
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.get('/api/dashboard/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+
+        self.broker.publish(self.admin.id, {'type': 'clear', 'count': 3})
+        # Events for other admins are not delivered
+        self.broker.publish(self.admin.id + 1, {'type': 'undo', 'count': 1})
+        chunk = await asyncio.wait_for(anext(stream), 5)
+        self.assertEqual(chunk, b'event: clear\ndata: {"type": "clear", "count": 3}\n\n')
+
+        # A client disconnect cancels the pending read, which unsubscribes
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(self.broker.subscriptions, {})
+
+    def test_stream_refused_under_wsgi(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get('/api/dashboard/events/').status_code, 503)
+
+
+class PunchIdempotencyTests(TestCase):
+    """A retried punch returns the entry the first attempt created."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.user = User.objects.create_user(username='emp', password='pw')
+        self.employee = Employee.objects.create(user=self.user, admin=self.admin)
+        self.broker = RecordingBroker()
+        events._broker = self.broker
+        self.addCleanup(setattr, events, '_broker', None)
+        self.client.force_login(self.user)
+
+    def punch(self, segment_index=0, end_time='17:00'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/time/punch/', json.dumps({
+                'start_time': '09:00', 'end_time': end_time,
+                'session_id': 'abc', 'segment_index': segment_index
+            }), content_type='application/json').json()
+
+    def test_retry_returns_existing_entry(self):
+        first = self.punch()
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.punch(end_time='18:00')
+
+        self.assertFalse(first['duplicate'])
+        self.assertTrue(retry['duplicate'])
+        self.assertEqual(retry['entry'], first['entry'])
+        self.assertEqual(retry['entry']['total_hours'], 8.0)
+        # A retry is a read, not a write
+        self.assertFalse([query for query in queries.captured_queries
+                          if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))])
+        self.assertEqual(TimeEntry.objects.count(), 1)
+        self.assertEqual(DailyHours.objects.get().entry_count, 1)
+        self.assertEqual([event['type'] for _, event in self.broker.published], ['punch'])
+
+    def test_new_segment_creates_entry(self):
+        self.punch()
+        self.assertFalse(self.punch(segment_index=1)['duplicate'])
+        self.assertEqual(TimeEntry.objects.count(), 2)
+        self.assertEqual(DailyHours.objects.get().entry_count, 2)
+
+
+class GlobalHolidayTests(TestCase):
+    """A global holiday reaches every managed calendar in a fixed number of queries."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.client.force_login(self.admin)
+
+    def add_employees(self, count, prefix):
+        for index in range(count):
+            Employee.objects.create(user=User.objects.create_user(username=f'{prefix}{index}', password='pw'),
+                                    admin=self.admin)
+
+    def add_holiday(self, date, reason='Company holiday'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/calendar-settings/update-global-holiday/',
+                                        json.dumps({'date': date, 'reason': reason}),
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_independent_of_employee_count(self):
+        # Both measurements update existing calendars and create new ones
+        self.add_employees(3, 'first')
+        self.add_holiday('2026-12-24')
+        self.add_employees(1, 'second')
+        before = self.add_holiday('2026-12-25')
+        self.add_employees(20, 'third')
+        after = self.add_holiday('2026-12-26')
+        self.assertEqual(before, after)
+
+    def test_holiday_added_to_existing_and_new_calendars(self):
+        self.add_employees(2, 'emp')
+        employee_user = User.objects.get(username='emp0')
+        Holiday.objects.create(user=employee_user, date='2026-01-01', reason='New Year')
+        Holiday.objects.create(user=employee_user, date='2026-12-25', reason='Christmas')
+        User.objects.create_user(username='other')
+
+        self.add_holiday('2026-12-25')
+
+        self.assertEqual(
+            sorted(Holiday.objects.values_list('user__username', 'date', 'reason')),
+            [('admin', date(2026, 12, 25), 'Company holiday'),
+             ('emp0', date(2026, 1, 1), 'New Year'),
+             ('emp0', date(2026, 12, 25), 'Company holiday'),
+             ('emp1', date(2026, 12, 25), 'Company holiday')]
+        )
+
+
+class CalendarWindowTests(TestCase):
+    """Calendar endpoints read and write per-date rows, optionally within a window."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.user = User.objects.create_user(username='emp', password='pw')
+        self.employee = Employee.objects.create(user=self.user, admin=self.admin)
+        self.client.force_login(self.user)
+        for day, reason in (('2026-09-30', 'Before'), ('2026-10-05', 'Inside'), ('2026-11-01', 'After')):
+            Holiday.objects.create(user=self.user, date=day, reason=reason)
+        Note.objects.create(user=self.user, kind=Note.CALENDAR, date='2026-10-06', text='Shared')
+        Note.objects.create(user=self.user, kind=Note.PERSONAL, date='2026-10-07', text='Mine')
+
+    def post(self, url, data):
+        return self.client.post(url, json.dumps(data), content_type='application/json').json()
+
+    def test_get_window(self):
+        data = self.client.get('/api/calendar-settings/get/', {'month': '2026-10'}).json()
+        self.assertEqual(data['holidays'], {'2026-10-05': 'Inside'})
+        self.assertEqual(data['notes'], {'2026-10-06': 'Shared'})
+        self.assertEqual(self.client.get('/api/personal-notes/get/', {'from': '2026-10-07', 'to': '2026-10-07'}).json()['notes'],
+                         {'2026-10-07': 'Mine'})
+        # Without a window the whole calendar is returned
+        self.assertEqual(len(self.client.get('/api/calendar-settings/get/').json()['holidays']), 3)
+
+    def test_update_replaces_only_the_window(self):
+        response = self.post('/api/calendar-settings/update/?month=2026-10', {
+            'holidays': {'2026-10-12': 'Moved'}, 'notes': {'2026-10-06': 'Shared'}, 'weekendDays': ['0', '6']
+        })
+        self.assertTrue(response['success'])
+        self.assertEqual(Holiday.objects.filter(user=self.user).as_dict(),
+                         {'2026-09-30': 'Before', '2026-10-12': 'Moved', '2026-11-01': 'After'})
+        self.assertEqual(CalendarSettings.objects.get(user=self.user).weekend_days, [0, 6])
+
+        # Unchanged days aren't written at all
+        with CaptureQueriesContext(connection) as queries:
+            self.post('/api/personal-notes/update/?month=2026-10', {'notes': {'2026-10-07': 'Mine'}})
+        self.assertFalse([query for query in queries.captured_queries
+                          if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))])
+
+        self.post('/api/personal-notes/update/?month=2026-10', {'notes': {'2026-10-07': 'Edited', '2026-10-08': 'New'}})
+        self.assertEqual(Note.objects.filter(user=self.user, kind=Note.PERSONAL).as_dict(),
+                         {'2026-10-07': 'Edited', '2026-10-08': 'New'})
+
+    def test_empty_update_deletes_the_month(self):
+        # The calendar pages post their whole month, so they must never save one that didn't load
+        self.post('/api/calendar-settings/update/?month=2026-10', {'holidays': {}, 'notes': {}, 'weekendDays': []})
+        self.post('/api/personal-notes/update/?month=2026-10', {'notes': {}})
+        self.assertEqual(Holiday.objects.filter(user=self.user).as_dict(),
+                         {'2026-09-30': 'Before', '2026-11-01': 'After'})
+        self.assertFalse(Note.objects.filter(user=self.user).exists())
+
+    def test_admin_reads_and_deletes_employee_notes(self):
+        self.client.force_login(self.admin)
+        url = f'/api/personal-notes/get/?employee_id={self.employee.id}'
+        self.assertEqual(self.client.get(url).json()['notes'], {'2026-10-07': 'Mine'})
+        self.post(f'/api/personal-notes/delete/?employee_id={self.employee.id}&date=2026-10-07', {})
+        self.assertFalse(Note.objects.filter(kind=Note.PERSONAL).exists())
+
+        other_admin = User.objects.create_user(username='other', password='pw', is_staff=True)
+        self.client.force_login(other_admin)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_conditional_get(self):
+        url = '/api/calendar-settings/get/?month=2026-10'
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertNotEqual(self.client.get('/api/calendar-settings/get/?month=2026-11')['ETag'], etag)
+
+        # An unchanged month is answered from the version alone
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+        self.assertFalse([query for query in queries if 'PunchClock_' in query['sql']])
+
+        notes_url = '/api/personal-notes/get/?month=2026-10'
+        notes_etag = self.client.get(notes_url)['ETag']
+        self.post('/api/personal-notes/delete/?date=2026-10-07', {})
+        response = self.client.get(notes_url, HTTP_IF_NONE_MATCH=notes_etag)
+        self.assertEqual((response.status_code, response.json()['notes']), (200, {}))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_invalidated_by_another_worker(self):
+        shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp()}
+        url = '/api/calendar-settings/get/?month=2026-10'
+        with self.settings(CACHES={'default': shared}):
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            # A calendar change recorded by another process sharing the cache
+            subprocess.run(
+                [sys.executable, '-c', 'import django; django.setup(); '
+                 f'from PunchClock.caching import touch_calendars; touch_calendars([{self.user.pk}])'],
+                check=True,
+                env={**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, sys.path)),
+                     'CACHE_BACKEND': shared['BACKEND'], 'CACHE_LOCATION': shared['LOCATION']}
+            )
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_global_holiday_changes_employee_etag(self):
+        url = '/api/calendar-settings/get/?month=2026-12'
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.admin)
+        self.post('/api/calendar-settings/update-global-holiday/', {'date': '2026-12-25', 'reason': 'Christmas'})
+
+        self.client.force_login(self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.json()['holidays']), (200, {'2026-12-25': 'Christmas'}))
+
+
+class EmployeeTimeEntriesPaginationTests(TestCase):
+    """Time entry listings are keyset paginated and can be projected."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.employee = Employee.objects.create(
+            user=User.objects.create_user(username='emp', password='pw'),
+            admin=self.admin
+        )
+        self.start = timezone.now().date() - timedelta(days=9)
+        # Two entries per day, so pages split inside a day
+        for offset in range(10):
+            for hour in (8, 13):
+                TimeEntry.objects.create(employee=self.employee, date=self.start + timedelta(days=offset),
+                                         start_time=time(hour, 0), end_time=time(hour + 4, 0))
+        self.client.force_login(self.admin)
+        self.url = f'/api/time/entries/{self.employee.id}/'
+        self.range = {'start_date': self.start.isoformat(), 'end_date': timezone.now().date().isoformat()}
+
+    def test_pages_cover_range_without_duplicates(self):
+        seen = []
+        params = dict(self.range, limit=3)
+        while True:
+            data = self.client.get(self.url, params).json()
+            seen.extend(entry['id'] for entry in data['entries'])
+            if not data['has_more']:
+                break
+            params['cursor'] = data['next_cursor']
+
+        expected = list(TimeEntry.objects.filter(employee=self.employee)
+                        .order_by('-date', '-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_fields_projection(self):
+        data = self.client.get(self.url, dict(self.range, fields='id,total_hours', limit=1)).json()
+        self.assertEqual(data['entries'], [{'id': data['entries'][0]['id'], 'total_hours': '4.00'}])
+
+    def test_invalid_parameters_rejected(self):
+        self.assertEqual(self.client.get(self.url, dict(self.range, fields='salary')).status_code, 400)
+        self.assertEqual(self.client.get(self.url, dict(self.range, cursor='garbage')).status_code, 400)
+
+
+
+class QueryStatsMiddlewareTests(TestCase):
+    """Requests report their SQL usage in Server-Timing and the stats endpoint."""
+
+    def setUp(self):
+        query_stats.reset()
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.client.force_login(self.admin)
+
+    def test_server_timing_and_stats_table(self):
+        response = self.client.get('/api/time/team-summary/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", db-slowest;dur=[\d.]+, app;dur=[\d.]+$')
+
+        routes = {row['route']: row for row in self.client.get('/api/admin/query-stats/').json()['routes']}
+        summary = routes['GET /api/time/team-summary/']
+        self.assertEqual(summary['requests'], 1)
+        self.assertGreater(summary['max_queries'], 0)
+        self.assertIn('SELECT', summary['slowest_query'])
+
+    def test_stats_are_staff_only(self):
+        self.client.force_login(User.objects.create_user(username='emp', password='pw'))
+        self.assertEqual(self.client.get('/api/admin/query-stats/').status_code, 403)
+
+# Maximum queries per request for every named route in PunchClock/urls.py,
+# measured with QueryBudgetTests' fixture of ten employees in three
+# departments. Routes still marked N+1 scale with the number of rows.
+# The admin starts without an Employee record, so the routes that create
+# one on first use include that insert. Time entry writes include one
+# query for the admins whose cached statistics they invalidate.
+QUERY_BUDGETS = {
+    'welcome': 0,
+    'punchclock': 10,
+    'dashboard': 6,
+    'adminlogin': 7,
+    'loginpunch': 9,
+    'logout': 4,
+    'add_employee': 6,
+    'settingsuser': 3,
+    'get_employees': 3,
+    'get_employee_details': 5,
+    'employee_calendar': 2,
+    'calendar': 2,
+    'get_calendar_settings': 5,
+    'update_calendar_settings': 9,
+    'update_global_holiday': 5,
+    'get_personal_notes': 3,
+    'update_personal_notes': 4,
+    'delete_personal_notes': 2,
+    'update_company_name': 7,
+    'get_company_settings': 6,
+    'update_company_settings': 7,
+    'get_company_logo': 6,
+    'upload_company_logo': 2,
+    'delete_company_logo': 6,
+    'profile_picture': 2,
+    'get_profile_picture': 3,
+    'employee_profile_picture': 2,
+    'delete_employee_profile_picture': 5,
+    'get_employee_profile_picture': 5,
+    'punch_time': 19,
+    'time_stats': 12,
+    'employee_time_stats': 8,
+    'get_employee_time_entries': 4,
+    'team_summary': 3,
+    'get_recent_activities': 3,
+    'create_time_entry': 15,
+    'get_time_entry': 5,
+    'update_time_entry': 13,
+    'delete_time_entry': 13,
+    'get_today_entries': 20,  # N+1: employee's user loaded per entry
+    'update_time_entry_status': 13,
+    'approve_all_time_entries': 14,
+    'clear_time_entries': 15,
+    'undo_clear_time_entries': 2,
+    'dashboard_stats': 5,
+    'dashboard_events': 2,
+    'query_stats': 2,
+    'get_employee_stats': 29,  # N+1: debug output loads each employee's admin
+    'get_active_employees': 3,
+    'list_departments': 3,
+    'create_department': 6,
+    'update_department': 5,
+    'delete_department': 3,
+    'department_employees': 8,
+    'export_preview': 10,
+    'export_generate': 12,
+    'export_stream': 10,
+    'export_job_status': 3,
+    'export_job_download': 3,
+    'export_recent': 3,
+    'export_delete': 5,
+}
+
+
+class QueryBudgetTests(TestCase):
+    """Every route declares a query budget and stays within it."""
+
+    def setUp(self):
+        self.client = Client(raise_request_exception=False)
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.departments = [Department.objects.create(name=f'Dept {index}') for index in range(3)]
+        self.employees = [
+            Employee.objects.create(
+                user=User.objects.create_user(username=f'emp{index}', password='pw', first_name='Emp', last_name=str(index)),
+                admin=self.admin,
+                department=self.departments[index % 3]
+            )
+            for index in range(10)
+        ]
+        today = timezone.now().date()
+        for employee in self.employees:
+            for offset in range(3):
+                TimeEntry.objects.create(employee=employee, date=today - timedelta(days=offset),
+                                         start_time=time(9, 0), end_time=time(17, 0), session_verified=True)
+        self.entry = TimeEntry.objects.filter(employee=self.employees[0]).first()
+        self.job = ExportJob.objects.create(admin=self.admin, params={})
+        self.export = Export.objects.create(admin=self.admin, format='csv', report_type='employee',
+                                            start_date=today, end_date=today, file_url='/media/exports/missing.csv')
+
+    def route_requests(self):
+        """(url name, method, url args, request data) for every route."""
+        today = timezone.now().date().isoformat()
+        employee = self.employees[0]
+        department = self.departments[0]
+        export_form = {'format': 'csv', 'group_by': 'employee', 'start_date': today, 'end_date': today,
+                       'include_hours': 'on', 'export_all_employees': 'on'}
+        entry_body = json.dumps({'date': today, 'start_time': '09:00', 'end_time': '12:00', 'employee_id': employee.id})
+        return [
+            ('welcome', 'get', (), None),
+            ('punchclock', 'get', (), None),
+            ('dashboard', 'get', (), None),
+            ('adminlogin', 'post', (), {'email': 'admin', 'password': 'pw'}),
+            ('loginpunch', 'post', (), {'email': 'emp0', 'password': 'pw'}),
+            ('logout', 'get', (), None),
+            ('add_employee', 'post', (), {'employee_name': 'New Hire', 'employee_email': 'new@example.com',
+                                          'employee_password': 'pw', 'employee_role': 'employee',
+                                          'employee_department': department.id, 'employee_hire_date': today}),
+            ('settingsuser', 'get', (), None),
+            ('get_employees', 'get', (), None),
+            ('get_employee_details', 'get', (employee.id,), None),
+            ('employee_calendar', 'get', (), None),
+            ('calendar', 'get', (), None),
+            ('get_calendar_settings', 'get', (), None),
+            ('update_calendar_settings', 'post', (), json.dumps({'holidays': {today: 'Day off'}, 'notes': {}, 'weekendDays': [0, 6]})),
+            ('update_global_holiday', 'post', (), json.dumps({'date': today, 'reason': 'Company holiday'})),
+            ('get_personal_notes', 'get', (), None),
+            ('update_personal_notes', 'post', (), json.dumps({'notes': {today: 'Note'}})),
+            ('delete_personal_notes', 'post', (), json.dumps({'date': today})),
+            ('update_company_name', 'post', (), json.dumps({'company_name': 'Acme'})),
+            ('get_company_settings', 'get', (), None),
+            ('update_company_settings', 'post', (), json.dumps({'work_hours': 8, 'rest_hours': 1})),
+            ('get_company_logo', 'get', (), None),
+            ('upload_company_logo', 'post', (), json.dumps({'image_data': ''})),
+            ('delete_company_logo', 'delete', (), None),
+            ('profile_picture', 'post', (), {'image_data': ''}),
+            ('get_profile_picture', 'get', (), None),
+            ('employee_profile_picture', 'post', (), {'employee_id': employee.id, 'image_data': ''}),
+            ('delete_employee_profile_picture', 'post', (employee.id,), None),
+            ('get_employee_profile_picture', 'get', (employee.id,), None),
+            ('punch_time', 'post', (), json.dumps({'start_time': '09:00', 'end_time': '17:00', 'session_id': 'budget'})),
+            ('time_stats', 'get', (), None),
+            ('employee_time_stats', 'get', (employee.id,), None),
+            ('get_employee_time_entries', 'get', (employee.id,), None),
+            ('team_summary', 'get', (), None),
+            ('get_recent_activities', 'get', (), None),
+            ('create_time_entry', 'post', (), entry_body),
+            ('get_time_entry', 'get', (self.entry.id,), None),
+            ('update_time_entry', 'post', (self.entry.id,), entry_body),
+            ('delete_time_entry', 'post', (self.entry.id,), None),
+            ('get_today_entries', 'get', (), None),
+            ('update_time_entry_status', 'post', (), json.dumps({'entry_id': self.entry.id, 'status': 'approved'})),
+            ('approve_all_time_entries', 'post', (), None),
+            ('clear_time_entries', 'post', (), json.dumps({})),
+            ('undo_clear_time_entries', 'post', (), None),
+            ('dashboard_stats', 'get', (), None),
+            ('dashboard_events', 'get', (), None),
+            ('query_stats', 'get', (), None),
+            ('get_employee_stats', 'get', (), None),
+            ('get_active_employees', 'get', (), None),
+            ('list_departments', 'get', (), None),
+            ('create_department', 'post', (), json.dumps({'name': 'New Dept'})),
+            ('update_department', 'post', (department.id,), json.dumps({'name': 'Renamed'})),
+            ('delete_department', 'post', (department.id,), None),
+            ('department_employees', 'get', (department.id,), None),
+            ('export_preview', 'post', (), export_form),
+            ('export_generate', 'post', (), export_form),
+            ('export_stream', 'get', (), export_form),
+            ('export_job_status', 'get', (self.job.id,), None),
+            ('export_job_download', 'get', (self.job.id,), None),
+            ('export_recent', 'get', (), None),
+            ('export_delete', 'delete', (self.export.id,), None),
+        ]
+
+    def count_queries(self, name, method, args=(), data=None):
+        """Number of queries one request to the named route runs, as the logged in admin."""
+        url = reverse(f'PunchClock:{name}', args=args)
+        kwargs = {}
+        if isinstance(data, str):
+            kwargs = {'data': data, 'content_type': 'application/json'}
+        elif data is not None:
+            kwargs = {'data': data}
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+        return len(queries.captured_queries)
+
+    def assertWithinQueryBudget(self, name, method, args=(), data=None):
+        count = self.count_queries(name, method, args, data)
+        self.assertLessEqual(count, QUERY_BUDGETS[name],
+                             f'{name} ran {count} queries, budget is {QUERY_BUDGETS[name]}')
+
+    def test_every_route_has_a_budget(self):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names - set(QUERY_BUDGETS), set(), 'Add a QUERY_BUDGETS entry for new routes')
+        self.assertEqual(names, {request[0] for request in self.route_requests()})
+
+    def test_routes_within_budget(self):
+        for name, method, args, data in self.route_requests():
+            with self.subTest(route=name):
+                # Each request starts from the same data and a fresh admin session
+                savepoint = transaction.savepoint()
+                try:
+                    self.client.force_login(self.admin)
+                    self.assertWithinQueryBudget(name, method, args, data)
+                finally:
+                    transaction.savepoint_rollback(savepoint)
+
+
+class SeedingTests(TestCase):
+    """The benchmark seeder bulk inserts consistent entries and rollups."""
+
+    def test_seeded_entries_match_save(self):
+        admins, employees = seed_organisation(admins=2, employees_per_admin=3, departments=2)
+        self.assertEqual(len(employees), 8)
+        self.assertEqual(Employee.objects.filter(admin=admins[1]).count(), 4)
+
+        end = timezone.now().date()
+        created = seed_time_entries([employee.id for employee in employees], end - timedelta(days=13), end,
+                                    batch_size=7, seed=1)
+        self.assertEqual(TimeEntry.objects.count(), created)
+        # Ten weekdays in any two-week window, one to three segments each
+        self.assertTrue(80 <= created <= 240)
+
+        entry = TimeEntry.objects.order_by('?').first()
+        total_hours = entry.total_hours
+        entry.save()
+        entry.refresh_from_db()
+        self.assertEqual(entry.total_hours, total_hours)
+        self.assertEqual(DailyHours.objects.aggregate(total=Sum('entry_count'))['total'], created)
+
+    def test_generate_time_entries_bulk(self):
+        _, employees = seed_organisation(admins=1, employees_per_admin=2, departments=1)
+        output = StringIO()
+        call_command('generate_time_entries', '--bulk', '--days', '14', '--batch-size', '4',
+                     '--seed', '3', stdout=output)
+
+        # One entry per employee for each of the ten weekdays
+        self.assertEqual(TimeEntry.objects.count(), 30)
+        self.assertIn('Successfully generated 30 time entries', output.getvalue())
+        self.assertNotIn('Created entry', output.getvalue())
+        for entry in TimeEntry.objects.order_by('?')[:5]:
+            total_hours = entry.total_hours
+            entry.save()
+            entry.refresh_from_db()
+            self.assertEqual(entry.total_hours, total_hours)
+        self.assertEqual(DailyHours.objects.aggregate(total=Sum('entry_count'))['total'], 30)
+
+
+class EmployeeCacheTests(TestCase):
+    """The logged in user's employee is looked up once and cached until it changes."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.user = User.objects.create_user(username='emp', password='pw')
+        self.department = Department.objects.create(name='Sales')
+        self.employee = Employee.objects.create(user=self.user, admin=self.admin, department=self.department)
+
+    def test_cached_across_requests_until_saved(self):
+        with self.assertNumQueries(1):
+            get_employee(self.user)
+        with self.assertNumQueries(0):
+            employee = get_employee(self.user)
+            self.assertEqual((employee.department.name, employee.admin.username), ('Sales', 'admin'))
+
+        other = Department.objects.create(name='Support')
+        self.employee.department = other
+        self.employee.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_employee(self.user).department, other)
+
+        self.employee.delete()
+        self.assertIsNone(get_employee(self.user))
+
+    def test_request_employee_resolved_once(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with self.assertNumQueries(1):
+            self.assertEqual(request_employee(request), self.employee)
+            cache.clear()
+            self.assertEqual(request_employee(request), self.employee)
+
+    def test_admin_employee_created_on_first_use(self):
+        request = RequestFactory().get('/')
+        request.user = self.admin
+        # A missing record is remembered for the rest of the request too
+        with self.assertNumQueries(1):
+            self.assertIsNone(request_employee(request))
+            self.assertIsNone(request_employee(request))
+
+        employee = request_employee(request, create=True)
+        self.assertEqual(employee.admin, self.admin)
+        self.assertEqual(employee.department.name, 'Management')
+        self.assertEqual(Employee.objects.filter(user=self.admin).count(), 1)
+
+
+class ResponseCacheTests(TestCase):
+    """Statistics responses are cached per admin/employee until a write bumps the version."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        self.employee = Employee.objects.create(
+            user=User.objects.create_user(username='emp', password='pw'), admin=self.admin)
+        self.today = timezone.now().date()
+        self.entry = TimeEntry.objects.create(employee=self.employee, date=self.today,
+                                              start_time=time(9, 0), end_time=time(12, 0))
+        self.client.force_login(self.admin)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Cache'], response.json()
+
+    def test_dashboard_stats_invalidated_by_entry_writes(self):
+        self.assertEqual(self.get('/api/dashboard/stats/')[0], 'MISS')
+        with CaptureQueriesContext(connection) as queries:
+            state, data = self.get('/api/dashboard/stats/')
+        self.assertEqual((state, data['active_today']), ('HIT', 1))
+        self.assertFalse([query for query in queries if 'PunchClock_' in query['sql']])
+
+        other = Employee.objects.create(user=User.objects.create_user(username='emp2', password='pw'),
+                                        admin=self.admin)
+        TimeEntry.objects.bulk_create([TimeEntry(employee=other, date=self.today, start_time=time(9, 0),
+                                                 end_time=time(10, 0), total_hours=1)])
+        state, data = self.get('/api/dashboard/stats/')
+        self.assertEqual((state, data['active_today']), ('MISS', 2))
+
+        TimeEntry.objects.filter(employee=other).delete()
+        self.assertEqual(self.get('/api/dashboard/stats/')[1]['active_today'], 1)
+
+    def test_employee_stats_invalidated_by_status_update(self):
+        self.assertEqual(self.get('/api/employees/stats/')[1]['stats']['pending_approval'], 1)
+        self.assertEqual(self.get('/api/employees/stats/')[0], 'HIT')
+
+        TimeEntry.objects.filter(id=self.entry.id).update(status='approved')
+        state, data = self.get('/api/employees/stats/')
+        self.assertEqual((state, data['stats']['pending_approval']), ('MISS', 0))
+
+    def test_time_stats_scoped_per_employee(self):
+        self.entry.session_verified = True
+        self.entry.save()
+        url = f'/api/time/stats/{self.employee.id}/'
+        self.assertEqual(self.get(url)[1]['statistics']['weekly_hours'], 3.0)
+        self.assertEqual(self.get(url)[0], 'HIT')
+
+        # Another employee's entry leaves this one's cache alone
+        admin_employee = Employee.objects.create(user=self.admin, admin=self.admin)
+        TimeEntry.objects.create(employee=admin_employee, date=self.today, start_time=time(9, 0),
+                                 end_time=time(10, 0), session_verified=True)
+        self.assertEqual(self.get(url)[0], 'HIT')
+
+        self.entry.end_time = time(13, 0)
+        self.entry.save()
+        state, data = self.get(url)
+        self.assertEqual((state, data['statistics']['weekly_hours']), ('MISS', 4.0))
+
+    def test_department_list_invalidated_by_employee_changes(self):
+        sales = Department.objects.create(name='Sales')
+        other_admin = User.objects.create_user(username='other', password='pw', is_staff=True)
+        for index in range(3):
+            Employee.objects.create(user=User.objects.create_user(username=f'other{index}', password='pw'),
+                                    admin=other_admin, department=sales)
+
+        def counts(url):
+            state, data = self.get(url)
+            return state, {dept['name']: dept['employee_count'] for dept in data['departments']}
+
+        self.assertEqual(counts('/api/departments/'), ('MISS', {'Sales': 3}))
+        self.assertEqual(counts('/api/departments/?scope=mine'), ('MISS', {'Sales': 0}))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(counts('/api/departments/')[0], 'HIT')
+        self.assertFalse([query for query in queries if 'PunchClock_' in query['sql']])
+
+        self.employee.department = sales
+        self.employee.save()
+        self.assertEqual(counts('/api/departments/?scope=mine'), ('MISS', {'Sales': 1}))
+        Department.objects.create(name='Support')
+        self.assertEqual(counts('/api/departments/'), ('MISS', {'Sales': 4, 'Support': 0}))
+
+
+class StartupImportTests(SimpleTestCase):
+    """Web workers start without loading the export and image libraries."""
+
+    # Loaded only by the code paths that need them
+    LAZY_MODULES = ('pandas', 'numpy', 'pdfkit', 'PIL', 'reportlab', 'matplotlib')
+    # django.setup() plus loading the URLconf, best of three runs
+    BUDGET_MS = 600
+    STARTUP = ("import django; django.setup(); "
+               "from django.urls import resolve; resolve('/punchclock')")
+
+    def import_times(self):
+        """(module, cumulative microseconds, nested) for every import of one startup."""
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', self.STARTUP],
+            capture_output=True, text=True, check=True,
+            env={**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, sys.path))}
+        )
+        imports = []
+        for line in result.stderr.splitlines():
+            match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)$', line)
+            if match:
+                # Nested imports are indented under the module that imported them
+                imports.append((match.group(3), int(match.group(1)), len(match.group(2)) > 1))
+        return imports
+
+    def test_startup_stays_within_import_budget(self):
+        runs = [self.import_times() for _ in range(3)]
+        loaded = {module.split('.')[0] for run in runs for module, _, _ in run}
+        self.assertFalse(loaded & set(self.LAZY_MODULES))
+
+        total_ms = min(sum(micros for _, micros, nested in run if not nested) for run in runs) / 1000
+        self.assertLessEqual(total_ms, self.BUDGET_MS,
+                             f'django.setup() and URL resolution spent {total_ms:.0f} ms importing modules')
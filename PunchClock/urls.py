@@ -53,6 +53,7 @@ urlpatterns = [
     path('api/time/stats/', time_views.GetTimeStatisticsView.as_view(), name='time_stats'),
     path('api/time/stats/<int:employee_id>/', time_views.GetTimeStatisticsView.as_view(), name='employee_time_stats'),
     path('api/time/entries/<int:employee_id>/', time_views.GetEmployeeTimeEntriesView.as_view(), name='get_employee_time_entries'),
+    path('api/time/team-summary/', time_views.TeamSummaryView.as_view(), name='team_summary'),
     path('api/time/recent/', time_views.GetRecentActivitiesView.as_view(), name='get_recent_activities'),    # Time entry CRUD endpoints
     path('api/time/entry/create/', time_views.CreateTimeEntryView.as_view(), name='create_time_entry'),
     path('api/time/entry/<int:entry_id>/', time_views.GetTimeEntryView.as_view(), name='get_time_entry'),
@@ -68,6 +69,10 @@ urlpatterns = [
     
     # Dashboard stats endpoint
     path('api/dashboard/stats/', time_views.DashboardStatsView.as_view(), name='dashboard_stats'),
+    path('api/dashboard/events/', event_views.DashboardEventsView.as_view(), name='dashboard_events'),
+
+    # Per-route query counts and SQL time (QueryStatsMiddleware)
+    path('api/admin/query-stats/', stats_views.QueryStatsView.as_view(), name='query_stats'),
     
     # Employee stats endpoint
     path('api/employees/stats/', time_entries.GetEmployeeStatsView.as_view(), name='get_employee_stats'),
@@ -85,6 +90,9 @@ urlpatterns = [
     
     path('api/export/preview/', export_views.ExportPreviewView.as_view(), name='export_preview'),
     path('api/export/generate/', export_views.ExportGenerateView.as_view(), name='export_generate'),
+    path('api/export/stream/', export_views.ExportStreamView.as_view(), name='export_stream'),
+    path('api/export/jobs/<int:job_id>/', export_views.ExportJobStatusView.as_view(), name='export_job_status'),
+    path('api/export/jobs/<int:job_id>/download/', export_views.ExportJobDownloadView.as_view(), name='export_job_download'),
     path('api/export/recent/', export_views.ExportRecentView.as_view(), name='export_recent'),
     path('api/export/delete/<int:export_id>/', export_views.ExportDeleteView.as_view(), name='export_delete'),
 ]
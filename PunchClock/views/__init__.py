@@ -9,7 +9,9 @@ from .calendar_views import *
 from .company_views import *
 from .department_views import *
 from .employee_views import *
+from .event_views import *
 from .export_views import *
 from .profile_views import *
+from .stats_views import *
 from .time_views import *
 from .time_entries import *
\ No newline at end of file
@@ -9,6 +9,7 @@ from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth.models import User
 from ..models import Employee, CompanySettings, ProfilePicture
+from ..employees import request_employee
 
 __all__ = ['Welcome', 'Admin', 'PunchCard']
 
@@ -42,38 +43,14 @@ class Admin(LoginRequiredMixin, UserPassesTestMixin, View):
 class PunchCard(LoginRequiredMixin, View):
     def get(self, request):
         context = {}
-        try:
-            # Try to get existing employee record
-            employee = Employee.objects.get(user=request.user)
-            context['display_name'] = employee.full_name
-            context['initials'] = ''.join(x[0].upper() for x in employee.full_name.split()) if employee.full_name else employee.user.username[:2].upper()
-        except Employee.DoesNotExist:
-            # Create employee record if none exists
-            if request.user.is_staff:
-                # For admin users who don't have an employee record
-                employee = Employee.objects.create(
-                    user=request.user,
-                    admin=request.user,  # Admin is their own admin
-                    department="Management",
-                    hire_date=timezone.now().date()
-                )
-            else:
-                # For regular employees
-                admin_user = User.objects.filter(is_staff=True).first()
-                if not admin_user:
-                    admin_user = request.user
-                    request.user.is_staff = True
-                    request.user.save()
-                
-                employee = Employee.objects.create(
-                    user=request.user,
-                    admin=admin_user,
-                    department='',
-                    hire_date=timezone.now().date()
-                )
-            
-            context['display_name'] = employee.full_name
-            context['initials'] = ''.join(x[0].upper() for x in employee.full_name.split()) if employee.full_name else employee.user.username[:2].upper()
+        employee = request_employee(request)
+        if employee is None and not request.user.is_staff and not User.objects.filter(is_staff=True).exists():
+            # The first user of a fresh install becomes the administrator
+            request.user.is_staff = True
+            request.user.save()
+        employee = request_employee(request, create=True)
+        context['display_name'] = employee.full_name
+        context['initials'] = ''.join(x[0].upper() for x in employee.full_name.split()) if employee.full_name else employee.user.username[:2].upper()
         
         # Get profile picture information
         try:
@@ -4,9 +4,15 @@ from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 from django.views import View
 from django.http import JsonResponse
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+import calendar
 import json
+from datetime import date, datetime
 from django.shortcuts import render, get_object_or_404, redirect
-from ..models import CalendarSettings, PersonalNote, Employee
+from ..caching import calendar_scope, conditional_response, touch_calendars
+from ..models import CalendarSettings, Employee, Holiday, Note
 
 __all__ = [
     'EmployeeCalendarView',
@@ -26,36 +32,69 @@ class EmployeeCalendarView(LoginRequiredMixin, View):
         return render(request, 'punch/punchcard/empcal.html')
     
     
+def parse_window(params):
+    """
+    (start, end) dates of the calendar window in the query string: either
+    ?month=YYYY-MM or ?from=YYYY-MM-DD&to=YYYY-MM-DD (each bound optional).
+    Without them the whole calendar is read or written.
+    """
+    month = params.get('month')
+    if month:
+        start = datetime.strptime(month, '%Y-%m').date()
+        end = date(start.year, start.month, calendar.monthrange(start.year, start.month)[1])
+        return start, end
+    start = datetime.strptime(params['from'], '%Y-%m-%d').date() if params.get('from') else None
+    end = datetime.strptime(params['to'], '%Y-%m-%d').date() if params.get('to') else None
+    return start, end
+
+
+def calendar_user(request):
+    """The user whose calendar is requested: an admin may pass ?employee_id= of their employee."""
+    employee_id = request.GET.get('employee_id')
+    if employee_id and request.user.is_staff:
+        return Employee.objects.select_related('user').get(id=employee_id, admin=request.user).user
+    return request.user
+
+
 @method_decorator(login_required, name='dispatch')
 class GetCalendarSettingsView(View):
+    """
+    Holidays, notes and weekend days in the window. Responses carry an
+    ETag from the user's calendar version; If-None-Match gets a 304.
+    """
+
     def get(self, request):
         try:
-            # Check if employee_id is provided (for admin users viewing employee calendars)
-            employee_id = request.GET.get('employee_id')
-            
-            if employee_id and request.user.is_staff:
-                # Admin requesting an employee's calendar settings
-                try:
-                    employee = Employee.objects.get(id=employee_id, admin=request.user)
-                    calendar_settings, created = CalendarSettings.objects.get_or_create(user=employee.user)
-                except Employee.DoesNotExist:
-                    return JsonResponse({'success': False, 'message': 'Employee not found or not authorized'}, status=404)
-            else:
-                # User requesting their own calendar settings
-                calendar_settings, created = CalendarSettings.objects.get_or_create(user=request.user)
-                
-            return JsonResponse({
-                'success': True,
-                'holidays': calendar_settings.holidays,
-                'notes': calendar_settings.notes,
-                'weekendDays': calendar_settings.weekend_days
-            })
+            # Admins may view their employees' calendars with ?employee_id=
+            try:
+                user = calendar_user(request)
+            except Employee.DoesNotExist:
+                return JsonResponse({'success': False, 'message': 'Employee not found or not authorized'}, status=404)
+
+            start, end = parse_window(request.GET)
+
+            def build():
+                calendar_settings = CalendarSettings.objects.filter(user=user).first()
+                return JsonResponse({
+                    'success': True,
+                    'holidays': Holiday.objects.filter(user=user).window(start, end).as_dict(),
+                    'notes': Note.objects.filter(user=user, kind=Note.CALENDAR).window(start, end).as_dict(),
+                    'weekendDays': calendar_settings.weekend_days if calendar_settings else []
+                })
+
+            return conditional_response(request, [calendar_scope(user.pk)], build)
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)}, status=400)
         
 
 @method_decorator(login_required, name='dispatch')
 class UpdateCalendarSettingsView(View):
+    """
+    Replaces the holidays and notes in the window (?month= or ?from=&to=,
+    the whole calendar without one) with the posted ones; only the dates
+    that changed are written.
+    """
+
     def post(self, request):
         try:
             data = json.loads(request.body)
@@ -63,25 +102,23 @@ class UpdateCalendarSettingsView(View):
             notes = data.get('notes', {})
             weekend_days = [int(day) for day in data.get('weekendDays', [])]  # Convert to int to ensure proper storage
 
-            # Check if employee_id is provided (for admin users updating employee calendars)
-            employee_id = request.GET.get('employee_id')
-            
-            if employee_id and request.user.is_staff:
-                # Admin updating an employee's calendar settings
-                try:
-                    employee = Employee.objects.get(id=employee_id, admin=request.user)
-                    calendar_settings, created = CalendarSettings.objects.get_or_create(user=employee.user)
-                except Employee.DoesNotExist:
-                    return JsonResponse({'success': False, 'message': 'Employee not found or not authorized'}, status=404)
-            else:
-                # User updating their own calendar settings
-                calendar_settings, created = CalendarSettings.objects.get_or_create(user=request.user)
-                
-            # Update the settings
-            calendar_settings.holidays = holidays
-            calendar_settings.notes = notes
-            calendar_settings.weekend_days = weekend_days
-            calendar_settings.save()
+            # Admins may update their employees' calendars with ?employee_id=
+            try:
+                user = calendar_user(request)
+            except Employee.DoesNotExist:
+                return JsonResponse({'success': False, 'message': 'Employee not found or not authorized'}, status=404)
+
+            start, end = parse_window(request.GET)
+            with transaction.atomic():
+                Holiday.objects.filter(user=user).replace(holidays, start, end, user=user)
+                Note.objects.filter(user=user, kind=Note.CALENDAR).replace(notes, start, end, user=user, kind=Note.CALENDAR)
+                calendar_settings = CalendarSettings.objects.filter(user=user).first()
+                if calendar_settings is None:
+                    CalendarSettings.objects.create(user=user, weekend_days=weekend_days)
+                elif calendar_settings.weekend_days != weekend_days:
+                    CalendarSettings.objects.filter(user=user).update(weekend_days=weekend_days)
+                if calendar_settings is None or calendar_settings.weekend_days != weekend_days:
+                    touch_calendars([user.pk])
 
             return JsonResponse({'success': True, 'message': 'Calendar settings updated successfully.'})
         except Exception as e:
@@ -89,38 +126,36 @@ class UpdateCalendarSettingsView(View):
         
         
 class GetPersonalNotesView(LoginRequiredMixin, View):
+    """Personal notes in the window, with an ETag like GetCalendarSettingsView."""
+
     def get(self, request):
         try:
-            # Check if employee_id is provided (for admin users viewing employee calendars)
-            employee_id = request.GET.get('employee_id')
-            
-            if employee_id and request.user.is_staff:
-                # Admin requesting an employee's personal notes
-                try:
-                    employee = Employee.objects.get(id=employee_id, admin=request.user)
-                    personal_notes, created = PersonalNote.objects.get_or_create(user=employee.user)
-                except Employee.DoesNotExist:
-                    return JsonResponse({'success': False, 'message': 'Employee not found or not authorized'}, status=404)
-            else:
-                # User requesting their own personal notes
-                personal_notes, created = PersonalNote.objects.get_or_create(user=request.user)
-                
-            return JsonResponse({
+            # Admins may view their employees' personal notes with ?employee_id=
+            try:
+                user = calendar_user(request)
+            except Employee.DoesNotExist:
+                return JsonResponse({'success': False, 'message': 'Employee not found or not authorized'}, status=404)
+
+            start, end = parse_window(request.GET)
+            return conditional_response(request, [calendar_scope(user.pk)], lambda: JsonResponse({
                 'success': True,
-                'notes': personal_notes.notes
-            })
+                'notes': Note.objects.filter(user=user, kind=Note.PERSONAL).window(start, end).as_dict()
+            }))
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)}, status=400)
 
 class UpdatePersonalNotesView(LoginRequiredMixin, View):
+    """Replaces the personal notes in the window, like UpdateCalendarSettingsView."""
+
     def post(self, request):
         try:
             data = json.loads(request.body)
             notes = data.get('notes', {})
             
-            personal_notes, created = PersonalNote.objects.get_or_create(user=request.user)
-            personal_notes.notes = notes
-            personal_notes.save()
+            start, end = parse_window(request.GET)
+            Note.objects.filter(user=request.user, kind=Note.PERSONAL).replace(
+                notes, start, end, user=request.user, kind=Note.PERSONAL
+            )
 
             return JsonResponse({'success': True, 'message': 'Personal notes updated successfully.'})
         except Exception as e:
@@ -129,34 +164,22 @@ class UpdatePersonalNotesView(LoginRequiredMixin, View):
 class DeletePersonalNoteView(LoginRequiredMixin, View):
     def post(self, request):
         try:
-            employee_id = request.GET.get('employee_id')
             date = request.GET.get('date')
             
             if not date:
                 return JsonResponse({'success': False, 'message': 'Date parameter is required'}, status=400)
             
-            if employee_id and request.user.is_staff:
-                # Admin deleting an employee's note
-                try:
-                    employee = Employee.objects.get(id=employee_id, admin=request.user)
-                    personal_notes = PersonalNote.objects.get(user=employee.user)
-                except Employee.DoesNotExist:
-                    return JsonResponse({'success': False, 'message': 'Employee not found or not authorized'}, status=404)
-                except PersonalNote.DoesNotExist:
-                    return JsonResponse({'success': False, 'message': 'No notes found'}, status=404)
-            else:
-                # User deleting their own note
-                try:
-                    personal_notes = PersonalNote.objects.get(user=request.user)
-                except PersonalNote.DoesNotExist:
-                    return JsonResponse({'success': False, 'message': 'No notes found'}, status=404)
+            # Admins may delete their employees' notes with ?employee_id=
+            try:
+                user = calendar_user(request)
+            except Employee.DoesNotExist:
+                return JsonResponse({'success': False, 'message': 'Employee not found or not authorized'}, status=404)
             
             # Remove the note for the specific date
-            notes = personal_notes.notes
-            if date in notes:
-                del notes[date]
-                personal_notes.notes = notes
-                personal_notes.save()
+            deleted, _ = Note.objects.filter(user=user, kind=Note.PERSONAL,
+                                             date=datetime.strptime(date, '%Y-%m-%d').date()).delete()
+            if deleted:
+                touch_calendars([user.pk])
                 
             return JsonResponse({
                 'success': True,
@@ -175,13 +198,13 @@ class RemoveHolidayView(View):
             if not holiday_to_remove:
                 return JsonResponse({'success': False, 'message': 'No holiday specified to remove.'}, status=400)
 
-            calendar_settings, _ = CalendarSettings.objects.get_or_create(user=request.user)
-            holidays = calendar_settings.holidays
+            deleted, _ = Holiday.objects.filter(
+                user=request.user,
+                date=datetime.strptime(holiday_to_remove, '%Y-%m-%d').date()
+            ).delete()
 
-            if holiday_to_remove in holidays:
-                holidays.pop(holiday_to_remove)
-                calendar_settings.holidays = holidays
-                calendar_settings.save()
+            if deleted:
+                touch_calendars([request.user.pk])
                 return JsonResponse({'success': True, 'message': 'Holiday removed successfully.'})
             else:
                 return JsonResponse({'success': False, 'message': 'Holiday not found.'}, status=404)
@@ -204,25 +227,18 @@ class UpdateGlobalHolidayView(View):
             if not date or not reason:
                 return JsonResponse({'success': False, 'message': 'Date and reason are required'}, status=400)
             
-            # Get all employees managed by this admin
-            employees = Employee.objects.filter(admin=request.user).select_related('user')
-            
-            # Add the holiday to the admin's calendar
-            admin_settings, _ = CalendarSettings.objects.get_or_create(user=request.user)
-            admin_settings.holidays = admin_settings.holidays or {}
-            admin_settings.holidays[date] = reason
-            admin_settings.save()
-            
-            # Add the holiday to each employee's calendar
-            for employee in employees:
-                emp_settings, _ = CalendarSettings.objects.get_or_create(user=employee.user)
-                emp_settings.holidays = emp_settings.holidays or {}
-                emp_settings.holidays[date] = reason
-                emp_settings.save()
+            # Add the holiday to the admin's calendar and every managed employee's, in bulk
+            holiday_date = datetime.strptime(date, '%Y-%m-%d').date()
+            employee_count = Employee.objects.filter(admin=request.user).count()
+            Holiday.add_to_calendars(
+                User.objects.filter(Q(pk=request.user.pk) | Q(employee__admin=request.user)),
+                holiday_date,
+                reason
+            )
             
             return JsonResponse({
                 'success': True,
-                'message': f'Holiday added to {len(employees)} employee calendars'
+                'message': f'Holiday added to {employee_count} employee calendars'
             })
             
         except Exception as e:
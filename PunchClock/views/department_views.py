@@ -4,6 +4,8 @@ from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 from django.views import View
 from django.http import JsonResponse
+from django.db.models import Count, Q
+from ..caching import DEPARTMENTS_SCOPE, cached_response
 from ..models import Department, Employee
 import json
 from django.contrib.auth.models import User
@@ -15,9 +17,21 @@ __all__ = [
     'DepartmentEmployeesView',
 ]
 
+
+def with_employee_count(departments, admin=None):
+    """Annotate employee_count, counting only the admin's employees when one is given."""
+    return departments.annotate(
+        employee_count=Count('employee', filter=Q(employee__admin=admin) if admin else None)
+    )
+
+
 @method_decorator(login_required, name='dispatch')
 class DepartmentListView(View):
-    """View to list all departments"""
+    """
+    View to list all departments with their employee counts; ?scope=mine
+    counts only the requesting admin's employees. Cached until a
+    department or employee changes.
+    """
     def get(self, request):
         try:
             if not request.user.is_staff:
@@ -26,23 +40,24 @@ class DepartmentListView(View):
                     'message': 'Only administrators can view departments'
                 }, status=403)
             
-            departments = Department.objects.all()
-            
-            # Get employee count for each department
-            department_data = []
-            for dept in departments:
-                employee_count = Employee.objects.filter(department=dept).count()
-                department_data.append({
-                    'id': dept.id,
-                    'name': dept.name,
-                    'description': dept.description or '',
-                    'employee_count': employee_count
+            admin = request.user if request.GET.get('scope') == 'mine' else None
+
+            def build():
+                departments = with_employee_count(Department.objects.all(), admin)
+                return JsonResponse({
+                    'success': True,
+                    'departments': [
+                        {
+                            'id': dept.id,
+                            'name': dept.name,
+                            'description': dept.description or '',
+                            'employee_count': dept.employee_count
+                        }
+                        for dept in departments
+                    ]
                 })
-            
-            return JsonResponse({
-                'success': True,
-                'departments': department_data
-            })
+
+            return cached_response(request, [DEPARTMENTS_SCOPE], build)
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)}, status=400)
 
@@ -135,7 +150,7 @@ class DepartmentUpdateView(View):
                 }, status=403)
             
             try:
-                department = Department.objects.get(id=department_id)
+                department = with_employee_count(Department.objects.all()).get(id=department_id)
             except Department.DoesNotExist:
                 return JsonResponse({
                     'success': False,
@@ -160,15 +175,13 @@ class DepartmentUpdateView(View):
             
             department.save()
             
-            employee_count = Employee.objects.filter(department=department).count()
-            
             return JsonResponse({
                 'success': True,
                 'department': {
                     'id': department.id,
                     'name': department.name,
                     'description': department.description or '',
-                    'employee_count': employee_count
+                    'employee_count': department.employee_count
                 }
             })
         except Exception as e:
@@ -187,7 +200,7 @@ class DepartmentDeleteView(View):
                 }, status=403)
             
             try:
-                department = Department.objects.get(id=department_id)
+                department = with_employee_count(Department.objects.all()).get(id=department_id)
             except Department.DoesNotExist:
                 return JsonResponse({
                     'success': False,
@@ -195,7 +208,7 @@ class DepartmentDeleteView(View):
                 }, status=404)
             
             # Check if there are employees in this department
-            employee_count = Employee.objects.filter(department=department).count()
+            employee_count = department.employee_count
             if employee_count > 0:
                 return JsonResponse({
                     'success': False,
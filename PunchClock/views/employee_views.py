@@ -11,7 +11,6 @@ import base64
 import time
 from django.contrib.auth.models import User
 from ..models import TimeEntry, Employee, ProfilePicture, Department
-from PIL import Image
 from django.shortcuts import render
 from django.core.files.base import ContentFile
 
@@ -82,6 +81,7 @@ class AddEmployeeView(View):
                     data = base64.b64decode(imgstr)
                     
                     # Open the image using PIL
+                    from PIL import Image
                     img = Image.open(io.BytesIO(data))
                     
                     # Resize to 256x256
@@ -0,0 +1,58 @@
+"""Live dashboard event views."""
+from django.views import View
+from django.http import JsonResponse, StreamingHttpResponse
+import json
+from ..events import get_broker
+
+__all__ = [
+    'DashboardEventsView',
+]
+
+# Comment line sent when idle so proxies and clients keep the connection open
+KEEPALIVE_SECONDS = 15
+# Streams end after this long and the browser reconnects, so workers can be recycled
+STREAM_LIFETIME_SECONDS = 30 * 60
+
+
+async def dashboard_event_stream(subscription):
+    elapsed = 0
+    try:
+        yield 'retry: 5000\n\n'
+        while elapsed < STREAM_LIFETIME_SECONDS:
+            event = await subscription.get(timeout=KEEPALIVE_SECONDS)
+            if event is None:
+                elapsed += KEEPALIVE_SECONDS
+                yield ': keep-alive\n\n'
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        subscription.close()
+
+
+class DashboardEventsView(View):
+    """
+    Server-Sent Events stream of punch, approval, clear and undo events for
+    the employees of the logged in admin. Needs an ASGI server: a WSGI
+    worker would have to hold a thread for every open dashboard.
+    """
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated or not user.is_staff:
+            return JsonResponse({
+                'success': False,
+                'message': 'Only administrators can subscribe to dashboard events'
+            }, status=403)
+
+        if 'wsgi.input' in request.META:
+            return JsonResponse({
+                'success': False,
+                'message': 'Live dashboard events require the ASGI server'
+            }, status=503)
+
+        subscription = get_broker().subscribe(user.id)
+        response = StreamingHttpResponse(dashboard_event_stream(subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keep reverse proxies from buffering events
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -3,24 +3,28 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 from django.views import View
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, FileResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib import messages
-from ..models import TimeEntry, Employee, Department
-from datetime import datetime, timedelta
-import json, os
-from django.conf import settings
 from django.utils import timezone
-import pdfkit
+import os
 import traceback
-from ..models import TimeEntry, Employee, Department, Export
-import pandas as pd
-import csv
+from ..models import Export, ExportJob
+from ..exports import (
+    EXPORT_FIELDS, EXPORT_FORMATS, STREAM_FORMATS, ExportError,
+    build_export_data, export_cache_key, export_file_path, find_cached_export,
+    aiter_batches, iter_time_entry_rows, parse_export_params, resolve_employees, stream_time_entries
+)
 
 __all__ = [
     'ExportReportsView',
     'ExportPreviewView',
     'ExportGenerateView',
+    'ExportStreamView',
+    'ExportJobStatusView',
+    'ExportJobDownloadView',
     'ExportRecentView',
     'ExportDeleteView',
 ]
@@ -49,190 +53,17 @@ class ExportPreviewView(View):
                     'message': 'Only administrators can preview exports'
                 }, status=403)
 
-            # Get form data
-            format = request.POST.get('format')
-            group_by = request.POST.get('group_by')
-            start_date = request.POST.get('start_date')
-            end_date = request.POST.get('end_date')
-            include_hours = request.POST.get('include_hours') == 'on'
-            include_productivity = request.POST.get('include_productivity') == 'on'
-            include_attendance = request.POST.get('include_attendance') == 'on'
-            filter_type = request.POST.get('filter_type')
-            department_id = request.POST.get('department')
-            employee_id = request.POST.get('employee')
-            export_all = request.POST.get('export_all_employees') == 'on'
-            selected_employee_ids = request.POST.get('selected_employee_ids', '')
-
-            # Validate dates
+            # Validate form data
             try:
-                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            except (ValueError, TypeError):
+                params = parse_export_params(request.POST)
+            except ExportError as e:
                 return JsonResponse({
                     'success': False,
-                    'message': 'Invalid date format'
+                    'message': str(e)
                 }, status=400)
 
-            if end_date < start_date:
-                return JsonResponse({
-                    'success': False,
-                    'message': 'End date must be after start date'
-                }, status=400)
-
-            # Get admin's own employee record
-            admin_employee = None
-            try:
-                admin_employee = Employee.objects.get(user=request.user)
-            except Employee.DoesNotExist:
-                department = Department.objects.get_or_create(name="Management")[0]
-                admin_employee = Employee.objects.create(
-                    user=request.user,
-                    admin=request.user,
-                    department=department,
-                    hire_date=timezone.now().date()
-                )
-
-            # Handle employee selection based on export type
-            if export_all:
-                # Get all employees managed by this admin
-                employees = list(Employee.objects.filter(admin=request.user))
-                if admin_employee not in employees:
-                    employees.append(admin_employee)
-            else:
-                # Get only selected employees
-                if not selected_employee_ids.strip():
-                    return JsonResponse({
-                        'success': False,
-                        'message': 'Please select at least one employee or check "Export All Employees"'
-                    }, status=400)
-                
-                employee_ids = [int(id) for id in selected_employee_ids.split(',') if id.strip()]
-                employees = list(Employee.objects.filter(id__in=employee_ids))
-
-            # Get time entries for the selected employees
-            entries = TimeEntry.objects.filter(
-                date__range=[start_date, end_date],
-                employee__in=employees
-            ).select_related('employee', 'employee__department', 'employee__user')
-
-            # Apply additional filters
-            if filter_type == 'department' and department_id:
-                entries = entries.filter(employee__department_id=department_id)
-                employees = employees.filter(department_id=department_id)
-            elif filter_type == 'employee' and employee_id:
-                entries = entries.filter(employee_id=employee_id)
-                employees = employees.filter(id=employee_id)
-
-            # Group data
-            data = []
-            if group_by == 'employee':                
-                for emp in employees:
-                    emp_entries = entries.filter(employee=emp)
-                    total_hours = 0
-                    attendance_rate = 0
-                    
-                    if emp_entries.exists():
-                        total_hours = sum(float(entry.total_hours or 0) for entry in emp_entries)
-                        entry_count = emp_entries.count()
-                        if entry_count > 0:
-                            approved_count = emp_entries.filter(status='approved').count()
-                            attendance_rate = (approved_count / entry_count) * 100
-                    
-                    role = 'Manager' if emp.user.is_staff else 'Employee'
-                    status = 'Active' if emp_entries.exists() else 'Inactive'
-                    
-                    # Build data object based on included fields
-                    row_data = {
-                        'employee': emp.full_name,
-                        'role': role,
-                        'department': emp.department.name if emp.department else 'N/A',
-                        'status': status
-                    }
-                    if include_hours:
-                        row_data['total_hours'] = round(total_hours, 2)
-                    if include_attendance:
-                        row_data['attendance_rate'] = round(attendance_rate, 1)
-                    if include_productivity:
-                        # Calculate average hours per day in the date range
-                        days_in_range = (end_date - start_date).days + 1
-                        row_data['productivity'] = round(total_hours / days_in_range, 2) if total_hours > 0 else 0
-                    
-                    data.append(row_data)
-
-            elif group_by == 'department':
-                departments = Department.objects.filter(
-                    id__in=entries.values_list('employee__department_id', flat=True)
-                ).distinct()
-                for dept in departments:
-                    dept_entries = entries.filter(employee__department=dept)
-                    total_hours = 0
-                    avg_hours = 0
-                    employee_count = dept_entries.values('employee').distinct().count()
-                    
-                    if dept_entries.exists():
-                        total_hours = sum(float(entry.total_hours or 0) for entry in dept_entries)
-                        if employee_count > 0:
-                            avg_hours = total_hours / employee_count
-                    
-                    # Build data object based on included fields
-                    row_data = {
-                        'department': dept.name,
-                        'employee_count': employee_count
-                    }
-                    if include_hours:
-                        row_data['total_hours'] = round(total_hours, 2)
-                        row_data['average_hours'] = round(avg_hours, 2)
-                    if include_productivity:
-                        days_in_range = (end_date - start_date).days + 1
-                        row_data['department_productivity'] = round(total_hours / (days_in_range * employee_count), 2) if total_hours > 0 and employee_count > 0 else 0
-                    
-                    data.append(row_data)
-
-            else:  # group by day/week/month
-                date_groups = {}
-                for entry in entries:
-                    if group_by == 'week':
-                        key = entry.date - timedelta(days=entry.date.weekday())
-                    elif group_by == 'month':
-                        key = entry.date.replace(day=1)
-                    else:  # day
-                        key = entry.date
-
-                    if key not in date_groups:
-                        date_groups[key] = {
-                            'total_hours': 0,
-                            'entry_count': 0,
-                            'approved_count': 0
-                        }
-                    
-                    date_groups[key]['total_hours'] += float(entry.total_hours)
-                    date_groups[key]['entry_count'] += 1
-                    if entry.status == 'approved':
-                        date_groups[key]['approved_count'] += 1
-
-                for date_key, stats in date_groups.items():
-                    # Build data object based on included fields
-                    row_data = {
-                        'period': date_key.strftime('%Y-%m-%d')
-                    }
-                    if include_hours:
-                        row_data['total_hours'] = round(stats['total_hours'], 2)
-                    if include_attendance:
-                        row_data['total_entries'] = stats['entry_count']
-                        row_data['approval_rate'] = round(stats['approved_count'] / stats['entry_count'] * 100, 1) if stats['entry_count'] > 0 else 0
-                    if include_productivity:
-                        active_employees = entries.filter(date=date_key).values('employee').distinct().count()
-                        row_data['productivity'] = round(stats['total_hours'] / active_employees, 2) if active_employees > 0 else 0
-                    
-                    data.append(row_data)
-
-            # Sort data by the most relevant field based on group_by
-            if group_by == 'employee':
-                data.sort(key=lambda x: x['employee'])
-            elif group_by == 'department':
-                data.sort(key=lambda x: x['department'])
-            else:  # day/week/month
-                data.sort(key=lambda x: x['period'])
+            # Group data in a single pass over the daily rollups
+            data = build_export_data(request.user, params)
 
             total_rows = len(data)
             preview_rows = data[:10]  # Get first 10 rows for preview
@@ -255,6 +86,8 @@ class ExportPreviewView(View):
 
 @method_decorator(login_required, name='dispatch')
 class ExportGenerateView(View):
+    """Queue an export for the run_export_worker command and return the job id."""
+
     def post(self, request):
         try:
             if not request.user.is_staff:
@@ -263,337 +96,55 @@ class ExportGenerateView(View):
                     'message': 'Only administrators can generate exports'
                 }, status=403)
 
-            # Get form data
-            format = request.POST.get('format')
-            group_by = request.POST.get('group_by')
-            start_date = request.POST.get('start_date')
-            end_date = request.POST.get('end_date')
-            include_hours = request.POST.get('include_hours') == 'on'
-            include_productivity = request.POST.get('include_productivity') == 'on'
-            include_attendance = request.POST.get('include_attendance') == 'on'
-            filter_type = request.POST.get('filter_type')
-            department_id = request.POST.get('department')
-            employee_id = request.POST.get('employee')
-            export_all = request.POST.get('export_all_employees') == 'on'
-            selected_employee_ids = request.POST.get('selected_employee_ids', '')
-
-            # Validate dates
+            # Validate up front so bad requests fail immediately instead of in the worker
             try:
-                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            except (ValueError, TypeError):
+                params = parse_export_params(request.POST)
+            except ExportError as e:
                 return JsonResponse({
                     'success': False,
-                    'message': 'Invalid date format'
+                    'message': str(e)
                 }, status=400)
 
-            if end_date < start_date:
+            if params['format'] not in EXPORT_FORMATS:
                 return JsonResponse({
                     'success': False,
-                    'message': 'End date must be after start date'
+                    'message': 'Invalid export format selected'
                 }, status=400)
 
-            # Get admin's own employee record
-            admin_employee = None
-            try:
-                admin_employee = Employee.objects.get(user=request.user)
-            except Employee.DoesNotExist:
-                department = Department.objects.get_or_create(name="Management")[0]
-                admin_employee = Employee.objects.create(
-                    user=request.user,
-                    admin=request.user,
-                    department=department,
-                    hire_date=timezone.now().date()
-                )
+            job_params = {field: request.POST.get(field) for field in EXPORT_FIELDS}
 
-            # Handle employee selection based on export type
-            if export_all:
-                # Get all employees managed by this admin
-                employees = list(Employee.objects.filter(admin=request.user))
-                if admin_employee not in employees:
-                    employees.append(admin_employee)
-            else:
-                # Get only selected employees
-                if not selected_employee_ids.strip():
-                    return JsonResponse({
-                        'success': False,
-                        'message': 'Please select at least one employee or check "Export All Employees"'
-                    }, status=400)
-                
-                employee_ids = [int(id) for id in selected_employee_ids.split(',') if id.strip()]
-                employees = list(Employee.objects.filter(id__in=employee_ids))
-
-            # Get time entries for the selected employees
-            entries = TimeEntry.objects.filter(
-                date__range=[start_date, end_date],
-                employee__in=employees
-            ).select_related('employee', 'employee__department', 'employee__user')
-
-            # Apply additional filters if needed
-            if filter_type == 'department' and department_id:
-                entries = entries.filter(employee__department_id=department_id)
-            elif filter_type == 'employee' and employee_id:
-                entries = entries.filter(employee_id=employee_id)            # employees list is already set above to include both managed employees and admin            # Group data if needed
-            data = []
-            if group_by == 'employee':
-                for emp in employees:
-                    emp_entries = entries.filter(employee=emp)
-                    total_hours = 0
-                    attendance_rate = 0
-                    
-                    if emp_entries.exists():
-                        total_hours = sum(float(entry.total_hours or 0) for entry in emp_entries)
-                        entry_count = emp_entries.count()
-                        if entry_count > 0:
-                            approved_count = emp_entries.filter(status='approved').count()
-                            attendance_rate = (approved_count / entry_count) * 100
-                    
-                    role = 'Manager' if emp.user.is_staff else 'Employee'
-                    status = 'Active' if emp_entries.exists() else 'Inactive'
-                    
-                    # Build data object based on included fields
-                    row_data = {
-                        'employee': emp.full_name,
-                        'role': role,
-                        'department': emp.department.name if emp.department else 'N/A',
-                        'status': status
-                    }
-                    if include_hours:
-                        row_data['total_hours'] = round(total_hours, 2)
-                    if include_attendance:
-                        row_data['attendance_rate'] = round(attendance_rate, 1)
-                    if include_productivity:
-                        # Calculate average hours per day in the date range
-                        days_in_range = (end_date - start_date).days + 1
-                        row_data['productivity'] = round(total_hours / days_in_range, 2) if total_hours > 0 else 0
-                    
-                    data.append(row_data)
-            elif group_by == 'department':
-                departments = Department.objects.filter(
-                    id__in=entries.values_list('employee__department_id', flat=True)
-                ).distinct()
-                for dept in departments:
-                        dept_entries = entries.filter(employee__department=dept)
-                        total_hours = 0
-                        avg_hours = 0
-                        employee_count = dept_entries.values('employee').distinct().count()
-                        
-                        if dept_entries.exists():
-                            total_hours = sum(float(entry.total_hours or 0) for entry in dept_entries)
-                            if employee_count > 0:
-                                avg_hours = total_hours / employee_count
-                        
-                        # Build data object based on included fields
-                        row_data = {
-                            'department': dept.name,
-                            'employee_count': employee_count
-                        }
-                        if include_hours:
-                            row_data['total_hours'] = round(total_hours, 2)
-                            row_data['average_hours'] = round(avg_hours, 2)
-                        if include_productivity:
-                            days_in_range = (end_date - start_date).days + 1
-                            row_data['department_productivity'] = round(total_hours / (days_in_range * employee_count), 2) if total_hours > 0 and employee_count > 0 else 0
-                        
-                        data.append(row_data)
-            else:  # group by day/week/month
-                date_groups = {}
-                for entry in entries:
-                    if group_by == 'week':
-                        key = entry.date - timedelta(days=entry.date.weekday())
-                    elif group_by == 'month':
-                        key = entry.date.replace(day=1)
-                    else:  # day
-                        key = entry.date
-
-                    if key not in date_groups:
-                        date_groups[key] = {
-                            'total_hours': 0,
-                            'entry_count': 0,
-                            'approved_count': 0
-                        }
-                    
-                    date_groups[key]['total_hours'] += float(entry.total_hours)
-                    date_groups[key]['entry_count'] += 1
-                    if entry.status == 'approved':
-                        date_groups[key]['approved_count'] += 1
-
-                for date_key, stats in date_groups.items():
-                    # Build data object based on included fields
-                    row_data = {
-                        'period': date_key.strftime('%Y-%m-%d')
-                    }
-                    if include_hours:
-                        row_data['total_hours'] = round(stats['total_hours'], 2)
-                    if include_attendance:
-                        row_data['total_entries'] = stats['entry_count']
-                        row_data['approval_rate'] = round(stats['approved_count'] / stats['entry_count'] * 100, 1) if stats['entry_count'] > 0 else 0
-                    if include_productivity:
-                        active_employees = entries.filter(date=date_key).values('employee').distinct().count()
-                        row_data['productivity'] = round(stats['total_hours'] / active_employees, 2) if active_employees > 0 else 0
-                    
-                    data.append(row_data)
-
-            if not data:
-                return JsonResponse({
-                    'success': False,
-                    'message': 'No data available for the selected criteria'
-                }, status=400)
-
-            # Ensure media directories exist
-            export_dir = os.path.join(settings.MEDIA_ROOT, 'exports')
-            os.makedirs(export_dir, exist_ok=True)
-            
-            # Generate unique filename
-            timestamp = timezone.now().strftime("%Y%m%d_%H%M%S")
-            filename = f'export_{timestamp}'
-            file_ext = None
-            file_path = None
-            
-            try:
-                if format == 'pdf':
-                    file_ext = '.pdf'
-                    file_path = os.path.join(export_dir, f'{filename}{file_ext}')
-                    
-                    # Create HTML content
-                    html = '''
-                    <html>
-                        <head>
-                            <meta charset="UTF-8">
-                            <style>
-                                body { font-family: Arial, sans-serif; }
-                                table { 
-                                    border-collapse: collapse; 
-                                    width: 100%; 
-                                    margin-bottom: 1em;
-                                }
-                                th, td { 
-                                    border: 1px solid #ddd; 
-                                    padding: 8px; 
-                                    text-align: left; 
-                                }
-                                th { 
-                                    background-color: #f2f2f2;
-                                    font-weight: bold;
-                                }
-                                tr:nth-child(even) { background-color: #f9f9f9; }
-                            </style>
-                        </head>
-                        <body>
-                            <h1>Export Report</h1>
-                            <table>
-                                <thead>
-                                    <tr>
-                    '''
-                    
-                    # Add table headers and data
-                    for key in data[0].keys():
-                        formatted_key = key.replace('_', ' ').title()
-                        html += f'<th>{formatted_key}</th>'
-                    
-                    html += '''
-                                    </tr>
-                                </thead>
-                                <tbody>
-                    '''
-                    
-                    for row in data:
-                        html += '<tr>'
-                        for value in row.values():
-                            html += f'<td>{value}</td>'
-                        html += '</tr>'
-                    
-                    html += '''
-                                </tbody>
-                            </table>
-                        </body>
-                    </html>
-                    '''
-                    
-                    # Save HTML to a temporary file
-                    temp_html = os.path.join(export_dir, f'{filename}_temp.html')
-                    with open(temp_html, 'w', encoding='utf-8') as f:
-                        f.write(html)
-                    
-                    try:                        # Use the wkhtmltopdf-xvfb wrapper script that's configured in the Docker container
-                        config = pdfkit.configuration(wkhtmltopdf='/usr/local/bin/wkhtmltopdf-xvfb')
-                        options = {
-                            'quiet': '',
-                            'enable-local-file-access': None,
-                            'encoding': 'UTF-8'
-                        }
-                        pdfkit.from_file(temp_html, file_path, configuration=config, options=options)
-                    except Exception as pdf_error:
-                        if os.path.exists(temp_html):
-                            os.remove(temp_html)
-                        raise pdf_error
-                    finally:
-                        # Clean up temporary HTML file
-                        if os.path.exists(temp_html):
-                            os.remove(temp_html)
-                
-                elif format == 'csv':
-                    file_ext = '.csv'
-                    file_path = os.path.join(export_dir, f'{filename}{file_ext}')
-                    with open(file_path, 'w', newline='') as csvfile:
-                        writer = csv.DictWriter(csvfile, fieldnames=data[0].keys())
-                        writer.writeheader()
-                        writer.writerows(data)
-                    
-                elif format == 'json':
-                    file_ext = '.json'
-                    file_path = os.path.join(export_dir, f'{filename}{file_ext}')
-                    with open(file_path, 'w') as jsonfile:
-                        json.dump(data, jsonfile)
-                    
-                elif format == 'excel':
-                    file_ext = '.xlsx'
-                    file_path = os.path.join(export_dir, f'{filename}{file_ext}')
-                    df = pd.DataFrame(data)
-                    df.to_excel(file_path, index=False)
-
-                else:
-                    return JsonResponse({
-                        'success': False,
-                        'message': 'Invalid export format selected'
-                    }, status=400)
-
-                # Check if file was created successfully
-                if not os.path.exists(file_path):
-                    raise IOError(f"Failed to create export file: {file_path}")
-
-                # Construct the URL using the MEDIA_URL setting
-                file_url = f'{settings.MEDIA_URL.rstrip("/")}/exports/{filename}{file_ext}'
-
-                # Create export record
-                export = Export.objects.create(
+            # The same export over unchanged data is served from the existing file
+            employees = resolve_employees(request.user, params)
+            cached = find_cached_export(request.user, export_cache_key(request.user, params, employees))
+            if cached is not None:
+                now = timezone.now()
+                job = ExportJob.objects.create(
                     admin=request.user,
-                    format=format,
-                    report_type=group_by,
-                    start_date=start_date,
-                    end_date=end_date,
-                    file_url=file_url
+                    params=job_params,
+                    status='done',
+                    progress=100,
+                    export=cached,
+                    started_at=now,
+                    finished_at=now
                 )
-
                 return JsonResponse({
                     'success': True,
-                    'message': 'Export generated successfully',
-                    'file_url': request.build_absolute_uri(file_url)
+                    'message': 'Export ready',
+                    'cached': True,
+                    'job': export_job_data(request, job)
                 })
 
-            except IOError as e:
-                # Handle file operation errors
-                return JsonResponse({
-                    'success': False,
-                    'message': f'Error writing file: {str(e)}'
-                }, status=500)
-                
-            except Exception as e:
-                # Handle other errors in export generation
-                return JsonResponse({
-                    'success': False,
-                    'message': f'Error generating export: {str(e)}'
-                }, status=500)
+            job = ExportJob.objects.create(
+                admin=request.user,
+                params=job_params
+            )
+
+            return JsonResponse({
+                'success': True,
+                'message': 'Export queued',
+                'cached': False,
+                'job': export_job_data(request, job)
+            }, status=202)
 
         except Exception as e:
             # Handle any other errors
@@ -605,6 +156,128 @@ class ExportGenerateView(View):
             }, status=400)
 
 
+@method_decorator(login_required, name='dispatch')
+class ExportStreamView(View):
+    """
+    Stream raw time entries as CSV or JSON lines.
+
+    Rows are encoded as they come off the database cursor, so memory stays
+    flat however large the range is and the download starts immediately.
+    Under ASGI the body is an async iterator sending one chunk of rows at a
+    time. Takes the same query parameters as the export form.
+    """
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return JsonResponse({
+                'success': False,
+                'message': 'Only administrators can generate exports'
+            }, status=403)
+
+        try:
+            params = parse_export_params(request.GET)
+        except ExportError as e:
+            return JsonResponse({
+                'success': False,
+                'message': str(e)
+            }, status=400)
+
+        if params['format'] not in STREAM_FORMATS:
+            return JsonResponse({
+                'success': False,
+                'message': 'Invalid export format selected'
+            }, status=400)
+
+        try:
+            chunk_size = int(request.GET.get('chunk_size', 2000))
+        except ValueError:
+            chunk_size = 2000
+
+        chunk_size = max(1, min(chunk_size, 10000))
+        content_type, file_ext = STREAM_FORMATS[params['format']]
+        rows = iter_time_entry_rows(
+            resolve_employees(request.user, params),
+            params['start_date'],
+            params['end_date'],
+            chunk_size=chunk_size
+        )
+        content = stream_time_entries(rows, params['format'])
+        if isinstance(request, ASGIRequest):
+            content = aiter_batches(content, chunk_size)
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        filename = f'time_entries_{timezone.now().strftime("%Y%m%d_%H%M%S")}{file_ext}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        # Keep reverse proxies from buffering the whole body before sending it
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+def export_job_data(request, job):
+    data = {
+        'id': job.id,
+        'status': job.status,
+        'progress': job.progress,
+        'error': job.error,
+        'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'status_url': reverse('PunchClock:export_job_status', args=[job.id]),
+        'file_url': None,
+        'download_url': None
+    }
+    if job.status == 'done' and job.export:
+        data['file_url'] = request.build_absolute_uri(job.export.file_url)
+        data['download_url'] = reverse('PunchClock:export_job_download', args=[job.id])
+    return data
+
+
+@method_decorator(login_required, name='dispatch')
+class ExportJobStatusView(View):
+    """Report the state and progress of a queued export."""
+
+    def get(self, request, job_id):
+        try:
+            job = ExportJob.objects.select_related('export').get(id=job_id, admin=request.user)
+        except ExportJob.DoesNotExist:
+            return JsonResponse({
+                'success': False,
+                'message': 'Export job not found'
+            }, status=404)
+
+        return JsonResponse({
+            'success': True,
+            'job': export_job_data(request, job)
+        })
+
+
+@method_decorator(login_required, name='dispatch')
+class ExportJobDownloadView(View):
+    """Serve the file produced by a finished export job."""
+
+    def get(self, request, job_id):
+        try:
+            job = ExportJob.objects.select_related('export').get(id=job_id, admin=request.user)
+        except ExportJob.DoesNotExist:
+            return JsonResponse({
+                'success': False,
+                'message': 'Export job not found'
+            }, status=404)
+
+        if job.status != 'done' or not job.export:
+            return JsonResponse({
+                'success': False,
+                'message': f'Export is not ready (status: {job.status})'
+            }, status=409)
+
+        file_path = export_file_path(job.export)
+        if not os.path.exists(file_path):
+            return JsonResponse({
+                'success': False,
+                'message': 'Export file no longer exists'
+            }, status=410)
+
+        return FileResponse(open(file_path, 'rb'), as_attachment=True, filename=os.path.basename(file_path))
+
+
 class ExportRecentView(View):
     def get(self, request):
         try:
@@ -657,7 +330,7 @@ class ExportDeleteView(View):
                 }, status=404)
 
             # Delete the actual file
-            file_path = os.path.join(settings.MEDIA_ROOT, export.file_url.lstrip('/'))
+            file_path = export_file_path(export)
             if os.path.exists(file_path):
                 os.remove(file_path)
 
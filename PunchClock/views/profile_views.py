@@ -6,7 +6,6 @@ from django.views import View
 from django.http import JsonResponse
 from ..models import ProfilePicture, Employee
 import json, base64, io
-from PIL import Image
 from django.core.files.base import ContentFile
 import time
 import os
@@ -42,6 +41,7 @@ class ProfilePictureView(View):
             data = base64.b64decode(imgstr)
             
             # Open the image using PIL
+            from PIL import Image
             img = Image.open(io.BytesIO(data))
             
             # Crop to square (take the smaller dimension)
@@ -199,6 +199,7 @@ class EmployeeProfilePictureView(UserPassesTestMixin, View):
             data = base64.b64decode(imgstr)
             
             # Open the image using PIL
+            from PIL import Image
             img = Image.open(io.BytesIO(data))
             
             # Crop to square (take the smaller dimension)
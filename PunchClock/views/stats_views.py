@@ -0,0 +1,40 @@
+"""Request instrumentation views."""
+from django.utils.decorators import method_decorator
+from django.contrib.auth.decorators import login_required
+from django.views import View
+from django.http import JsonResponse
+from ..middleware import query_stats
+
+__all__ = [
+    'QueryStatsView',
+]
+
+@method_decorator(login_required, name='dispatch')
+class QueryStatsView(View):
+    """Rolling per-route query counts and SQL time recorded by QueryStatsMiddleware."""
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return JsonResponse({
+                'success': False,
+                'message': 'Only administrators can view query statistics'
+            }, status=403)
+
+        return JsonResponse({
+            'success': True,
+            'window': query_stats.window,
+            'routes': query_stats.summary()
+        })
+
+    def delete(self, request):
+        if not request.user.is_staff:
+            return JsonResponse({
+                'success': False,
+                'message': 'Only administrators can reset query statistics'
+            }, status=403)
+
+        query_stats.reset()
+        return JsonResponse({
+            'success': True,
+            'message': 'Query statistics reset'
+        })
@@ -5,11 +5,16 @@ from django.views import View
 from django.http import JsonResponse
 from ..models import Employee
 
-from ..models import TimeEntry, Employee, Department
+from ..models import TimeEntry, Employee, Department, DailyHours
+from django.db import transaction
+from django.db.models import Sum
 from django.utils import timezone
 from django.contrib.auth.models import User
 import json
 from datetime import datetime, timedelta
+from ..caching import admin_scope, cached_response
+from ..employees import request_employee
+from ..events import publish_event
 __all__ = [
     'GetTodayTimeEntriesView', 
     'GetTodayTimeEntriesView',
@@ -29,23 +34,8 @@ class GetTodayTimeEntriesView(View):
             today = timezone.now().date()
             
             if request.user.is_staff:
-                # Check if admin has an employee record
-                try:
-                    admin_employee = Employee.objects.get(user=request.user)
-                except Employee.DoesNotExist:
-                    # Create employee record for admin
-                    department = None
-                    try:
-                        department = Department.objects.get(name="Management")
-                    except Department.DoesNotExist:
-                        department = Department.objects.create(name="Management")
-                    
-                    admin_employee = Employee.objects.create(
-                        user=request.user,
-                        admin=request.user,
-                        department=department,
-                        hire_date=timezone.now().date()
-                    )
+                # Admin's own employee record, created if missing
+                admin_employee = request_employee(request, create=True)
                 
                 # Get entries for both managed employees and admin's own entries
                 employees = list(Employee.objects.filter(admin=request.user))
@@ -59,16 +49,7 @@ class GetTodayTimeEntriesView(View):
                 ).select_related('employee', 'employee__department')
             else:
                 # For regular employees
-                try:
-                    employee = Employee.objects.get(user=request.user)
-                except Employee.DoesNotExist:
-                    admin_user = User.objects.filter(is_staff=True).first()
-                    employee = Employee.objects.create(
-                        user=request.user,
-                        admin=admin_user,
-                        department=None,
-                        hire_date=timezone.now().date()
-                    )
+                employee = request_employee(request, create=True)
                 
                 time_entries = TimeEntry.objects.filter(
                     employee=employee,
@@ -138,7 +119,7 @@ class UpdateTimeEntryStatusView(View):
                     }, status=403)
             else:
                 # Regular employees can only update their own entries
-                employee = Employee.objects.get(user=request.user)
+                employee = request_employee(request)
                 if time_entry.employee != employee:
                     return JsonResponse({
                         'success': False,
@@ -148,6 +129,10 @@ class UpdateTimeEntryStatusView(View):
             # Update the status
             time_entry.status = status
             time_entry.save()
+
+            publish_event(time_entry.employee.admin_id, 'approval',
+                          entry_ids=[time_entry.id],
+                          status=time_entry.status)
             
             return JsonResponse({
                 'success': True,
@@ -198,7 +183,7 @@ class UpdateTimeEntryStatusView(View):
                     }, status=403)
             else:
                 # Regular employees can only update their own entries
-                employee = Employee.objects.get(user=request.user)
+                employee = request_employee(request)
                 if time_entry.employee != employee:
                     return JsonResponse({
                         'success': False,
@@ -208,6 +193,10 @@ class UpdateTimeEntryStatusView(View):
             # Update the status
             time_entry.status = status
             time_entry.save()
+
+            publish_event(time_entry.employee.admin_id, 'approval',
+                          entry_ids=[time_entry.id],
+                          status=time_entry.status)
             
             return JsonResponse({
                 'success': True,
@@ -244,11 +233,12 @@ class ApproveAllTimeEntriesView(View):
                 status='pending'
             )
             
-            # Count entries before updating
-            count = pending_entries.count()
-            
-            # Update all entries to 'approved'
-            pending_entries.update(status='approved')
+            with transaction.atomic():
+                # Lock the rows, so the ids sent to the dashboards are exactly the ones approved
+                entry_ids = list(pending_entries.select_for_update(of=('self',)).values_list('id', flat=True))
+                count = pending_entries.filter(id__in=entry_ids).update(status='approved')
+
+            publish_event(request.user.id, 'approval', entry_ids=entry_ids, status='approved')
             
             return JsonResponse({
                 'success': True,
@@ -299,6 +289,8 @@ class ClearTimeEntriesView(View):
             
             count = entries_to_clear.count()
             entries_to_clear.delete()
+
+            publish_event(request.user.id, 'clear', employee_id=employee_id, count=count)
             
             return JsonResponse({
                 'success': True,
@@ -359,6 +351,8 @@ class UndoClearTimeEntriesView(View):
             # Clear the session data after restoration
             if 'cleared_entries' in request.session:
                 del request.session['cleared_entries']
+
+            publish_event(request.user.id, 'undo', count=restored_count)
             
             return JsonResponse({
                 'success': True,
@@ -377,7 +371,15 @@ class GetEmployeeStatsView(View):
                     'success': False,
                     'message': 'Only administrators can view employee statistics'
                 }, status=403)
-            
+
+            # Served from cache until the admin's employees or their entries change
+            return cached_response(request, [admin_scope(request.user.id)], lambda: self.stats(request))
+        except Exception as e:
+            print(f"Error in GetEmployeeStatsView: {e}")
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    def stats(self, request):
+        try:
             # Get today's date
             today = timezone.now().date()
             
@@ -387,16 +389,15 @@ class GetEmployeeStatsView(View):
             # Debug: Count all employees in the system
             all_employees_count = Employee.objects.all().count()
             
-            # Get active employees (those who have submitted time entries today)
-            active_employees = Employee.objects.filter(
-                admin=request.user,
-                timeentry__date=today
-            ).distinct().count()
+            # Get active employees (those who have submitted time entries today);
+            # the daily rollup holds exactly one row per active employee and day
+            active_employees = DailyHours.objects.filter(
+                employee__admin=request.user,
+                date=today
+            ).count()
             
             # Debug: Count all active employees regardless of admin
-            all_active_count = Employee.objects.filter(
-                timeentry__date=today
-            ).distinct().count()
+            all_active_count = DailyHours.objects.filter(date=today).count()
             
             # Debug: Print information about all employees in the system
             all_employees = Employee.objects.all()
@@ -417,15 +418,14 @@ class GetEmployeeStatsView(View):
                 status='pending'
             ).count()
             
-            # Calculate average hours today
-            today_entries = TimeEntry.objects.filter(
+            # Calculate average hours per entry today
+            today_totals = DailyHours.objects.filter(
                 employee__admin=request.user,
                 date=today
-            )
+            ).aggregate(total_hours=Sum('total_hours'), entry_count=Sum('entry_count'))
             
-            if today_entries.exists():
-                total_hours = sum(entry.total_hours for entry in today_entries)
-                avg_hours = total_hours / today_entries.count()
+            if today_totals['entry_count']:
+                avg_hours = today_totals['total_hours'] / today_totals['entry_count']
             else:
                 avg_hours = 0
                 
@@ -451,7 +451,15 @@ class GetActiveEmployeesView(View):
                     'success': False,
                     'message': 'Only administrators can view active employee counts'
                 }, status=403)
-            
+
+            # Cached per admin version; approvals older than 24 hours age out
+            # of the count when the cached response expires
+            return cached_response(request, [admin_scope(request.user.id)], lambda: self.active_count(request))
+        except Exception as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    def active_count(self, request):
+        try:
             # Get timestamp from 24 hours ago
             twenty_four_hours_ago = timezone.now() - timedelta(hours=24)
             
@@ -4,21 +4,28 @@ from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 from django.views import View
 from django.http import JsonResponse
+import base64
+import binascii
 import json
-from django.db.models import Max
+from django.db.models import Count, FilteredRelation, Max, Q, Sum
 from ..models import (
-    CalendarSettings, PersonalNote, CompanySettings, TimeEntry, 
-    Employee, ProfilePicture, Department, Export
+    CalendarSettings, CompanySettings, TimeEntry, 
+    Employee, ProfilePicture, Department, Export, DailyHours
 )
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.contrib.auth.models import User
+from ..caching import admin_scope, cached_response, calendar_scope, employee_scope
+from ..employees import request_employee
+from ..events import publish_event
+from ..workdays import working_days_for
 
 __all__ = [
     'PunchTimeView',
     'GetTimeStatisticsView',
     'GetRecentActivitiesView',
     'GetEmployeeTimeEntriesView',
+    'TeamSummaryView',
     'DashboardStatsView',
     'GetTodayHoursView',
     'ResetDailyTrackingView',
@@ -48,44 +55,36 @@ class PunchTimeView(View):
             segment_index = data.get('segment_index', 0)
             
             # Get or create employee record for the current user
-            try:
-                employee = Employee.objects.get(user=request.user)
-            except Employee.DoesNotExist:
-                # If the user is an admin but doesn't have an employee record, create one
-                if request.user.is_staff:
-                    employee = Employee.objects.create(
-                        user=request.user,
-                        admin=request.user,  # Admin is their own admin
-                        department=Department.objects.first(),  # Use first department or create one if needed
-                        hire_date=timezone.now().date()
-                    )
-                else:
-                    # For regular users, find an admin to assign
-                    admin_user = User.objects.filter(is_staff=True).first()
-                    employee = Employee.objects.create(
-                        user=request.user,
-                        admin=admin_user,
-                        department=None,
-                        hire_date=timezone.now().date()
-                    )
-              # Create time entry with session verification
-            entry = TimeEntry.objects.create(
+            employee = request_employee(request, create=True)
+            # Create time entry with session verification. A retried punch (same
+            # session and segment) returns the entry the first attempt created;
+            # the unique constraint settles concurrent retries.
+            entry, created = TimeEntry.objects.get_or_create(
                 employee=employee,
-                date=timezone.now().date(),
-                start_time=start_time,
-                end_time=end_time,
-                entry_type=entry_type,
-                status='pending',
                 session_id=session_id,
-                session_verified=True,  # Server-side verification
-                segment_index=segment_index
+                segment_index=segment_index,
+                defaults={
+                    'date': timezone.now().date(),
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'entry_type': entry_type,
+                    'status': 'pending',
+                    'session_verified': True,  # Server-side verification
+                }
             )
-            
-            # Make sure total_hours is calculated
-            entry.save()
+
+            if created:
+                publish_event(employee.admin_id, 'punch',
+                              entry_id=entry.id,
+                              employee_id=employee.id,
+                              employee=employee.full_name,
+                              date=entry.date.strftime('%Y-%m-%d'),
+                              total_hours=float(entry.total_hours),
+                              status=entry.status)
             
             return JsonResponse({
                 'success': True,
+                'duplicate': not created,
                 'entry': {
                     'id': entry.id,
                     'date': entry.date.strftime('%Y-%m-%d'),
@@ -112,68 +111,48 @@ class GetTimeStatisticsView(View):
                     return JsonResponse({'success': False, 'message': 'Unauthorized'}, status=403)
             else:
                 # Get or create an employee record for the current user
-                try:
-                    employee = Employee.objects.get(user=request.user)
-                except Employee.DoesNotExist:
-                    # If admin without employee record, create one
-                    if request.user.is_staff:
-                        employee = Employee.objects.create(
-                            user=request.user,
-                            admin=request.user,  # Admin is their own admin
-                            department="Management",
-                            hire_date=timezone.now().date()
-                        )
-                    else:
-                        # Regular employee should have an admin
-                        admin_user = User.objects.filter(is_staff=True).first()
-                        employee = Employee.objects.create(
-                            user=request.user,
-                            admin=admin_user,
-                            department="",
-                            hire_date=timezone.now().date()
-                        )
-              # Get today's date for debugging
+                employee = request_employee(request, create=True)
+
+            # Served from cache until one of the employee's entries or calendar days changes
+            return cached_response(request, [employee_scope(employee.id), calendar_scope(employee.user_id)],
+                                   lambda: self.statistics(employee))
+        except Employee.DoesNotExist:
+            return JsonResponse({'success': False, 'message': 'Employee not found'}, status=404)
+        except Exception as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    def statistics(self, employee):
+        try:
+            # Get today's date for debugging
             today = timezone.now().date()
             
             # Calculate weekly hours with debugging info
             week_start = today - timedelta(days=today.weekday())
             week_end = week_start + timedelta(days=6)
-            weekly_entries = TimeEntry.objects.filter(
+            weekly_hours = float(DailyHours.objects.filter(
                 employee=employee,
-                date__range=[week_start, week_end],
-                session_verified=True
-            )
-            weekly_hours = sum(float(entry.total_hours) for entry in weekly_entries)
+                date__range=[week_start, week_end]
+            ).aggregate(total=Sum('verified_hours'))['total'] or 0)
               # Get daily average with improved logic
             end_date = timezone.now().date()
-            # Use last 5 working days (M-F) instead of 30 days for a more accurate average
+            # Use the last two weeks' working days instead of 30 days for a more accurate average
             start_date = end_date - timedelta(days=14)  # Go back 2 weeks for calculation
             
-            daily_entries = TimeEntry.objects.filter(
-                employee=employee,
-                date__range=[start_date, end_date],
-                session_verified=True
-            )
+            # Read the per-day rollups (one row per day with verified entries)
+            date_hours = {
+                day.strftime('%Y-%m-%d'): float(hours)
+                for day, hours in DailyHours.objects.filter(
+                    employee=employee,
+                    date__range=[start_date, end_date],
+                    verified_count__gt=0
+                ).values_list('date', 'verified_hours')
+            }
             
             # Calculate total hours for the period
-            total_period_hours = sum(float(entry.total_hours) for entry in daily_entries)
-            
-            # Group by date to understand working patterns
-            date_hours = {}
-            for entry in daily_entries:
-                date_str = entry.date.strftime('%Y-%m-%d')
-                if date_str not in date_hours:
-                    date_hours[date_str] = 0
-                date_hours[date_str] += float(entry.total_hours)
-            
-            # Count business days (Monday to Friday) in the period for more accurate average
-            business_days = 0
-            current_date = start_date
-            while current_date <= end_date:
-                # 0=Monday, 6=Sunday
-                if current_date.weekday() < 5:  # Weekday (0-4 are Monday-Friday)
-                    business_days += 1
-                current_date += timedelta(days=1)
+            total_period_hours = sum(date_hours.values())
+            
+            # Count working days in the period (the employee's weekend and holidays excluded)
+            business_days = working_days_for(employee.user_id).count(start_date, end_date)
             
             # Calculate daily average based on actual business days, not just days with entries
             # Use at least 1 business day even if calculated value is 0 to avoid division by zero
@@ -190,7 +169,6 @@ class GetTimeStatisticsView(View):
                 daily_average = round(total_period_hours / max(days_with_entries, 1), 2)
               # Print debug info
             print(f"Weekly range: {week_start} to {week_end}")
-            print(f"Weekly entries count: {weekly_entries.count()}")
             print(f"Weekly hours: {weekly_hours}")
             print(f"Daily range: {start_date} to {end_date}")
             print(f"Days with entries: {days_with_entries}")
@@ -205,8 +183,6 @@ class GetTimeStatisticsView(View):
                     'daily_average': daily_average
                 }
             })
-        except Employee.DoesNotExist:
-            return JsonResponse({'success': False, 'message': 'Employee not found'}, status=404)
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)}, status=400)
 
@@ -215,7 +191,9 @@ class GetRecentActivitiesView(View):
     def get(self, request):
         try:
             # Get the current employee
-            employee = Employee.objects.get(user=request.user)
+            employee = request_employee(request)
+            if employee is None:
+                return JsonResponse({'success': False, 'message': 'Employee not found'}, status=404)
             
             # Get entries from the last 4 days
             four_days_ago = timezone.now().date() - timedelta(days=4)
@@ -249,8 +227,56 @@ class GetRecentActivitiesView(View):
             return JsonResponse({'success': False, 'message': str(e)}, status=400)
 
 
+# Output field -> (columns it needs, formatter for a .values() row)
+TIME_ENTRY_FIELDS = {
+    'id': (('id',), lambda row: row['id']),
+    'type': (('entry_type',), lambda row: row['entry_type']),
+    'date': (('date',), lambda row: row['date'].isoformat()),
+    'start_time': (('start_time',), lambda row: row['start_time'].strftime('%H:%M')),
+    'end_time': (('end_time',), lambda row: row['end_time'].strftime('%H:%M') if row['end_time'] else None),
+    'total_hours': (('total_hours',), lambda row: str(row['total_hours'])),
+    'status': (('status',), lambda row: row['status']),
+    'notes': ((), lambda row: ''),  # Default notes since it's not in the model
+    'created_at': (('created_at',), lambda row: row['created_at'].strftime('%Y-%m-%d %H:%M:%S')),
+}
+
+TIME_ENTRIES_PAGE_SIZE = 500
+TIME_ENTRIES_MAX_PAGE_SIZE = 1000
+
+
+def encode_entry_cursor(row):
+    """Opaque cursor pointing just after row in (date, created_at, id) descending order."""
+    key = [row['date'].isoformat(), row['created_at'].isoformat(), row['id']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_entry_cursor(cursor):
+    """Q object selecting the entries after the cursor; raises ValueError if it is malformed."""
+    try:
+        day, created_at, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        day = datetime.strptime(day, '%Y-%m-%d').date()
+        created_at = datetime.fromisoformat(created_at)
+        entry_id = int(entry_id)
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError('Invalid cursor')
+    return (
+        Q(date__lt=day) |
+        Q(date=day, created_at__lt=created_at) |
+        Q(date=day, created_at=created_at, id__lt=entry_id)
+    )
+
+
 @method_decorator(login_required, name='dispatch')
 class GetEmployeeTimeEntriesView(View):
+    """
+    Time entries of one employee for a date or date range, newest first.
+
+    Results are keyset paginated on (date, created_at, id): pass the
+    returned next_cursor as ?cursor= to get the following page, and
+    ?limit= to change the page size. ?fields=id,date,total_hours limits
+    the fields returned (and the columns fetched).
+    """
+
     def get(self, request, employee_id):
         try:
             # Check if the user has permission to view this employee's time entries
@@ -264,7 +290,7 @@ class GetEmployeeTimeEntriesView(View):
             employee = Employee.objects.get(id=employee_id)
             
             # Check if the employee is managed by this admin
-            if employee.admin != request.user:
+            if employee.admin_id != request.user.id:
                 return JsonResponse({
                     'success': False,
                     'message': 'You do not have permission to view this employee\'s time entries'
@@ -274,59 +300,74 @@ class GetEmployeeTimeEntriesView(View):
             end_date = request.GET.get('end_date')
             date_param = request.GET.get('date')
             
-            # If specific date is provided, use that
-            if date_param:
-                try:
+            time_entries = TimeEntry.objects.filter(employee_id=employee.id)
+            try:
+                # If specific date is provided, use that
+                if date_param:
                     entry_date = datetime.strptime(date_param, '%Y-%m-%d').date()
-                    time_entries = TimeEntry.objects.filter(
-                        employee=employee,
-                        date=entry_date
-                    ).order_by('-created_at')
-                except ValueError:
-                    return JsonResponse({
-                        'success': False,
-                        'message': 'Invalid date format. Please use YYYY-MM-DD.'
-                    }, status=400)
-            # If date range is provided, use that
-            elif start_date and end_date:
-                try:
+                    time_entries = time_entries.filter(date=entry_date)
+                # If date range is provided, use that
+                elif start_date and end_date:
                     start = datetime.strptime(start_date, '%Y-%m-%d').date()
                     end = datetime.strptime(end_date, '%Y-%m-%d').date()
-                    time_entries = TimeEntry.objects.filter(
-                        employee=employee,
-                        date__range=[start, end]
-                    ).order_by('-created_at')
-                except ValueError:
+                    time_entries = time_entries.filter(date__range=[start, end])
+                # Default to today
+                else:
+                    time_entries = time_entries.filter(date=timezone.now().date())
+            except ValueError:
+                return JsonResponse({
+                    'success': False,
+                    'message': 'Invalid date format. Please use YYYY-MM-DD.'
+                }, status=400)
+
+            # Field projection
+            fields = [field.strip() for field in request.GET.get('fields', '').split(',') if field.strip()]
+            if not fields:
+                fields = list(TIME_ENTRY_FIELDS)
+            unknown = [field for field in fields if field not in TIME_ENTRY_FIELDS]
+            if unknown:
+                return JsonResponse({
+                    'success': False,
+                    'message': f'Unknown fields: {", ".join(unknown)}'
+                }, status=400)
+
+            try:
+                limit = min(max(int(request.GET.get('limit', TIME_ENTRIES_PAGE_SIZE)), 1), TIME_ENTRIES_MAX_PAGE_SIZE)
+            except ValueError:
+                return JsonResponse({
+                    'success': False,
+                    'message': 'limit must be a number'
+                }, status=400)
+
+            cursor = request.GET.get('cursor')
+            if cursor:
+                try:
+                    time_entries = time_entries.filter(decode_entry_cursor(cursor))
+                except ValueError as e:
                     return JsonResponse({
                         'success': False,
-                        'message': 'Invalid date format. Please use YYYY-MM-DD.'
+                        'message': str(e)
                     }, status=400)
-            # Default to today
-            else:
-                entry_date = timezone.now().date()
-                time_entries = TimeEntry.objects.filter(
-                    employee=employee,
-                    date=entry_date
-                ).order_by('-created_at')
-            
-            # Format the time entries for the response
-            entries_data = []
-            for entry in time_entries:                entries_data.append({
-                    'id': entry.id,
-                    'type': entry.entry_type,
-                    'date': entry.date.strftime('%Y-%m-%d'),
-                    'start_time': entry.start_time.strftime('%H:%M'),
-                    'end_time': entry.end_time.strftime('%H:%M') if entry.end_time else None,
-                    'total_hours': str(entry.total_hours),
-                    'status': entry.status,
-                    'notes': '',  # Default notes since it's not in the model
-                    'created_at': entry.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                })
-            
+
+            # The keyset columns are always fetched to build the next cursor
+            columns = {'id', 'date', 'created_at'}
+            for field in fields:
+                columns.update(TIME_ENTRY_FIELDS[field][0])
+
+            # One extra row tells whether another page follows
+            rows = list(time_entries.order_by('-date', '-created_at', '-id').values(*columns)[:limit + 1])
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            formatters = [(field, TIME_ENTRY_FIELDS[field][1]) for field in fields]
+            entries_data = [{field: format_value(row) for field, format_value in formatters} for row in rows]
+
             return JsonResponse({
                 'success': True,
                 'entries': entries_data,
-                'count': len(entries_data)
+                'count': len(entries_data),
+                'has_more': has_more,
+                'next_cursor': encode_entry_cursor(rows[-1]) if has_more else None
             })
             
         except Employee.DoesNotExist:
@@ -340,6 +381,67 @@ class GetEmployeeTimeEntriesView(View):
                 'message': str(e)
             }, status=500)
 
+@method_decorator(login_required, name='dispatch')
+class TeamSummaryView(View):
+    """
+    Hours of every employee managed by this admin over a date range
+    (month to date by default), split into regular and overtime, in a
+    single grouped query.
+    """
+
+    def get(self, request):
+        try:
+            if not request.user.is_staff:
+                return JsonResponse({
+                    'success': False,
+                    'message': 'You do not have permission to view team statistics'
+                }, status=403)
+
+            today = timezone.now().date()
+            try:
+                start = datetime.strptime(request.GET['start_date'], '%Y-%m-%d').date() if request.GET.get('start_date') else today.replace(day=1)
+                end = datetime.strptime(request.GET['end_date'], '%Y-%m-%d').date() if request.GET.get('end_date') else today
+            except ValueError:
+                return JsonResponse({
+                    'success': False,
+                    'message': 'Invalid date format. Please use YYYY-MM-DD.'
+                }, status=400)
+
+            # The range goes into the join condition, so only the window's entries are joined
+            employees = Employee.objects.filter(admin=request.user).select_related('user', 'department').annotate(
+                range_entries=FilteredRelation('time_entries', condition=Q(time_entries__date__range=[start, end])),
+                hours=Sum('range_entries__total_hours'),
+                overtime=Sum('range_entries__total_hours', filter=Q(range_entries__entry_type='Overtime'))
+            ).order_by('id')
+
+            employees_data = []
+            for employee in employees:
+                total_hours = float(employee.hours or 0)
+                overtime_hours = float(employee.overtime or 0)
+                employees_data.append({
+                    'id': employee.id,
+                    'user_id': employee.user.id,
+                    'full_name': employee.full_name,
+                    'email': employee.user.email,
+                    'department_id': employee.department.id if employee.department else None,
+                    'department': employee.department.name if employee.department else 'N/A',
+                    'total_hours': round(total_hours, 2),
+                    'regular_hours': round(total_hours - overtime_hours, 2),
+                    'overtime_hours': round(overtime_hours, 2)
+                })
+
+            return JsonResponse({
+                'success': True,
+                'start_date': start.strftime('%Y-%m-%d'),
+                'end_date': end.strftime('%Y-%m-%d'),
+                'employees': employees_data
+            })
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'message': str(e)
+            }, status=500)
+
 @method_decorator(login_required, name='dispatch')
 class DashboardStatsView(View):
     """View for getting dashboard statistics for admin users."""
@@ -351,39 +453,34 @@ class DashboardStatsView(View):
                 'success': False,
                 'message': 'Unauthorized access'
             }, status=403)
-            
+
+        # Served from cache until the admin's employees or their entries change
+        return cached_response(request, [admin_scope(request.user.id)], lambda: self.stats(request))
+
+    def stats(self, request):
         try:
             # Count total employees managed by this admin + the admin themselves
             employees_count = Employee.objects.filter(admin=request.user).count()
             # Add 1 for the admin only if they do NOT have an Employee record
-            admin_has_employee = Employee.objects.filter(user=request.user).exists()
+            admin_has_employee = request_employee(request) is not None
             total_employees = employees_count + (1 if not admin_has_employee else 0)
 
-            # Count active employees today (those with time entries today)
+            # Count active employees today (those with time entries today) and
+            # their hours from the daily rollups, one row per active employee
             today = timezone.now().date()
-            managed_employees = Employee.objects.filter(admin=request.user)
-            active_employees = TimeEntry.objects.filter(
-                employee__in=managed_employees,
-                date=today
-            ).values('employee').distinct().count()
-            # Do NOT add 1 for admin, since admin is already in Employee table if they exist            # Calculate average hours per employee
-            avg_hours = 0
-            active_employee_hours = {}
-            entries = TimeEntry.objects.filter(
-                employee__in=managed_employees,
+            today_totals = DailyHours.objects.filter(
+                employee__admin=request.user,
                 date=today
+            ).aggregate(
+                active=Count('id'),
+                total_hours=Sum('total_hours')
             )
-            
-            # Group hours by employee
-            for entry in entries:
-                if entry.employee_id not in active_employee_hours:
-                    active_employee_hours[entry.employee_id] = 0
-                active_employee_hours[entry.employee_id] += float(entry.total_hours) if entry.total_hours else 0
-
+            active_employees = today_totals['active']
+            # Do NOT add 1 for admin, since admin is already in Employee table if they exist
             # Calculate average of active employees only
-            if active_employee_hours:
-                total_employee_hours = sum(active_employee_hours.values())
-                avg_hours = round(total_employee_hours / len(active_employee_hours), 1)
+            avg_hours = 0
+            if active_employees:
+                avg_hours = round(float(today_totals['total_hours'] or 0) / active_employees, 1)
 
             return JsonResponse({
                 'success': True,
@@ -405,9 +502,8 @@ class GetTodayHoursView(View):
             today = timezone.now().date()
             
             # Get the employee
-            try:
-                employee = Employee.objects.get(user=request.user)
-            except Employee.DoesNotExist:
+            employee = request_employee(request)
+            if employee is None:
                 return JsonResponse({'success': False, 'message': 'Employee record not found'}, status=404)
                 
             # Get all entries for today
@@ -459,9 +555,8 @@ class ResetDailyTrackingView(View):
                 return JsonResponse({'success': False, 'message': 'Session ID is required'}, status=400)
                 
             # Get the employee
-            try:
-                employee = Employee.objects.get(user=request.user)
-            except Employee.DoesNotExist:
+            employee = request_employee(request)
+            if employee is None:
                 return JsonResponse({'success': False, 'message': 'Employee record not found'}, status=404)
               # Get the next segment index for new sessions
             today = timezone.now().date()
@@ -528,46 +623,37 @@ class CreateTimeEntryView(View):
                     }, status=404)
             else:
                 # User creating entry for themselves
-                try:
-                    employee = Employee.objects.get(user=request.user)
-                except Employee.DoesNotExist:
-                    # If no employee record, create one
-                    if request.user.is_staff:
-                        employee = Employee.objects.create(
-                            user=request.user,
-                            admin=request.user,  # Admin is their own admin
-                            department=Department.objects.first(),  # Use first department or create one
-                            hire_date=timezone.now().date()
-                        )
-                    else:
-                        # Regular employee should have an admin
-                        admin_user = User.objects.filter(is_staff=True).first()
-                        employee = Employee.objects.create(
-                            user=request.user,
-                            admin=admin_user,
-                            department=Department.objects.first(),
-                            hire_date=timezone.now().date()
-                        )
-            
-            # Create the time entry
-            entry = TimeEntry.objects.create(
+                employee = request_employee(request, create=True)
+            
+            # Create the time entry; a retry with the same session and segment
+            # returns the existing entry, like a punch
+            entry, created = TimeEntry.objects.get_or_create(
                 employee=employee,
-                date=date_obj,
-                start_time=start_time,
-                end_time=end_time,
-                entry_type=entry_type,
-                status='pending',  # Default status
                 session_id=data.get('session_id', f"manual-{timezone.now().timestamp()}"),
-                session_verified=True,  # Manual entries are verified by default
-                segment_index=data.get('segment_index', 0)
+                segment_index=data.get('segment_index', 0),
+                defaults={
+                    'date': date_obj,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'entry_type': entry_type,
+                    'status': 'pending',  # Default status
+                    'session_verified': True,  # Manual entries are verified by default
+                }
             )
-            
-            # Make sure total_hours is calculated
-            entry.save()
+
+            if created:
+                publish_event(employee.admin_id, 'punch',
+                              entry_id=entry.id,
+                              employee_id=employee.id,
+                              employee=employee.full_name,
+                              date=entry.date.strftime('%Y-%m-%d'),
+                              total_hours=float(entry.total_hours),
+                              status=entry.status)
             
             return JsonResponse({
                 'success': True,
-                'message': 'Time entry created successfully',
+                'message': 'Time entry created successfully' if created else 'Time entry already exists',
+                'duplicate': not created,
                 'entry': {
                     'id': entry.id,
                     'date': entry.date.strftime('%Y-%m-%d'),
@@ -0,0 +1,88 @@
+"""
+Working-day calendars for statistics and export denominators.
+
+WorkingDays.count() answers "how many working days between two dates" in
+constant time for any range: the weekend is a Monday-first 7-day mask
+whose prefix sums count the whole weeks plus the remainder, and holidays
+on working days are kept as sorted day ordinals, whose insertion point
+(bisect) is the prefix count of holidays before a date. Nothing is
+walked day by day.
+
+Calendars come from CalendarSettings.weekend_days (JavaScript numbering,
+Sunday=0) and the user's Holiday rows, and are cached per user under the
+user's calendar version, so any holiday or weekend change is picked up on
+the next read.
+"""
+from bisect import bisect_left
+from itertools import accumulate
+
+from django.core.cache import cache
+
+from .caching import calendar_scope, get_versions
+from .models import CalendarSettings, Holiday
+
+# Saturday and Sunday, for users who never marked their weekend
+DEFAULT_WEEKEND_DAYS = [0, 6]
+
+
+class WorkingDays:
+    """A user's weekend and holidays, counted with prefix sums."""
+
+    def __init__(self, weekend_days=DEFAULT_WEEKEND_DAYS, holidays=()):
+        # date.weekday() is Monday=0; the calendar pages use getDay(), Sunday=0
+        self.weekend = frozenset((int(day) - 1) % 7 for day in weekend_days)
+        self.week_prefix = [0, *accumulate(0 if weekday in self.weekend else 1 for weekday in range(7))]
+        self.holidays = sorted({day.toordinal() for day in holidays if day.weekday() not in self.weekend})
+
+    def is_working_day(self, day):
+        return day.weekday() not in self.weekend and not self._is_holiday(day.toordinal())
+
+    def _is_holiday(self, ordinal):
+        index = bisect_left(self.holidays, ordinal)
+        return index < len(self.holidays) and self.holidays[index] == ordinal
+
+    def _before(self, ordinal):
+        """Working days from 0001-01-01 (a Monday) up to, not including, the ordinal."""
+        weeks, rest = divmod(ordinal - 1, 7)
+        return weeks * self.week_prefix[7] + self.week_prefix[rest] - bisect_left(self.holidays, ordinal)
+
+    def count(self, start, end):
+        """Working days from start to end inclusive (0 when end is before start)."""
+        if end < start:
+            return 0
+        return self._before(end.toordinal() + 1) - self._before(start.toordinal())
+
+
+def _cache_key(user_id, version):
+    return f'punchclock:workdays:{user_id}:{version}'
+
+
+def working_days(user_ids):
+    """
+    {user_id: WorkingDays} for the users, building the uncached ones with
+    one query for their settings and one for their holidays.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    versions = get_versions([calendar_scope(user_id) for user_id in user_ids])
+    keys = {user_id: _cache_key(user_id, version) for user_id, version in zip(user_ids, versions)}
+    cached = cache.get_many(keys.values())
+    calendars = {user_id: cached[key] for user_id, key in keys.items() if key in cached}
+
+    missing = [user_id for user_id in user_ids if user_id not in calendars]
+    if missing:
+        weekends = dict(CalendarSettings.objects.filter(user_id__in=missing).values_list('user_id', 'weekend_days'))
+        holidays = {}
+        for user_id, day in Holiday.objects.filter(user_id__in=missing).values_list('user_id', 'date'):
+            holidays.setdefault(user_id, []).append(day)
+        built = {
+            user_id: WorkingDays(weekends.get(user_id) or DEFAULT_WEEKEND_DAYS, holidays.get(user_id, ()))
+            for user_id in missing
+        }
+        cache.set_many({keys[user_id]: calendar for user_id, calendar in built.items()})
+        calendars.update(built)
+    return calendars
+
+
+def working_days_for(user_id):
+    """The user's WorkingDays; see working_days()."""
+    return working_days([user_id])[user_id]
@@ -38,5 +38,9 @@ ls -la /usr/bin/wkhtmltopdf
 ls -la /usr/local/bin/wkhtmltopdf
 ls -la /usr/local/bin/wkhtmltopdf-xvfb
 
-# Start the application
-exec python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+# The source may be mounted over the image, so collect static files again
+python manage.py collectstatic --no-input
+
+# Start the application; gunicorn runs as PID 1 so `kill -HUP 1` reloads it
+# gracefully. SERVER_MODE=asgi serves the live dashboard event stream.
+exec gunicorn -c ClockingInAndOut/gunicorn.conf.py
\ No newline at end of file